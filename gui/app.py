@@ -4,7 +4,10 @@ import threading
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from simulator.core import run_simulation  
+from simulator.core import run_simulation, fight_attack_counts, COUNTED_ATTACKS, COUNTS_SIZE
+from simulator.pool import SimulationPool
+from simulator.cache import ResultCache
+from simulator.compare import compare_configs
 
 
 class WarriorSimApp(tk.Tk):
@@ -13,6 +16,13 @@ class WarriorSimApp(tk.Tk):
         self.title("WoW BB Warrior Simulator")
         self.geometry("900x1000")
 
+        # Simulation workers, started on the first run and kept until the window closes
+        self.pool = SimulationPool()
+        self.result_cache = ResultCache()
+        # Options of the last run, rerun beside the next one for a paired comparison
+        self.last_config = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # ---------- Main Container ----------
         main_frame = ttk.Frame(self)
         main_frame.pack(fill="both", expand=True)
@@ -102,6 +112,10 @@ class WarriorSimApp(tk.Tk):
         self.use_cleave = tk.BooleanVar(value=False)
         self.fight_length = tk.DoubleVar(value=140.0)
         self.iterations = tk.IntVar(value=5000)
+        self.keep_fight_counts = tk.BooleanVar(value=False)
+        self.target_ci = tk.DoubleVar(value=0.0)
+        self.seed = tk.IntVar(value=1)
+        self.paired_compare = tk.BooleanVar(value=False)
         self.gcd_delay = tk.DoubleVar(value=0.0)
         self.dual_wield = tk.BooleanVar(value=True)
         self.multi = tk.DoubleVar(value=1.0)
@@ -203,10 +217,19 @@ class WarriorSimApp(tk.Tk):
         ttk.Label(row, text="GCD Delay").pack(side="left")
         ttk.Entry(row, textvariable=self.gcd_delay, width=10).pack(side="left")
 
+        row = ttk.Frame(frame)
+        row.pack(fill="x", pady=2)
+        ttk.Label(row, text="Target ± DPS (95%, 0 = fixed iterations)").pack(side="left")
+        ttk.Entry(row, textvariable=self.target_ci, width=10).pack(side="left")
+        ttk.Label(row, text="Seed (0 = random)").pack(side="left")
+        ttk.Entry(row, textvariable=self.seed, width=10).pack(side="left")
+        ttk.Checkbutton(row, text="Paired vs previous", variable=self.paired_compare).pack(side="left", padx=5)
+
         row = ttk.Frame(frame)
         row.pack(fill="x", pady=2)
         ttk.Label(row, text="Damage Multiplier").pack(side="left")
         ttk.Entry(row, textvariable=self.multi, width=10).pack(side="left")
+        ttk.Checkbutton(row, text="Keep per-fight counts", variable=self.keep_fight_counts).pack(side="left", padx=5)
         # ---------- Checkbox Grid ----------
 
         row = ttk.Frame(frame)
@@ -290,8 +313,16 @@ class WarriorSimApp(tk.Tk):
         ttk.Checkbutton(checkbox_frame, text="Tank dummy", variable=self.tank_dummy)\
             .grid(row=7, column=2, sticky="w", pady=2)
         
-        self.run_button = ttk.Button(frame, text="Run Simulation", command=self._run_simulation_thread)
-        self.run_button.pack(pady=10)
+        run_row = ttk.Frame(frame)
+        run_row.pack(pady=(10, 2))
+        self.run_button = ttk.Button(run_row, text="Run Simulation", command=self._run_simulation_thread)
+        self.run_button.pack(side="left", padx=5)
+        self.cancel_button = ttk.Button(run_row, text="Cancel", command=self._cancel_simulation, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+        self.progress_bar = ttk.Progressbar(frame, maximum=1.0)
+        self.progress_bar.pack(fill="x", padx=5)
+        self.progress_label = ttk.Label(frame, text="")
+        self.progress_label.pack(pady=(0, 10))
         row = ttk.Frame(frame)
         row.pack(fill="x", pady=2)
         ttk.Label(row, text="BT Cost").pack(side="left")
@@ -350,6 +381,7 @@ class WarriorSimApp(tk.Tk):
         parent = self.results_frame
         self.prev_mean_label = ttk.Label(parent, text="Previous DPS: -")
         self.mean_label = ttk.Label(parent, text="Mean DPS: -")
+        self.precision_label = ttk.Label(parent, text="Iterations: -")
         self.white_MH_label = ttk.Label(parent, text="White MH DPS: -")
         self.white_OH_label = ttk.Label(parent, text="White OH DPS: -")
         self.hs_label = ttk.Label(parent, text="Heroic Strike DPS: -")
@@ -383,7 +415,7 @@ class WarriorSimApp(tk.Tk):
         self.avg_OH_label = ttk.Label(parent, text="Avg OH Damage:")
         self.avg_OH_value = ttk.Label(parent, textvariable=self.avg_oh_var)
 
-        for lbl in [self.prev_mean_label,self.mean_label, self.white_MH_label, self.white_OH_label, self.hs_label, self.cleave_label,
+        for lbl in [self.prev_mean_label,self.mean_label, self.precision_label, self.white_MH_label, self.white_OH_label, self.hs_label, self.cleave_label,
                     self.slam_MH_label, self.slam_OH_label, self.WW_label, self.BT_label, self.DR_label, self.RB_label, self.ambi_label,
                     self.flurry_label, self.enrage_label, self.crusader_label, self.crusader_oh_label, self.Empyrian_Demolisher_label,
                     self.bonereavers_label, self.eternal_flame_label,
@@ -392,12 +424,35 @@ class WarriorSimApp(tk.Tk):
             lbl.pack(anchor="w", pady=1)
 
     # ---------- Simulation Methods ----------
+    def _on_close(self):
+        self.pool.shutdown()
+        self.destroy()
+
     def _run_simulation_thread(self):
+        # Widgets are only configured from the Tk main loop: reset them here and
+        # let the worker thread hand its updates back through self.after
+        self.run_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(value=0)
+        self.progress_label.config(text="")
+        self.cancel_event = threading.Event()
         thread = threading.Thread(target=self._run_simulation)
         thread.start()
 
+    def _simulation_done(self):
+        self.run_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+    def _cancel_simulation(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+
+    def _show_progress(self, info):
+        self.progress_bar.config(value=info["done"] / max(info["total"], 1))
+        self.progress_label.config(text=f"{info['done']:,} / {info['total']:,} fights, {info['fights_per_sec']:,.0f}/s, "
+                                        f"{info['mean_total_dps']:.1f} ± {info['ci_half_width']:.1f} DPS")
+
     def _run_simulation(self):
-        self.run_button.config(state="disabled")
         try:
             stats = {k: v.get() for k, v in self.stats.items()}
 
@@ -419,8 +474,7 @@ class WarriorSimApp(tk.Tk):
             prio_list.sort(key=lambda x: x[0])
             final_priority = [x[1] for x in prio_list]
 
-            result = run_simulation(
-                iterations=self.iterations.get(),
+            config = dict(
                 mh_speed=self.mh_speed.get(),
                 oh_speed=self.oh_speed.get(),
                 fight_length=self.fight_length.get(),
@@ -471,22 +525,72 @@ class WarriorSimApp(tk.Tk):
                 mark_of_the_wild=self.mark_of_the_wild.get(),
                 blood_frenzy=self.blood_frenzy.get()
             )
-            self._show_results(result)
-            self.last_result = result
+            progress = lambda info: self.after(0, self._show_progress, info)
+            comparison = None
+            if self.paired_compare.get() and self.last_config is not None:
+                # Rerun the previous config on the same fights and rolls as this one
+                comparison = compare_configs(
+                    [self.last_config, config],
+                    iterations=self.iterations.get(),
+                    seed=self.seed.get() or None,
+                    raw=self.keep_fight_counts.get(),
+                    pool=self.pool,
+                    progress=progress,
+                    cancel=self.cancel_event,
+                    cache=self.result_cache,
+                )
+                if len(comparison["results"]) < 2:  # cancelled while rerunning the previous config
+                    self.after(0, lambda: self.progress_label.config(text="Cancelled"))
+                    return
+                result = comparison["results"][1]
+            else:
+                result = run_simulation(
+                    iterations=self.iterations.get(),
+                    raw=self.keep_fight_counts.get(),
+                    pool=self.pool,
+                    target_ci=self.target_ci.get() or None,
+                    progress=progress,
+                    cancel=self.cancel_event,
+                    seed=self.seed.get() or None,
+                    cache=self.result_cache,
+                    **config
+                )
+            if result["cached"]:
+                self.after(0, lambda: self.progress_label.config(text="Loaded from cache"))
+            elif result["resumed"]:
+                resumed = result["resumed"]
+                self.after(0, lambda: self.progress_label.config(text=f"Topped up a cached run of {resumed:,} fights"))
+            if result["cancelled"]:
+                done = result["iterations"]
+                self.after(0, lambda: self.progress_label.config(text=f"Cancelled after {done:,} fights"))
+            if not result["iterations"]:
+                return
             # Save previous result if it exists
             if hasattr(self, "last_result"):
                 self.prev_result = self.last_result
-                self.last_result = result
+            self.last_result = result
+            self.last_config = config
+            self.after(0, self._show_results, result)
+            if comparison is not None and not comparison["cancelled"]:
+                self.after(0, self._show_comparison, comparison)
 
             
         except Exception as e:
-            messagebox.showerror("Error", str(e))
+            self.after(0, messagebox.showerror, "Error", str(e))
         finally:
-            self.run_button.config(state="normal")
+            self.after(0, self._simulation_done)
             
 
+    def _show_comparison(self, comparison):
+        diff = comparison["differences"][1]
+        text = f"Previous DPS: {comparison['results'][0]['mean_total_dps']:.1f}  (paired change {diff['mean']:+.1f} ± {diff['ci_half_width']:.1f}"
+        if diff["iterations_saved"] is not None:
+            text += f", {diff['independent_iterations']:,} fights each unpaired"
+        self.prev_mean_label.config(text=text + ")")
+
     def _show_results(self, result):
         self.mean_label.config(text=f"Mean DPS: {result['mean_total_dps']:.1f}")
+        self.precision_label.config(text=f"Iterations: {result['iterations']}  (std error {result['stderr']:.2f} DPS)")
         self.white_MH_label.config(text=f"White MH DPS: {result['mean_white_MH_dps']:.1f}")
         self.white_OH_label.config(text=f"White OH DPS: {result['mean_white_OH_dps']:.1f}")
         self.slam_MH_label.config(text=f"Slam MH DPS: {result['mean_slam_MH_dps']:.1f}")
@@ -522,40 +626,85 @@ class WarriorSimApp(tk.Tk):
 
 
         self.ax.clear()
-        self.ax.hist(result['results_total'], bins=30, color='skyblue', edgecolor='black')
+        bins = result['stats']['total_dps'].histogram(max_bins=30)
+        self.ax.bar([left for left, _, _ in bins], [count for _, _, count in bins], width=[width for _, width, _ in bins],
+                    align="edge", color='skyblue', edgecolor='black')
         self.ax.set_title("Total DPS Distribution")
         self.ax.set_xlabel("DPS")
         self.ax.set_ylabel("Frequency")
         self.canvas.draw()
 
     def _show_attack_counts(self):
-       try:
-           # Check if last simulation result exists
-           if not hasattr(self, "last_result"):
-               messagebox.showinfo("Info", "Run a simulation first!")
-               return
-    
-           counts_text = ""
-           # Iterate over fights
-           for i, fight_counts in enumerate(self.last_result['all_attack_counts']):
-               counts_text += f"Fight {i+1}:\n"
-               for atk, val in fight_counts.items():
-                   counts_text += f"  {atk}: Hits={val['hits']}, Crits={val['crits']}, Misses={val['misses']}, Dodges={val['dodges']}\n"
-               counts_text += "\n"
-    
-           # Show in a scrollable window
-           win = tk.Toplevel(self)
-           win.title("All Attack Counts")
-           text = tk.Text(win, width=60, height=30)
-           text.pack(side="left", fill="both", expand=True)
-           scrollbar = ttk.Scrollbar(win, command=text.yview)
-           scrollbar.pack(side="right", fill="y")
-           text.configure(yscrollcommand=scrollbar.set)
-           text.insert("1.0", counts_text)
-           text.config(state="disabled")
-    
-       except Exception as e:
-           messagebox.showerror("Error", str(e))
+        try:
+            # Check if last simulation result exists
+            if not hasattr(self, "last_result"):
+                messagebox.showinfo("Info", "Run a simulation first!")
+                return
+            result = self.last_result
+
+            win = tk.Toplevel(self)
+            win.title("Attack Counts")
+
+            # Summary over all fights: totals, per-fight mean ± std and range, rates
+            summary_frame = ttk.LabelFrame(win, text=f"All fights ({result['iterations']})")
+            summary_frame.pack(fill="x", padx=5, pady=5)
+            columns = ("attack", "hits", "crits", "misses", "dodges", "hits_per_fight", "hits_range",
+                       "crits_per_fight", "crit_rate", "miss_rate", "dodge_rate")
+            headings = ("Attack", "Hits", "Crits", "Misses", "Dodges", "Hits/fight", "Hits min-max",
+                        "Crits/fight", "Crit %", "Miss %", "Dodge %")
+            used = [(atk, entry) for atk, entry in result["attack_counts"].items() if entry["hits"]["total"]]
+            table = ttk.Treeview(summary_frame, columns=columns, show="headings", height=max(len(used), 1))
+            for col, heading in zip(columns, headings):
+                table.heading(col, text=heading)
+                table.column(col, width=90 if col != "attack" else 70, anchor="e" if col != "attack" else "w")
+            table.pack(fill="x")
+            for atk, entry in used:
+                hits, crits = entry["hits"], entry["crits"]
+                table.insert("", "end", values=(
+                    atk, hits["total"], crits["total"], entry["misses"]["total"], entry["dodges"]["total"],
+                    f"{hits['per_fight']:.1f} ± {hits['std']:.1f}", f"{hits['min']:.0f}-{hits['max']:.0f}",
+                    f"{crits['per_fight']:.1f}", f"{entry['crit_rate']*100:.1f}",
+                    f"{entry['miss_rate']*100:.1f}", f"{entry['dodge_rate']*100:.1f}"))
+
+            # Drill-down: one fight at a time, rendered when it is picked
+            detail_frame = ttk.LabelFrame(win, text="Single fight")
+            detail_frame.pack(fill="both", expand=True, padx=5, pady=5)
+            all_counts = result.get("all_attack_counts")
+            fights = len(all_counts) // COUNTS_SIZE if all_counts is not None else 0
+            if not fights:
+                ttk.Label(detail_frame, text="Tick \"Keep per-fight counts\" before running to browse single fights.")\
+                    .pack(padx=5, pady=5)
+                return
+
+            fight_var = tk.IntVar(value=1)
+            fight_table = ttk.Treeview(detail_frame, columns=columns[:5], show="headings", height=len(COUNTED_ATTACKS))
+            for col, heading in zip(columns[:5], headings[:5]):
+                fight_table.heading(col, text=heading)
+                fight_table.column(col, width=90 if col != "attack" else 70, anchor="e" if col != "attack" else "w")
+            render = lambda *_: self._render_fight_counts(fight_table, all_counts, fights, fight_var)
+
+            row = ttk.Frame(detail_frame)
+            row.pack(fill="x", pady=2)
+            ttk.Label(row, text=f"Fight (1-{fights})").pack(side="left")
+            spinbox = ttk.Spinbox(row, from_=1, to=fights, textvariable=fight_var, width=10, command=render)
+            spinbox.pack(side="left")
+            spinbox.bind("<Return>", render)
+            fight_table.pack(fill="both", expand=True)
+            render()
+
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def _render_fight_counts(self, table, all_counts, fights, fight_var):
+        try:
+            fight = fight_var.get() - 1
+        except tk.TclError:  # half-typed number
+            return
+        if not 0 <= fight < fights:
+            return
+        table.delete(*table.get_children())
+        for atk, val in fight_attack_counts(all_counts, fight).items():
+            table.insert("", "end", values=(atk, val["hits"], val["crits"], val["misses"], val["dodges"]))
 
 
 
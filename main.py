@@ -1,9 +1,9 @@
-from gui.app import WarriorSimApp  # import the Tkinter GUI
-
 if __name__ == "__main__":
     import multiprocessing as mp
     mp.freeze_support()   # REQUIRED on Windows
 
+    # Imported here so spawned simulation workers don't load Tk and matplotlib
+    from gui.app import WarriorSimApp
+
     app = WarriorSimApp()
     app.mainloop()
-
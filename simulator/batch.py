@@ -0,0 +1,769 @@
+"""
+Lockstep batch engine: simulates many fights at once as NumPy arrays.
+
+    run_simulation(iterations, engine="batch", ...)
+    chunk = batch_worker((first, iterations, seed, fight_kwargs, raw))
+
+Every fight keeps its own clock and three timers (GCD, MH swing, OH
+swing). Each step processes the next event of every fight that is still
+running, same-time events in the order they were scheduled like the
+scalar engine's (time, seq) heap. Each handler works on the index array
+of the fights whose event fires, so rolls are only drawn for them. Rolls come from one numpy Generator per
+block of fights, so results match the scalar engine in distribution, not fight by
+fight (proc_sampling, event_engine and rng_substreams don't apply here).
+
+batch_worker takes the same fight_kwargs as _worker and returns the same
+keys. Mechanics the batch engine does not model yet (see batch_unsupported)
+make it fall back to the scalar _worker automatically:
+
+  - extra attacks (HoJ, Flurry Axe, Ironfoe) and bleed procs (Rend Garg,
+    Blood Talon)
+  - abilities other than DW, SLAM_PROC, BT, WW and SLAM_HARD; DR, RB and
+    RB_BUFF are accepted only without their talent (they never cast)
+  - the dragon_roar, dragon_warrior, raging_blow, bloodthirsty,
+    raging_onslaught, here_comes_the_big_one, titans_fury, cleaving_slam
+    and power_slam talents (so no Enrage)
+  - more than one target, Cleave
+  - smf (off-hand Slam), tank_dummy, Mighty Rage Potion
+  - rage_watch=False (the legacy swing-driven GCD wakeups)
+"""
+from simulator.core import (FightState, GCD_ACTIONS, MISS, DODGE, GLANCE, CRIT, _worker, new_chunk, RESULT_METRICS,
+                            _attack_thresholds, classify_attack_rolls, COUNTS_SIZE, HITS, CRITS, MISSES, DODGES, ATK_MH, ATK_OH, ATK_HS, ATK_SLAM_MH, ATK_WW, ATK_BT)
+from simulator.procs import ALL_PROCS
+from simulator.stats import RunningStats
+from simulator.rng import fight_seed
+
+try:
+    import numpy as np
+except ImportError:  # the scalar engine doesn't need numpy
+    np = None
+
+INF = float("inf")
+
+# Damage factor of a white swing per outcome code
+_WHITE_FACTOR = np.array([0.0, 0.0, 0.75, 2.0, 1.0]) if np is not None else None
+
+# Timer slots per fight
+TIMERS = (GCD, MH_SWING, OH_SWING) = range(3)
+_NO_SEQ = np.iinfo(np.int64).max if np is not None else None
+
+BATCH_ABILITIES = {"DW", "SLAM_PROC", "BT", "WW", "SLAM_HARD"}
+_TALENT_ABILITIES = {"DR": "dragon_roar", "RB": "raging_blow", "RB_BUFF": "raging_blow"}
+_UNSUPPORTED_TALENTS = ("dragon_roar", "dragon_warrior", "raging_blow", "bloodthirsty", "raging_onslaught",
+                        "here_comes_the_big_one", "titans_fury", "cleaving_slam", "power_slam")
+
+# Deep Wounds applications remembered per fight for the end-of-fight settle
+_DW_RING = 32
+
+# Fights advanced together; bounds the memory of one lockstep pass
+BATCH_SIZE = 16384
+
+
+def batch_unsupported(fight_kwargs):
+    """List of the mechanics in fight_kwargs the batch engine can't simulate (empty = supported)."""
+    reasons = []
+    if np is None:
+        reasons.append("numpy is not installed")
+    get = fight_kwargs.get
+    for name in get("ability_priority") or ():
+        if name in BATCH_ABILITIES:
+            continue
+        talent = _TALENT_ABILITIES.get(name)
+        if talent is None or get(talent, False):
+            reasons.append(f"ability {name}")
+    for talent in _UNSUPPORTED_TALENTS:
+        if get(talent, False):
+            reasons.append(f"talent {talent}")
+    if get("num_targets", 1) > 1 or get("use_cleave", False):
+        reasons.append("multiple targets / Cleave")
+    if get("smf", False):
+        reasons.append("smf off-hand Slam")
+    if get("tank_dummy", False):
+        reasons.append("tank_dummy")
+    if get("mighty_rage_potion_time", -1) >= 0 or get("mighty_rage_potion_prepull_time", 0) > 0:
+        reasons.append("Mighty Rage Potion")
+    if not get("rage_watch_enabled", True):
+        reasons.append("rage_watch=False")
+    if get("HoJ", False):
+        reasons.append("extra attacks (HoJ)")
+    for name in list(get("MH_procs") or ()) + list(get("OH_procs") or ()):
+        proc = ALL_PROCS.get(name, {})
+        if proc.get("mh_extra_hit") or proc.get("Ironfoe"):
+            reasons.append(f"extra attacks ({name})")
+        if proc.get("bleed"):
+            reasons.append(f"bleed proc ({name})")
+    return reasons
+
+
+# -------------------------
+# Structure-of-arrays fight state
+# -------------------------
+class BatchFights:
+    """
+    n fights of one configuration. Scalars that are the same for every
+    fight (speeds, costs, static stats, proc tables) come from a prototype
+    FightState, so the setup rules live in one place.
+    """
+    def __init__(self, fight_kwargs, n, rng):
+        proto = FightState(**fight_kwargs)
+        self.proto = proto
+        self.n = n
+        self.rng = rng
+        self.fight_length = proto.fight_length
+        # (name, rage cost) in priority order
+        self.priority = [(name, getattr(proto, GCD_ACTIONS[name]["cost"])) for name in proto.ability_priority
+                         if name in BATCH_ABILITIES]
+
+        zeros = lambda: np.zeros(n)
+        full = lambda value: np.full(n, value, dtype=float)
+        flags = lambda: np.zeros(n, dtype=bool)
+
+        self.zeros = zeros()  # read-only
+        self.time = zeros()
+        self.last_event_time = zeros()
+        self.rage = full(proto.rage)
+
+        # One pending time per timer and fight (INF = none), plus the order
+        # it was scheduled in: same-time events run in scheduling order, like
+        # the scalar engine's (time, seq) heap. Watch wakeups reuse the GCD slot.
+        self.timers = np.full((len(TIMERS), n), INF)
+        self.seqs = np.zeros((len(TIMERS), n), dtype=np.int64)
+        self.t_gcd, self.t_mh, self.t_oh = self.timers
+        self.seq = 0
+        everyone = np.ones(n, dtype=bool)
+        self._schedule(MH_SWING, everyone, 0.0)
+        self._schedule(GCD, everyone, 0.1)
+        if proto.dual_wield:
+            self._schedule(OH_SWING, everyone, 0.18)
+
+        # Rotation state
+        self.next_allowed_gcd = zeros()
+        self.slam_lockout_until = zeros()
+        self.hs_queue = flags()
+        self.slam_proc = flags()
+        self.flurry = np.zeros(n, dtype=np.int64)
+        self.waiting = flags()
+        self.rage_watch = full(INF)
+        self.bt_ready = zeros()
+        self.ww_ready = zeros()
+        self.dw_next = zeros()
+
+        # Death Wish, Bloodlust, Bloodfury, Ambidextrous
+        self.dw_end = zeros()
+        self.dw_active = flags()
+        self.dw_last = zeros()
+        self.dw_uptime = zeros()
+        self.bl_end = full(-INF)
+        self.bl_next = zeros()
+        self.bf_end = full(-INF)
+        self.bf_last = full(-INF)
+        self.ambi_end = np.zeros((n, proto.ambidextrous.max_stacks))
+
+        # Damage and uptime accumulators
+        for name in ("total_damage", "proc_damage", "white_MH_damage", "white_OH_damage", "hs_damage",
+                     "WW_damage", "BT_damage", "slam_damage_MH", "total_ambi", "flurry_time", "dw_damage"):
+            setattr(self, name, zeros())
+        self.counts = np.zeros((COUNTS_SIZE, n), dtype=np.int64)  # the scalar counter layout, one column per fight
+
+        # Deep Wounds: full damage is booked on trigger, the ring lets us
+        # take back the ticks that land after the fight's last event
+        self.dw_ring_start = np.full((n, _DW_RING), INF)
+        self.dw_ring_tick = np.zeros((n, _DW_RING))
+        self.dw_ring_pos = np.zeros(n, dtype=np.int64)
+        self.mh_roll = (int(proto.min_dmg), int(proto.max_dmg) - int(proto.min_dmg) + 1)
+        self.oh_roll = (int(proto.oh_min_dmg), int(proto.oh_max_dmg) - int(proto.oh_min_dmg) + 1)
+
+        self._setup_procs()
+
+    # -------------------------
+    # Procs and buffs
+    # -------------------------
+    def _setup_procs(self):
+        proto = self.proto
+        n = self.n
+        self.proc_cooldowns = np.zeros((len(proto.proc_cooldowns), n))
+        # One record per buff name: shared by every table that can apply it
+        self.buffs = {}
+        for table in (proto.mh_proc_table, proto.oh_proc_table, proto.mh_sunder_proc_table):
+            for proc in table:
+                for name, stat, value, duration, ignore_if_active, max_stacks in proc.buffs:
+                    if name not in self.buffs:
+                        self.buffs[name] = {
+                            "stat": stat, "value": value, "duration": duration,
+                            "ignore_if_active": ignore_if_active, "max_stacks": max_stacks,
+                            "end": np.full(n, -INF), "stacks": np.zeros(n), "span_start": np.zeros(n),
+                            "open": np.zeros(n, dtype=bool), "uptime": np.zeros(n),
+                        }
+
+        def effect_of(proc):
+            definition = ALL_PROCS[proc.name]
+            if definition.get("ap_based"):
+                kind = "physical"
+            elif definition.get("magic_based"):
+                kind = "magic"
+            else:
+                return None
+            return (kind, definition.get("base_damage", 0), definition["ap_multiplier"],
+                    definition.get("weapon_multiplier", 1.0))
+
+        self.tables = {}
+        for key, table in (("mh", proto.mh_proc_table), ("oh", proto.oh_proc_table),
+                           ("mh_sunder", proto.mh_sunder_proc_table)):
+            self.tables[key] = [(proc.chance, proc.slot, proc.cooldown, proc.buffs, effect_of(proc)) for proc in table]
+
+    def _apply_buff(self, i, name):
+        """BuffTracker.add_buff for fights i at their current time."""
+        buff = self.buffs[name]
+        t = self.time[i]
+        end = buff["end"][i]
+        active = end > t
+        if buff["ignore_if_active"] and buff["max_stacks"] == 1:
+            i, t, end, active = i[~active], t[~active], end[~active], active[~active]
+        # Expired span: book it and start a new one
+        restart = ~active
+        closing = restart & buff["open"][i]
+        closed = i[closing]
+        buff["uptime"][closed] += end[closing] - buff["span_start"][closed]
+        buff["span_start"][i[restart]] = t[restart]
+        buff["open"][i] = True
+        stacks = np.where(restart, 0.0, buff["stacks"][i])
+        buff["stacks"][i] = np.minimum(stacks + 1, buff["max_stacks"])
+        buff["end"][i] = t + buff["duration"]
+
+    def _buff_totals(self):
+        t = self.time
+        # Full-width even without buffs, so the handlers can gather from the derived stats
+        zeros = self.zeros
+        totals = {"strength": zeros, "ap": zeros, "haste": zeros, "crit": zeros, "arpen": zeros}
+        for buff in self.buffs.values():
+            totals[buff["stat"]] = totals[buff["stat"]] + np.where(buff["end"] > t, buff["stacks"] * buff["value"], 0.0)
+        return totals
+
+    def _procs(self, i, table):
+        """Roll a proc table for the landed hits of fights i and apply what fires."""
+        if not i.size:
+            return
+        t = self.time[i]
+        rng = self.rng
+        for chance, slot, cooldown, buffs, effect in self.tables[table]:
+            fired = rng.random(i.size) < chance
+            if slot >= 0:
+                cooldowns = self.proc_cooldowns[slot]
+                fired &= cooldowns[i] <= t
+            if not fired.any():
+                continue
+            f = i[fired]
+            if slot >= 0:
+                cooldowns[f] = t[fired] + cooldown
+            for buff in buffs:
+                self._apply_buff(f, buff[0])
+            if effect is not None:
+                kind, base_damage, ap_multiplier, weapon_multiplier = effect
+                dmg = base_damage + self.ap[f] * ap_multiplier * weapon_multiplier
+                crit = rng.random(f.size) < self.crit[f]
+                if kind == "physical":
+                    dmg *= 1 - self.DR[f]
+                    crits = f[crit]
+                    self._deep_wounds(crits, self.mh_base_avg[crits])
+                    dmg[crit] *= 2
+                else:
+                    dmg = dmg / self.multi[f] * 1.2475
+                    dmg[crit] *= 1.5
+                dmg *= self.multi[f]
+                self.proc_damage[f] += dmg
+                self.total_damage[f] += dmg
+
+    # -------------------------
+    # Shared pieces of the handlers
+    # -------------------------
+    def _deep_wounds(self, i, base_avg):
+        if not i.size:
+            return
+        tick = 0.48 * base_avg / 6
+        self.dw_damage[i] += tick * 6
+        pos = self.dw_ring_pos[i]
+        flat = i * _DW_RING + pos
+        self.dw_ring_start.ravel()[flat] = self.time[i]
+        self.dw_ring_tick.ravel()[flat] = tick
+        self.dw_ring_pos[i] = (pos + 1) % _DW_RING
+
+    def _gain_rage(self, i, amount):
+        rage = np.minimum(self.rage[i] + amount, 100.0)
+        self.rage[i] = rage
+        self._wake(i[rage >= self.rage_watch[i]])
+
+    def _gain_slam_proc(self, i):
+        self.slam_proc[i] = True
+        self._wake(i[self.waiting[i]])
+
+    def _wake(self, i):
+        if i.size:
+            self.waiting[i] = False
+            self.rage_watch[i] = INF
+            # Supersedes the pending cooldown wakeup
+            self._schedule(GCD, i, self.time[i])
+
+    def _roll(self, i, attack_type, offhand, ignore_dw_penalty=None, bonus_crit=0.0):
+        """Attack table outcome codes for fights i."""
+        # The scalar engine's table up to GLANCE is the same in every fight; the
+        # crit bound moves with each fight's own buffs, so it is compared apart
+        table = _attack_thresholds(self.proto, attack_type, offhand)[:CRIT]
+        roll = self.rng.random(i.size)
+        code = classify_attack_rolls(table, roll)
+        glance_end = table[GLANCE]
+        if ignore_dw_penalty is not None:
+            queued = _attack_thresholds(self.proto, attack_type, offhand, ignore_dw_penalty=True)[:CRIT]
+            code = np.where(ignore_dw_penalty, classify_attack_rolls(queued, roll), code)
+            glance_end = np.where(ignore_dw_penalty, queued[GLANCE], glance_end)
+        return code + (roll >= glance_end + self.crit[i] + bonus_crit)
+
+    def _weapon_roll(self, size, offhand):
+        """random.randint(int(min), int(max)), size times."""
+        low, span = self.oh_roll if offhand else self.mh_roll
+        return np.floor(self.rng.random(size) * span) + low
+
+    def _count(self, index, i):
+        self.counts[index][i] += 1
+
+    def _count_misses(self, atk, i, code):
+        self.counts[atk + MISSES][i[code == MISS]] += 1
+        self.counts[atk + DODGES][i[code == DODGE]] += 1
+
+    @staticmethod
+    def _rage_from(dmg, speed, offhand, crit):
+        c = 230.6
+        if offhand:
+            f = np.where(crit, 6, 3)
+        else:
+            f = np.where(crit, 14, 7)
+        rage = (15 * dmg) / (4 * c) + (f * speed) / 2
+        return np.where(dmg == 0, 0.0, np.minimum(rage, (15 * dmg) / c))
+
+    # -------------------------
+    # Per-event upkeep: uptimes, cooldown buffs, derived stats
+    # -------------------------
+    def _event_start(self, m):
+        proto = self.proto
+        t = self.time
+        flurry_on = self.flurry > 0
+        self.flurry_time += np.where(m & flurry_on, t - self.last_event_time, 0.0)
+        self.last_event_time = np.where(m, t, self.last_event_time)
+
+        dw_accrue = m & self.dw_active
+        self.dw_uptime += np.where(dw_accrue, np.minimum(t, self.dw_end) - self.dw_last, 0.0)
+        self.dw_last = np.where(m, t, self.dw_last)
+        self.dw_active &= ~(m & (t >= self.dw_end))
+
+        lust = m & (t >= proto.bloodlust_time) & (t >= self.bl_next)
+        self.bl_end = np.where(lust, t + proto.bloodlust.duration, self.bl_end)
+        self.bl_next = np.where(lust, t + proto.bloodlust.cooldown, self.bl_next)
+        fury = m & (t >= proto.bloodfury_time) & (t >= self.bf_end) & (t - self.bf_last >= proto.bloodfury.cooldown)
+        self.bf_end = np.where(fury, t + proto.bloodfury.duration, self.bf_end)
+        self.bf_last = np.where(fury, t, self.bf_last)
+
+        mods = self._buff_totals()
+        self.crit = proto.static_crit + mods["crit"]
+        arpen = proto.base_armor_penetration + mods["arpen"]
+        self.DR = min(proto.armor / (proto.armor + 5882.5), 0.75) * (1 - np.minimum(arpen, 1.0))
+        ap = proto.total_ap + (proto.static_strength + mods["strength"]) * 2 + mods["ap"]
+        # Blood Fury: the AP buff plus the tracker's own bonus, as the scalar engine books it
+        ap = ap + np.where(t < self.bf_end, 2 * proto.bloodfury.ap_bonus, 0)
+        if proto.shamanistic_rage:
+            ap = ap * 1.1
+        self.ap = ap
+
+        haste = proto.haste + mods["haste"]
+        self.haste = (np.where(flurry_on, proto.FLURRY_MULT, 1.0) * haste * proto.static_haste
+                      * (1 + np.where(t < self.bl_end, proto.bloodlust.haste_bonus, 0.0)))
+
+        multi = proto.static_multi * np.where(self.dw_active, 1.20, 1.0)
+        self.multi = multi
+        self.multi_oh = multi * proto.oh_multi_factor
+        if proto.ambi_ME:
+            self.ambi_stacks = (self.ambi_end > t[:, None]).sum(axis=1)
+            self.multi_oh = self.multi_oh * (1 + self.ambi_stacks * proto.ambidextrous.per_stack)
+        ap_per_speed = ap / 14
+        self.mh_base_avg = ((proto.min_dmg + proto.max_dmg) / 2 + ap_per_speed * proto.mh_speed) * multi * proto.base_avg_factor
+        self.oh_base_avg = ((proto.oh_min_dmg + proto.oh_max_dmg) / 2 + ap_per_speed * proto.oh_speed) * self.multi_oh * proto.base_avg_factor
+
+    # -------------------------
+    # Swings
+    # -------------------------
+    def _schedule(self, slot, i, when):
+        self.timers[slot][i] = when
+        self.seq += 1
+        self.seqs[slot][i] = self.seq
+
+    def _swing_start(self, i, speed, slot):
+        """Flurry charge, Slam lockout; returns (fights that swing now, their time, next swing delay)."""
+        t = self.time[i]
+        swing_speed = speed / self.haste[i]
+        self.flurry[i] = np.maximum(self.flurry[i] - 1, 0)
+        lockout = self.slam_lockout_until[i]
+        locked = t < lockout
+        if locked.any():
+            self._schedule(slot, i[locked], lockout[locked])
+            go = ~locked
+            return i[go], t[go], swing_speed[go]
+        return i, t, swing_speed
+
+    def _white(self, i, offhand, code):
+        proto = self.proto
+        speed = proto.oh_speed if offhand else proto.mh_speed
+        multi = self.multi_oh if offhand else self.multi
+        dmg = (self._weapon_roll(i.size, offhand) + self.ap[i] / 14 * speed) * (1 - self.DR[i]) * _WHITE_FACTOR[code] * multi[i]
+        crit = code == CRIT
+        atk = ATK_OH if offhand else ATK_MH
+        self.total_damage[i] += dmg
+        (self.white_OH_damage if offhand else self.white_MH_damage)[i] += dmg
+        self._count(atk + HITS, i)
+        crits = i[crit]
+        self._count(atk + CRITS, crits)
+        self.flurry[crits] = 3
+        self._deep_wounds(crits, (self.oh_base_avg if offhand else self.mh_base_avg)[crits])
+        self._count_misses(atk, i, code)
+        self._procs(i[code >= GLANCE], "oh" if offhand else "mh")
+        self._gain_rage(i, self._rage_from(dmg, speed, offhand, crit))
+        self.hs_queue[i[self.rage[i] >= proto.HS_COST]] = True
+
+    def _mh_swing(self, i):
+        proto = self.proto
+        i, t, swing_speed = self._swing_start(i, proto.mh_speed, MH_SWING)
+        queued = self.hs_queue[i] & (self.rage[i] >= proto.HS_COST)
+        if queued.any():
+            self._heroic_strike(i[queued], t[queued] + swing_speed[queued])
+            white = ~queued
+            i, t, swing_speed = i[white], t[white], swing_speed[white]
+        if i.size:
+            self.hs_queue[i] = False
+            self._white(i, False, self._roll(i, "WHITE", False))
+            self._schedule(MH_SWING, i, t + swing_speed)
+
+    def _heroic_strike(self, i, next_swing):
+        proto = self.proto
+        self.hs_queue[i] = False
+        base = self._weapon_roll(i.size, False) + 201 + self.ap[i] / 14 * proto.mh_speed
+        code = self._roll(i, "YELLOW", False, bonus_crit=0.15)
+        self._count_misses(ATK_HS, i, code)
+        self._count(ATK_HS + HITS, i)
+        land = code >= GLANCE
+        # A missed Heroic Strike returns before the next swing is scheduled
+        self.t_mh[i[~land]] = INF
+
+        i, code, base, next_swing = i[land], code[land], base[land], next_swing[land]
+        self._procs(i, "mh")
+        crit = code == CRIT
+        crits = i[crit]
+        dmg = base * (1 - self.DR[i]) * np.where(crit, 2.2, 1.0)
+        self._deep_wounds(crits, self.mh_base_avg[crits])
+        self._gain_rage(crits, 10.0)
+        self.flurry[crits] = 3
+        dmg *= self.multi[i]
+        self.hs_damage[i] += dmg
+        self.total_damage[i] += dmg
+        self.rage[i] -= proto.HS_COST
+        self._gain_slam_proc(i[self.rng.random(i.size) < 0.2])
+        self._count(ATK_HS + CRITS, crits)
+
+        if proto.ambi_ME:
+            ambi = (self._weapon_roll(i.size, True) + self.ap[i] / 14 * proto.oh_speed) * self.multi_oh[i] * 0.6 * (1 - self.DR[i])
+            ambi_crit = self.rng.random(i.size) < self.crit[i]
+            ambi[ambi_crit] *= 2
+            crits = i[ambi_crit]
+            self._deep_wounds(crits, self.oh_base_avg[crits])
+            self.flurry[crits] = 3
+            self._procs(i, "oh")
+            self.total_damage[i] += ambi
+            self.total_ambi[i] += ambi
+            self._ambidextrous(i)
+
+        self.hs_queue[i[self.rage[i] < proto.HS_COST]] = False
+        self._schedule(MH_SWING, i, next_swing)
+
+    def _oh_swing(self, i):
+        proto = self.proto
+        i, t, swing_speed = self._swing_start(i, proto.oh_speed, OH_SWING)
+        if i.size:
+            self._white(i, True, self._roll(i, "WHITE", True, ignore_dw_penalty=self.hs_queue[i]))
+            self._schedule(OH_SWING, i, t + swing_speed)
+
+    def _ambidextrous(self, i):
+        proto = self.proto
+        add = i[self.ambi_stacks[i] < proto.ambidextrous.max_stacks]
+        if add.size:
+            slot = np.argmin(self.ambi_end[add], axis=1)  # an expired slot
+            self.ambi_end[add, slot] = self.time[add] + proto.ambidextrous.duration
+
+    # -------------------------
+    # Rotation
+    # -------------------------
+    def _ready(self, name, i, t):
+        """Non-rage requirements of a priority ability (the scalar GCD_ACTIONS "ready")."""
+        if name == "SLAM_PROC":
+            return self.slam_proc[i]
+        if name == "SLAM_HARD":
+            return True
+        return t >= {"DW": self.dw_next, "BT": self.bt_ready, "WW": self.ww_ready}[name][i]
+
+    def _rotation(self, i):
+        proto = self.proto
+        t = self.time[i]
+        rage = self.rage[i]
+        self.waiting[i] = False
+        self.rage_watch[i] = INF
+
+        idle = np.ones(i.size, dtype=bool)
+        casts = []
+        threshold = np.full(i.size, INF)
+        for name, cost in self.priority:
+            ready = self._ready(name, i, t)
+            affordable = rage >= cost
+            cast = idle & ready & affordable
+            idle &= ~cast
+            casts.append((name, cast))
+            threshold[ready & ~affordable & (threshold > cost)] = cost
+
+        # Nothing castable: park until rage, a Slam proc or the next cooldown
+        if idle.any():
+            parked, t_parked = i[idle], t[idle]
+            self.waiting[parked] = True
+            self.rage_watch[parked] = threshold[idle]
+            upcoming = np.full(parked.size, INF)
+            for ready in (self.dw_next, self.bt_ready, self.ww_ready):
+                ready = ready[parked]
+                np.minimum(upcoming, np.where(ready > t_parked, ready, INF), out=upcoming)
+            self._schedule(GCD, parked, upcoming)
+
+        used = ~idle
+        if used.any():
+            for name, cast in casts:
+                if cast.any():
+                    getattr(self, "_cast_" + name.lower())(i[cast])
+            i = i[used]
+            next_allowed = t[used] + proto.gcd + proto.gcd_delay
+            self.next_allowed_gcd[i] = next_allowed
+            self._schedule(GCD, i, next_allowed)
+
+    def _cast_dw(self, i):
+        proto = self.proto
+        t = self.time[i]
+        self.dw_active[i] = True
+        self.dw_end[i] = t + proto.death_wish.duration
+        self.dw_next[i] = t + proto.death_wish.cooldown
+        self.rage[i] -= proto.DW_COST
+
+    def _slam(self, i, code):
+        """Main-hand Slam damage for the fights in i that connected."""
+        proto = self.proto
+        self._count(ATK_SLAM_MH + HITS, i)
+        land = code >= GLANCE
+        i, crit = i[land], code[land] == CRIT
+        dmg = (self._weapon_roll(i.size, False) + 87 + self.ap[i] / 14 * proto.mh_speed) * np.where(crit, 2.2, 1.0)
+        dmg *= (1 - self.DR[i]) * self.multi[i] * proto.undending_fury
+        self.total_damage[i] += dmg
+        self.slam_damage_MH[i] += dmg
+        crits = i[crit]
+        self._count(ATK_SLAM_MH + CRITS, crits)
+        self._deep_wounds(crits, self.mh_base_avg[crits])
+        self.flurry[crits] = 3
+        self._procs(i, "mh")
+        if proto.battering_ram:
+            self._procs(i, "mh_sunder")
+        if proto.skull_cracker:
+            self.dw_next[i] = np.maximum(self.time[i], self.dw_next[i] - 4.0)
+
+    def _slam_cost(self, i, code):
+        proto = self.proto
+        missed = code <= DODGE
+        self._count_misses(ATK_SLAM_MH, i, code)
+        self.rage[i[missed]] -= proto.slam_COST * 0.2
+        land = i[~missed]
+        self.rage[land] -= proto.slam_COST
+        self.hs_queue[land[self.rage[land] < proto.HS_COST]] = False
+
+    def _cast_slam_proc(self, i):
+        self.slam_proc[i] = False
+        code = self._roll(i, "YELLOW", False)
+        self._slam(i, code)
+        self._slam_cost(i, code)
+
+    def _cast_slam_hard(self, i):
+        self.slam_lockout_until[i] = self.time[i] + 1.5
+        code = self._roll(i, "YELLOW", False)
+        self._slam(i, code)
+        self._slam_cost(i, code)
+
+    def _cast_bt(self, i):
+        proto = self.proto
+        t = self.time[i]
+        code = self._roll(i, "YELLOW", False)
+        self._count(ATK_BT + HITS, i)
+        self._count_misses(ATK_BT, i, code)
+        missed = code <= DODGE
+        self.rage[i[missed]] -= proto.BT_COST * 0.2
+        self.bt_ready[i] = t + 6.0
+
+        land = ~missed
+        i, crit = i[land], code[land] == CRIT
+        dmg = self.ap[i] * 0.5 * (1 - self.DR[i]) * self.multi[i] * proto.undending_fury * np.where(crit, 2.2, 1.0)
+        crits = i[crit]
+        self._count(ATK_BT + CRITS, crits)
+        self._deep_wounds(crits, self.mh_base_avg[crits])
+        self.flurry[crits] = 3
+        self.total_damage[i] += dmg
+        self.BT_damage[i] += dmg
+        self._procs(i, "mh")
+        self.slam_proc[i[self.rng.random(i.size) < 0.2]] = True
+        self.rage[i] -= proto.BT_COST
+        self.hs_queue[i[self.rage[i] < proto.HS_COST]] = False
+
+    def _cast_ww(self, i):
+        proto = self.proto
+        norm_speed = 3.3 if proto.tg else 2.4
+        total = np.zeros(i.size)
+        any_hit = np.zeros(i.size, dtype=bool)
+        for offhand in ((False, True) if proto.dual_wield else (False,)):
+            code = self._roll(i, "YELLOW", offhand)
+            if not offhand:
+                self._count_misses(ATK_WW, i, code)
+            land = code >= GLANCE
+            hit, crit = i[land], code[land] == CRIT
+            multi = self.multi_oh if offhand else self.multi
+            dmg = (self._weapon_roll(hit.size, offhand) + self.ap[hit] / 14 * norm_speed) * proto.undending_fury * proto.imp_ww
+            dmg *= (1 - self.DR[hit]) * multi[hit] * np.where(crit, 2.0 if offhand else 2.2, 1.0)
+            total[land] += dmg
+            any_hit |= land
+            crits = hit[crit]
+            self._deep_wounds(crits, (self.oh_base_avg if offhand else self.mh_base_avg)[crits])
+            self.flurry[crits] = 3
+            self._count(ATK_WW + CRITS, crits)
+            self._procs(hit, "oh" if offhand else "mh")
+            self.slam_proc[hit[self.rng.random(hit.size) < 0.2]] = True
+
+        self._count(ATK_WW + HITS, i)
+        self.rage[i[~any_hit]] -= proto.ww_COST * 0.2
+        self.ww_ready[i] = self.time[i] + 8.0
+        hit = i[any_hit]
+        self.total_damage[hit] += total[any_hit]
+        self.WW_damage[hit] += total[any_hit]
+        self.rage[hit] -= proto.ww_COST
+        self.hs_queue[hit[self.rage[hit] < proto.HS_COST]] = False
+
+    # -------------------------
+    # Driver
+    # -------------------------
+    def run(self):
+        fight_length = self.fight_length
+        timers, seqs = self.timers, self.seqs
+        handlers = ((GCD, self._rotation), (MH_SWING, self._mh_swing), (OH_SWING, self._oh_swing))
+        while True:
+            t_next = timers.min(axis=0)
+            running = t_next <= fight_length
+            if not running.any():
+                break
+            kind = np.where(timers == t_next, seqs, _NO_SEQ).argmin(axis=0)
+            self.time = np.where(running, t_next, self.time)
+            self._event_start(running)
+            for slot, handler in handlers:
+                fire = np.flatnonzero(running & (kind == slot))
+                if fire.size:
+                    timers[slot][fire] = INF
+                    handler(fire)
+        return self._results()
+
+    def _results(self):
+        proto = self.proto
+        fight_length = self.fight_length
+        # Deep Wounds ticks after each fight's last event never landed
+        due = np.clip(np.floor(self.time[:, None] - self.dw_ring_start), 0, 6)
+        late = np.where(np.isfinite(self.dw_ring_start), (6 - due) * self.dw_ring_tick, 0.0).sum(axis=1)
+        dw_damage = self.dw_damage - late
+
+        def uptime(name):
+            buff = self.buffs.get(name)
+            if buff is None:
+                return np.zeros(self.n)
+            running = np.where(buff["open"], np.minimum(buff["end"], fight_length) - buff["span_start"], 0.0)
+            return (buff["uptime"] + running) / fight_length
+
+        zeros = np.zeros(self.n)
+        counts = self.counts
+        return {
+            "slam_MH_dps": self.slam_damage_MH / fight_length,
+            "slam_OH_dps": zeros,
+            "white_MH_dps": self.white_MH_damage / fight_length,
+            "white_OH_dps": self.white_OH_damage / fight_length,
+            "avg_MH_dmg": self.white_MH_damage / np.maximum(counts[ATK_MH + HITS], 1),
+            "avg_OH_dmg": self.white_OH_damage / np.maximum(counts[ATK_OH + HITS], 1),
+            "hs_dps": self.hs_damage / fight_length,
+            "cleave_dps": zeros,
+            "WW_dps": self.WW_damage / fight_length,
+            "BT_dps": self.BT_damage / fight_length,
+            "DR_dps": zeros,
+            "RB_dps": zeros,
+            "Ambi_dps": self.total_ambi / fight_length,
+            "attack_counts": counts,
+            "flurry_uptime": self.flurry_time / fight_length,
+            "enrage_uptime": zeros,
+            "total_dps": (self.total_damage + dw_damage) / fight_length,
+            "deep_wounds_dps": dw_damage / fight_length,
+            "crusader_uptime": uptime("Crusader") + uptime("Brutal"),
+            "crusader_oh_uptime": uptime("Crusader_OH") + uptime("Brutal_OH"),
+            "Empyrian_Demolisher_uptime": uptime("Empyrian Demolisher"),
+            "bonereavers_uptime": uptime("Bonereavers Edge"),
+            "eternal_flame_uptime": uptime("Eternal Flame"),
+            "death_wish_uptime": self.dw_uptime / fight_length,
+            "Rend_dps": zeros,
+            "Proc_dmg_dps": self.proc_damage / fight_length,
+        }
+
+
+# -------------------------
+# Worker
+# -------------------------
+def batch_granularity(fight_kwargs):
+    """Fights per aligned block: chunks handed to batch_worker should start on a multiple of it."""
+    return 1 if batch_unsupported(fight_kwargs) else BATCH_SIZE
+
+
+def batch_worker(args):
+    """
+    _worker for the batch engine: same (first, iterations, seed,
+    fight_kwargs, raw) arguments, same chunk layout. Falls back to _worker
+    for configurations batch_unsupported() rejects.
+
+    Fights run in lockstep in blocks of BATCH_SIZE fight indices, block b
+    drawing from fight_seed(seed, b * BATCH_SIZE). Results are therefore
+    reproducible from (seed, iterations) as long as chunks start on block
+    boundaries (see batch_granularity), not fight by fight like _worker.
+    """
+    first, iterations_chunk, seed, kwargs, raw = args
+    if batch_unsupported(kwargs):
+        return _worker(args)
+
+    chunk = new_chunk(raw)
+    stats = chunk["stats"]
+    attack_counts_total = np.zeros(COUNTS_SIZE, dtype=np.int64)
+
+    done = 0
+    while done < iterations_chunk:
+        index = first + done
+        n = min(BATCH_SIZE - index % BATCH_SIZE, iterations_chunk - done)
+        rng = np.random.default_rng(fight_seed(seed, index - index % BATCH_SIZE))
+        fights = BatchFights(kwargs, n, rng).run()
+        for field, (key, width) in RESULT_METRICS.items():
+            values = fights[field]
+            stats[field].merge(RunningStats.from_values(values, width))
+            if raw:
+                chunk["raw"][key].frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        counts = fights["attack_counts"]
+        attack_counts_total += counts.sum(axis=1)
+        for summary, values in zip(chunk["count_stats"], counts):
+            summary.merge(RunningStats.from_values(values, 1.0))
+        if raw:
+            chunk["raw"]["all_attack_counts"].frombytes(np.ascontiguousarray(counts.T, dtype=np.int64).tobytes())
+        done += n
+
+    chunk["attack_counts_total"] = attack_counts_total.tolist()
+    chunk["iterations_chunk"] = iterations_chunk
+    return chunk
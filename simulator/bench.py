@@ -0,0 +1,264 @@
+"""
+Engine micro-benchmarks.
+
+    python -m simulator.bench [fights]
+
+Runs fights of the default run_simulation config in this process (no pool)
+and reports throughput. It also runs the equivalence checks (calendar vs
+heap engine, geometric vs Bernoulli proc sampling) and exits non-zero if
+one of them fails.
+"""
+import random
+import sys
+import time
+from math import sqrt
+from queue import PriorityQueue
+
+from simulator.core import FightState, _simulate_fight, _fight_results, _worker, build_fight_kwargs, run_simulation
+from simulator.pool import SimulationPool
+from simulator.batch import batch_worker, batch_unsupported
+from simulator.rng import RandomPool, fight_seed, FIGHT_BLOCK_SIZE
+from simulator.procs import (resolve_on_hit_procs, proc_cooldown_slots, compile_proc_table,
+                             GeometricProcTable, roll_procs_geometric)
+
+
+# -------------------------
+# Reference queue: the old thread-safe PriorityQueue behind the scheduler API
+# -------------------------
+class _LockedEventQueue:
+    def __init__(self):
+        self._queue = PriorityQueue()
+        self._seq = 0
+
+    def schedule(self, time, kind, payload=False):
+        self._seq += 1
+        self._queue.put((time, self._seq, kind, payload))
+
+    def pop(self):
+        return self._queue.get()
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def __bool__(self):
+        return not self._queue.empty()
+
+    @property
+    def scheduled(self):
+        return self._seq
+
+
+def bench_events(fights=2000, seed=1, fight_kwargs=None, queue_factory=None):
+    """Return (events, seconds) for `fights` fights."""
+    if fight_kwargs is None:
+        fight_kwargs = build_fight_kwargs()
+    random.seed(seed)
+    events = 0
+    start = time.perf_counter()
+    for _ in range(fights):
+        state = FightState(**fight_kwargs)
+        if queue_factory is not None:
+            state.events = queue_factory()
+        events += _simulate_fight(state)
+        _fight_results(state)
+    return events, time.perf_counter() - start
+
+
+def bench_gcd(fights=500, seed=1, fight_kwargs=None):
+    """
+    Return (GCD evaluations, idle GCD evaluations, events, mean total DPS)
+    per fight. Fight i draws from fight_seed(seed, i), so two configs are
+    compared on the same fights.
+    """
+    if fight_kwargs is None:
+        fight_kwargs = build_fight_kwargs()
+    evaluations = idle = events = dps = 0
+    for i in range(fights):
+        state = FightState(rolls=RandomPool(fight_seed(seed, i), False, FIGHT_BLOCK_SIZE), **fight_kwargs)
+        events += _simulate_fight(state)
+        evaluations += state.cooldowns.gcd_evaluations
+        idle += state.cooldowns.idle_gcd_evaluations
+        dps += _fight_results(state)["total_dps"]
+    return evaluations / fights, idle / fights, events / fights, dps / fights
+
+
+def check_event_engines(fights=2000, seed=7, fight_kwargs=None):
+    """
+    Fights where the calendar engine's results differ from the heap
+    engine's on the same rolls. On the default config there must be none.
+    """
+    if fight_kwargs is None:
+        fight_kwargs = build_fight_kwargs()
+    calendar_kwargs = dict(fight_kwargs, event_engine="calendar")
+    differing = []
+    for i in range(fights):
+        results = []
+        for kwargs in (fight_kwargs, calendar_kwargs):
+            state = FightState(rolls=RandomPool(fight_seed(seed, i), False, FIGHT_BLOCK_SIZE), **kwargs)
+            _simulate_fight(state)
+            results.append(_fight_results(state))
+        if results[0] != results[1]:
+            differing.append(i)
+    return differing
+
+
+class _DictState:
+    """Plain instance for the FightState memory comparison."""
+
+
+def state_memory(fight_kwargs=None):
+    """Return (slotted bytes, __dict__ bytes): one FightState's own attribute storage, and the same attributes on a plain instance."""
+    if fight_kwargs is None:
+        fight_kwargs = build_fight_kwargs()
+    state = FightState(**fight_kwargs)
+    plain = _DictState()
+    plain.__dict__.update({name: getattr(state, name) for name in FightState.__slots__})
+    return sys.getsizeof(state), sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+
+
+def bench_engine(worker, fights=2000, seed=1, fight_kwargs=None):
+    """Return (mean total DPS, seconds) for `fights` fights through a _worker-style function."""
+    if fight_kwargs is None:
+        fight_kwargs = build_fight_kwargs()
+    start = time.perf_counter()
+    chunk = worker((0, fights, seed, fight_kwargs, False))
+    elapsed = time.perf_counter() - start
+    return chunk["stats"]["total_dps"].mean, elapsed
+
+
+def bench_latency(iterations=1000, calls=5):
+    """Return seconds per run_simulation(iterations) call: (new pool per call, warm SimulationPool)."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        run_simulation(iterations)
+    fresh = (time.perf_counter() - start) / calls
+    with SimulationPool() as pool:
+        run_simulation(iterations, pool=pool)  # start the workers, share the config
+        start = time.perf_counter()
+        for _ in range(calls):
+            run_simulation(iterations, pool=pool)
+        warm = (time.perf_counter() - start) / calls
+    return fresh, warm
+
+
+# -------------------------
+# Proc sampling equivalence
+# -------------------------
+CHECK_PROCS = ["Crusader", "Wound", "HoJ", "DB", "Maelstrom", "icon", "Eternal Flame", "Bonereavers Edge"]
+# |z| above this fails the check (about 1 in 15,000 per comparison by chance)
+Z_LIMIT = 4.0
+
+
+def _z(mean_a, var_a, n_a, mean_b, var_b, n_b):
+    se = sqrt(var_a / n_a + var_b / n_b)
+    return (mean_a - mean_b) / se if se else 0.0
+
+
+def check_proc_sampling(hits=200_000, fights=400, seed=1, weapon_speed=2.6, procs=None):
+    """
+    Statistical equivalence of geometric skip-ahead sampling against
+    resolve_on_hit_procs. Rolls the same hit stream (one hit per
+    weapon_speed seconds, so the 45s cooldowns bite) through both and
+    compares per-proc fire rates, then compares mean fight DPS.
+    Returns ([(proc, reference rate, geometric rate, z)], (dps_ref, dps_geo, z));
+    main() fails if any |z| exceeds Z_LIMIT.
+
+    The geometric mode is about sampling cost per hit, but on the default
+    config it isn't measurably faster (759 vs 747 fights/s), so it is no
+    reason to turn it on for speed.
+    """
+    procs = CHECK_PROCS if procs is None else procs
+
+    random.seed(seed)
+    reference = dict.fromkeys(procs, 0)
+    cooldowns = {}
+    for hit in range(hits):
+        for proc in resolve_on_hit_procs(hit * weapon_speed, weapon_speed, procs_to_check=procs, cooldowns=cooldowns):
+            reference[proc["name"]] += 1
+
+    random.seed(seed + 1)
+    geometric = dict.fromkeys(procs, 0)
+    slots = proc_cooldown_slots(procs)
+    cooldown_list = [0.0] * len(slots)
+    sampler = GeometricProcTable(compile_proc_table(procs, weapon_speed, slots))
+    for hit in range(hits):
+        for proc in roll_procs_geometric(sampler, hit * weapon_speed, cooldown_list):
+            geometric[proc.name] += 1
+
+    rates = []
+    for name in procs:
+        p_ref, p_geo = reference[name] / hits, geometric[name] / hits
+        rates.append((name, p_ref, p_geo, _z(p_ref, p_ref * (1 - p_ref), hits, p_geo, p_geo * (1 - p_geo), hits)))
+
+    dps = {}
+    for mode in ("bernoulli", "geometric"):
+        fight_kwargs = build_fight_kwargs(icon=True, HoJ=True, maelstrom=True, eternal_flame=True, proc_sampling=mode,
+                                          stats={"MH_procs": ["Crusader", "Wound"], "OH_procs": ["Crusader_OH", "DB"]})
+        random.seed(seed)
+        totals = []
+        for _ in range(fights):
+            state = FightState(**fight_kwargs)
+            _simulate_fight(state)
+            totals.append(_fight_results(state)["total_dps"])
+        mean = sum(totals) / fights
+        dps[mode] = (mean, sum((x - mean) ** 2 for x in totals) / (fights - 1))
+    (ref_mean, ref_var), (geo_mean, geo_var) = dps["bernoulli"], dps["geometric"]
+    return rates, (ref_mean, geo_mean, _z(ref_mean, ref_var, fights, geo_mean, geo_var, fights))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    fights = int(argv[0]) if argv else 2000
+
+    ev_old, t_old = bench_events(fights, queue_factory=_LockedEventQueue)
+    ev_new, t_new = bench_events(fights)
+    ev_cal, t_cal = bench_events(fights, fight_kwargs=build_fight_kwargs(event_engine="calendar"))
+    print(f"{fights} fights, default config")
+    print(f"  PriorityQueue : {ev_old / t_old:12,.0f} events/s  {fights / t_old:8,.0f} fights/s  {ev_old / fights:6.1f} events/fight")
+    print(f"  EventScheduler: {ev_new / t_new:12,.0f} events/s  {fights / t_new:8,.0f} fights/s  {ev_new / fights:6.1f} events/fight")
+    print(f"  TimerCalendar : {ev_cal / t_cal:12,.0f} events/s  {fights / t_cal:8,.0f} fights/s  {ev_cal / fights:6.1f} events/fight")
+    print(f"  speedup       : {t_old / t_new:.2f}x heap, {t_old / t_cal:.2f}x calendar")
+    failures = []
+    differing = check_event_engines(fights)
+    print(f"  calendar vs heap: {len(differing)} of {fights} fights differ (0 expected)")
+    if differing:
+        failures.append(f"calendar engine differs from heap engine in fights {differing[:10]}")
+
+    n = min(fights, 500)
+    for label, watch in (("swing wakeups", False), ("rage watch   ", True)):
+        evaluations, idle, events, dps = bench_gcd(n, fight_kwargs=build_fight_kwargs(rage_watch=watch))
+        casts = evaluations - idle
+        print(f"  {label}: {evaluations:5.1f} GCD evaluations/fight, {casts:5.1f} casts, "
+              f"{idle:5.1f} idle ({idle / casts:.2f} per cast, {idle / events:.1%} of all events)  mean DPS {dps:.1f}")
+
+    slotted, plain = state_memory()
+    print(f"  FightState     : {slotted:,} bytes slotted, {plain:,} bytes as a __dict__ instance")
+    fights_geo, t_geo = bench_events(fights, fight_kwargs=build_fight_kwargs(proc_sampling="geometric"))
+    print(f"  geometric procs: {fights / t_geo:8,.0f} fights/s")
+    if not batch_unsupported(build_fight_kwargs()):
+        batch_fights = max(fights, 16384)
+        dps_scalar, t_scalar = bench_engine(_worker, fights)
+        dps_batch, t_batch = bench_engine(batch_worker, batch_fights)
+        print(f"  scalar engine  : {fights / t_scalar:8,.0f} fights/s  mean DPS {dps_scalar:.1f}")
+        print(f"  batch engine   : {batch_fights / t_batch:8,.0f} fights/s  mean DPS {dps_batch:.1f}  "
+              f"({(batch_fights / t_batch) / (fights / t_scalar):.1f}x)")
+
+    fresh, warm = bench_latency()
+    print(f"  run_simulation(1000): {fresh * 1000:7.1f} ms new pool, {warm * 1000:7.1f} ms warm pool")
+
+    rates, (ref_dps, geo_dps, z_dps) = check_proc_sampling()
+    print(f"proc sampling equivalence (|z| <= {Z_LIMIT:g} expected)")
+    for name, p_ref, p_geo, z in rates:
+        print(f"  {name:18s} resolver {p_ref:.5f}  geometric {p_geo:.5f}  z={z:+.2f}")
+    print(f"  mean DPS           resolver {ref_dps:.1f}  geometric {geo_dps:.1f}  z={z_dps:+.2f}")
+    outliers = [name for name, _, _, z in rates if abs(z) > Z_LIMIT]
+    if abs(z_dps) > Z_LIMIT:
+        outliers.append("mean DPS")
+    if outliers:
+        failures.append(f"geometric proc sampling disagrees with the resolver on {', '.join(outliers)}")
+
+    if failures:
+        sys.exit("FAILED: " + "; ".join(failures))
+
+if __name__ == "__main__":
+    main()
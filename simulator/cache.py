@@ -0,0 +1,184 @@
+"""
+On-disk cache of run_simulation results.
+
+    cache = ResultCache()
+    result = run_simulation(5000, seed=1, cache=cache, **config)
+
+A seeded run is a pure function of its fight_kwargs, iterations, seed and
+the engine, so its result can be stored and looked up by a hash of those.
+The key hashes the canonical JSON of the normalized fight_kwargs (what
+build_fight_kwargs returns), the iteration count, the seed, any precision
+target and ENGINE_VERSION, plus a hash of ALL_PROCS and of the simulator's
+own source files, so editing a proc or the engine invalidates old entries
+without anyone having to remember to bump a number.
+
+Each entry is two files: <key>.summary (the result without the per-fight
+vectors) and, for raw runs, <key>.raw (the vectors), so a summary hit
+doesn't read the vectors. Files are zlib-compressed pickles. Hits touch
+the entry's mtime, and once the store grows past max_bytes the least
+recently used entries are removed.
+
+Fixed-iteration runs are also listed under their lineage, the key of the
+same run without the iteration count (<lineage>.lineage maps iterations
+to entry keys), so run_simulation can top up the largest stored run of a
+config and seed instead of starting over. Lineage lists count towards
+max_bytes and lose their entries when those are evicted.
+"""
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from pathlib import Path
+
+from simulator.procs import ALL_PROCS
+
+# Bump for changes to result semantics that don't show up in the source hash
+ENGINE_VERSION = 1
+
+# Store location when ResultCache() gets no path
+DEFAULT_CACHE_DIR = Path(os.environ.get("WARRIOR_SIM_CACHE", Path.home() / ".cache" / "warrior_sim"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Source files whose contents are part of every key
+_ENGINE_FILES = ("core.py", "events.py", "procs.py", "rng.py", "stats.py", "batch.py")
+
+_engine_hash = None
+
+
+def _canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+def engine_hash():
+    """Hash of ENGINE_VERSION, ALL_PROCS and the engine's source files (computed once)."""
+    global _engine_hash
+    if _engine_hash is None:
+        digest = hashlib.sha256(f"engine {ENGINE_VERSION}\n".encode())
+        digest.update(_canonical(ALL_PROCS).encode())
+        here = Path(__file__).parent
+        for name in _ENGINE_FILES:
+            digest.update((here / name).read_bytes())
+        _engine_hash = digest.hexdigest()
+    return _engine_hash
+
+
+def result_key(fight_kwargs, iterations, seed, target=None):
+    """Cache key of a run: hex sha256 of its canonical description."""
+    description = {"fight_kwargs": fight_kwargs, "iterations": iterations, "seed": seed,
+                   "target": target, "engine": engine_hash()}
+    return hashlib.sha256(_canonical(description).encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU store of run_simulation results in one directory."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def _file(self, key, part):
+        return self.path / f"{key}.{part}"
+
+    @staticmethod
+    def _load(file):
+        return pickle.loads(zlib.decompress(file.read_bytes()))
+
+    def _store(self, file, value):
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+        tmp = file.with_name(file.name + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, file)
+
+    def get(self, key, raw=False):
+        """The stored result, with its per-fight vectors if raw, or None on a miss."""
+        summary_file = self._file(key, "summary")
+        raw_file = self._file(key, "raw")
+        try:
+            result = self._load(summary_file)
+            if raw:
+                result.update(self._load(raw_file))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            return None
+        for file in (summary_file, raw_file) if raw else (summary_file,):
+            os.utime(file)
+        return result
+
+    def put(self, key, result, raw_keys=(), lineage=None):
+        """
+        Store a result; raw_keys name its per-fight vectors, which go to the
+        .raw file. With a lineage, the entry is listed under it for latest().
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        raw_values = {k: result[k] for k in raw_keys if k in result}
+        summary = {k: v for k, v in result.items() if k not in raw_values}
+        if raw_values:
+            self._store(self._file(key, "raw"), raw_values)
+        self._store(self._file(key, "summary"), summary)
+        if lineage is not None:
+            runs = self._runs(lineage)
+            runs[result["iterations"]] = key
+            self._store(self._file(lineage, "lineage"), runs)
+        self.evict()
+
+    def _runs(self, lineage):
+        try:
+            return self._load(self._file(lineage, "lineage"))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            return {}
+
+    def latest(self, lineage, iterations, raw=False, granularity=1):
+        """
+        The stored run of `lineage` with the most fights, at most `iterations`
+        and a multiple of `granularity` (with its vectors if raw), or None.
+        """
+        runs = self._runs(lineage)
+        for done in sorted(runs, reverse=True):
+            if done > iterations or done % granularity:
+                continue
+            result = self.get(runs[done], raw)
+            if result is not None:
+                return result
+        return None
+
+    def evict(self):
+        """
+        Drop least recently used entries until the store fits in max_bytes.
+        Lineage lists count towards the size; evicted entries are taken off
+        them, and a list left empty is removed.
+        """
+        entries = {}
+        lineages = []
+        total = 0
+        for file in self.path.glob("*.*"):
+            if file.suffix == ".lineage":
+                lineages.append(file)
+            elif file.suffix not in (".summary", ".raw"):
+                continue
+            stat = file.stat()
+            total += stat.st_size
+            if file.suffix != ".lineage":
+                size, used = entries.get(file.stem, (0, 0.0))
+                entries[file.stem] = (size + stat.st_size, max(used, stat.st_mtime))
+        evicted = set()
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for part in ("summary", "raw"):
+                self._file(key, part).unlink(missing_ok=True)
+            evicted.add(key)
+            total -= size
+        if not evicted:
+            return
+        for file in lineages:
+            runs = self._runs(file.stem)
+            kept = {done: key for done, key in runs.items() if key not in evicted}
+            if not kept:
+                file.unlink(missing_ok=True)
+            elif len(kept) < len(runs):
+                self._store(file, kept)
+
+    def clear(self):
+        for file in self.path.glob("*.*"):
+            if file.suffix in (".summary", ".raw", ".lineage"):
+                file.unlink(missing_ok=True)
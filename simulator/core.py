@@ -1,8 +1,24 @@
 import random
-import multiprocessing as mp
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from heapq import heappush, heappop
 from math import ceil
-from queue import PriorityQueue
-from simulator.procs import resolve_on_hit_procs, apply_on_hit_procs
+from operator import add
+from statistics import NormalDist
+try:
+    import numpy as np
+except ImportError:  # only the vectorized helpers need numpy
+    np = None
+from simulator.procs import (proc_cooldown_slots, compile_proc_table, roll_procs, apply_compiled_procs,
+                             GeometricProcTable, roll_procs_geometric)
+from simulator.events import (EventScheduler, TimerCalendar, INF,
+                              EVENT_KINDS, MH_SWING, OH_SWING, GCD, TANK_DUMMY, POTION, EXTRA_ATTACK)
+from simulator.rng import RandomPool, randint, fight_seed, FIGHT_BLOCK_SIZE
+from simulator.stats import RunningStats
+from simulator.pool import SimulationPool
+from simulator.cache import result_key
 
 # -------------------------
 # Enrage tracker class
@@ -29,56 +45,61 @@ class EnrageTracker:
         self.end_time = current_time + self.duration
 
 class RendBleed:
+    """
+    Bleed kept as a ledger: one tick schedule (start, interval, tick count)
+    plus the current per-tick damage. Damage is settled lazily, when a
+    refresh changes the per-tick damage or when the total is asked for.
+    """
     def __init__(self, duration=30, tick_interval=3.0):
         self.duration = duration
         self.tick_interval = tick_interval
+        self.num_ticks = int(duration / tick_interval)
         self.end_time = 0.0
-        self.tick_times = []         # times at which ticks will happen
+        self.schedule_start = 0.0
+        self.ticks_paid = self.num_ticks   # no schedule running yet
         self.damage_per_tick = 0.0
-        self.active = False
-        self.total_damage = 0.0
-        self.total_uptime = 0.0      
-        self.last_update_time = 0.0  
+        self.total_damage = 0.0            # settled damage
+        self.total_uptime = 0.0            # settled uptime
 
     def trigger(self, current_time, total_ap, multi, trauma):
         """
         Start or refresh the bleed.
         Tick schedule does NOT reset — existing ticks stay in place.
-        If no ticks exist yet, schedule them now.
+        If no ticks are left, schedule them now.
         """
-        num_ticks = int(self.duration / self.tick_interval)
+        self.settle(current_time)  # ticks so far land at the old damage
+
         if trauma: total_proc_damage = (268.5 + 1.284 * total_ap) * multi * 1.3
         else: total_proc_damage = (268.5 + 1.284 * total_ap) * multi
 
-        self.damage_per_tick = total_proc_damage / num_ticks
+        self.damage_per_tick = total_proc_damage / self.num_ticks
 
         # Refresh duration
         self.end_time = current_time + self.duration
-        self.active = True
 
         # Schedule ticks only if first proc
-        if not self.tick_times:
-            self.tick_times = [current_time + i * self.tick_interval for i in range(1, num_ticks + 1)]
+        if self.ticks_paid == self.num_ticks:
+            self.schedule_start = current_time
+            self.ticks_paid = 0
+
+    def settle(self, current_time):
+        """Book all ticks up to current_time."""
+        due = _ticks_due(self.schedule_start, self.tick_interval, self.num_ticks, current_time)
+        if due > self.ticks_paid:
+            self.total_damage += (due - self.ticks_paid) * self.damage_per_tick
+            if due == self.num_ticks:
+                self.total_uptime += due * self.tick_interval
+            self.ticks_paid = due
+
+    def damage_until(self, current_time):
+        """Total bleed damage dealt up to current_time, without settling."""
+        due = _ticks_due(self.schedule_start, self.tick_interval, self.num_ticks, current_time)
+        return self.total_damage + max(0, due - self.ticks_paid) * self.damage_per_tick
+
+    @property
+    def active(self):
+        return self.ticks_paid < self.num_ticks
 
-    def update(self, current_time):
-            # Update uptime
-        if self.active:
-            self.total_uptime += current_time - self.last_update_time
-        self.last_update_time = current_time
-        """
-        Apply damage for all ticks that have passed.
-        """
-        remaining_ticks = []
-        for t in self.tick_times:
-            if current_time >= t:
-                self.total_damage += self.damage_per_tick
-            else:
-                remaining_ticks.append(t)
-        self.tick_times = remaining_ticks
-
-        # Deactivate if no future ticks
-        if not self.tick_times:
-            self.active = False
 # -------------------------
 # Blood Fury class
 # ------------------------
@@ -161,7 +182,7 @@ class Bloodlust:
 # -------------------------        
 
 class DeathWish:
-    def __init__(self, duration=30.0, cooldown=120.0):
+    def __init__(self, duration=30.0, cooldown=120.0, cooldowns=None):
         self.duration = duration
         self.cooldown = cooldown
         self.active = False
@@ -169,6 +190,7 @@ class DeathWish:
         self.next_available = 0.0
         self.total_uptime = 0.0
         self.last_update_time = 0.0
+        self.cooldowns = cooldowns
 
     def update(self, current_time):
         if self.active:
@@ -189,94 +211,132 @@ class DeathWish:
         self.update(current_time)
         self.active = True
         self.end_time = current_time + self.duration
-        self.next_available = current_time + self.cooldown
+        self._set_next_available(current_time + self.cooldown)
+
+    def reduce_cooldown(self, current_time, amount):
+        self._set_next_available(max(current_time, self.next_available - amount))
+
+    def _set_next_available(self, time):
+        self.next_available = time
+        if self.cooldowns is not None:
+            self.cooldowns.start("DW", time)
+
+# -------------------------
+# Cooldown registry
+# -------------------------
+class CooldownRegistry:
+    """
+    Ready times of the rotation cooldowns, indexed so the GCD handler can ask
+    for the earliest ready time after now in O(log n).
+    Also counts GCD evaluations, and the ones that cast nothing.
+    """
+    def __init__(self, names=()):
+        self.ready = {name: 0.0 for name in names}  # name -> ready time
+        self.heap = []                              # (ready_time, name); stale after a new start()
+        self.gcd_evaluations = 0
+        self.idle_gcd_evaluations = 0
+
+    def start(self, name, ready_time):
+        self.ready[name] = ready_time
+        heappush(self.heap, (ready_time, name))
+
+    def next_ready_after(self, current_time):
+        """Earliest ready time > current_time, or INF."""
+        heap = self.heap
+        while heap:
+            ready_time, name = heap[0]
+            if ready_time > current_time and self.ready[name] == ready_time:
+                return ready_time
+            # Passed or superseded: time only moves forward, so drop it
+            heappop(heap)
+        return INF
 
 # -------------------------
 # Buff tracker for on-hit effects (Crusader, HoJ, etc.)
 # -------------------------
 class BuffTracker:
+    """
+    Keeps running per-stat totals of the active buffs. Buffs are keyed by
+    name and expire from a min-heap, so update() only touches buffs that
+    actually expired. Uptime is booked when a buff expires (and for the
+    still-running span when it is queried).
+    """
+    # Per-buff record layout: [stat, value, stacks, end_time, span_start]
+    STAT, VALUE, STACKS, END, SPAN_START = range(5)
+
     def __init__(self):
-        self.active_buffs = []
+        self.buffs = {}          # name -> record, see layout above
+        self.totals = {}         # stat -> summed value of active buffs
+        self.stat_counts = {}    # stat -> number of active buffs on it
+        self.expiry_heap = []    # (end_time, name); stale after a refresh
         self.uptime = {}  # Track total uptime per buff name
         self.last_update_time = 0.0
+        self.version = 0  # Bumped whenever the totals change
 
     def add_buff(self, name, stat, amount, duration, start_time, ignore_if_active=False, max_stacks=1):
         """
         Add a new buff or refresh an existing one.
         If ignore_if_active is True, do not refresh an existing buff.
+        Stacking buffs (max_stacks > 1) refresh all stacks so they expire together.
         """
-        self.update(start_time)  # update uptime before changing buffs
-
-        # Handle stacking buffs
-        if max_stacks > 1:
-            existing_stacks = [b for b in self.active_buffs if b["name"] == name]
-            
-            # Refresh ALL existing stacks so they expire together
-            for buff in existing_stacks:
-                buff["start_time"] = start_time
-                buff["duration"] = duration
-
-            if len(existing_stacks) < max_stacks:
-                # Add a new stack
-                self.active_buffs.append({
-                    "name": name, "stat": stat, "amount": amount, "duration": duration,
-                    "start_time": start_time
-                })
-            return
-
-        # Handle non-stacking buffs
-        for buff in self.active_buffs:
-            if buff["name"] == name:
-                if ignore_if_active:
-                    return  # do not refresh
-                buff["start_time"] = start_time
-                buff["duration"] = duration
-                buff["amount"] = amount
-                return
+        self.update(start_time)  # expire buffs before changing them
+
+        end_time = start_time + duration
+        buff = self.buffs.get(name)
+        if buff is None:
+            self.buffs[name] = [stat, amount, 1, end_time, start_time]
+            self.totals[stat] = self.totals.get(stat, 0.0) + amount
+            self.stat_counts[stat] = self.stat_counts.get(stat, 0) + 1
+        elif max_stacks > 1:
+            buff[self.END] = end_time
+            if buff[self.STACKS] < max_stacks:
+                buff[self.STACKS] += 1
+                buff[self.VALUE] += amount
+                self.totals[stat] += amount
+        else:
+            if ignore_if_active:
+                return  # do not refresh
+            buff[self.END] = end_time
+            self.totals[stat] += amount - buff[self.VALUE]
+            buff[self.VALUE] = amount
 
-        # Add new buff if it doesn't exist yet
-        self.active_buffs.append({
-            "name": name,
-            "stat": stat,
-            "amount": amount,
-            "duration": duration,
-            "start_time": start_time
-        })
+        heappush(self.expiry_heap, (end_time, name))
+        self.version += 1
 
     def update(self, current_time):
         """
-        Update active buffs, calculate uptime, and remove expired buffs.
-        Returns a dict of total stats from active buffs.
+        Remove expired buffs and book their uptime.
+        Returns the (live) dict of total stats from active buffs.
         """
-        dt = current_time - self.last_update_time
-
-        max_active_times = {}
-
-        for buff in self.active_buffs:
-            active_time = min(current_time, buff["start_time"] + buff["duration"]) - max(self.last_update_time, buff["start_time"])
-            if active_time > 0:
-                max_active_times[buff["name"]] = max(max_active_times.get(buff["name"], 0.0), active_time)
-
-        for name, t in max_active_times.items():
-            self.uptime[name] = self.uptime.get(name, 0) + t
-
-        # Remove expired buffs
-        self.active_buffs = [b for b in self.active_buffs if current_time < b["start_time"] + b["duration"]]
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= current_time:
+            end_time, name = heappop(heap)
+            buff = self.buffs.get(name)
+            if buff is None or buff[self.END] != end_time:
+                continue  # refreshed since this entry was pushed
+
+            stat = buff[self.STAT]
+            del self.buffs[name]
+            self.uptime[name] = self.uptime.get(name, 0.0) + end_time - buff[self.SPAN_START]
+            self.stat_counts[stat] -= 1
+            if self.stat_counts[stat]:
+                self.totals[stat] -= buff[self.VALUE]
+            else:
+                self.totals[stat] = 0.0  # no float drift once a stat is empty
+            self.version += 1
 
         self.last_update_time = current_time
-
-        # Aggregate stats
-        totals = {}
-        for buff in self.active_buffs:
-            totals[buff["stat"]] = totals.get(buff["stat"], 0) + buff["amount"]
-
-        return totals
+        return self.totals
 
     def get_uptime(self, buff_name, fight_length):
-        if fight_length <= 0:
-                return 0.0
         """Return the uptime percentage of a buff over the fight."""
-        return self.uptime.get(buff_name, 0.0) / fight_length
+        if fight_length <= 0:
+            return 0.0
+        uptime = self.uptime.get(buff_name, 0.0)
+        buff = self.buffs.get(buff_name)
+        if buff is not None:
+            uptime += max(0.0, min(self.last_update_time, buff[self.END]) - buff[self.SPAN_START])
+        return uptime / fight_length
 
 
 
@@ -284,29 +344,68 @@ class BuffTracker:
 # Deep Wounds tracker class
 # -------------------------
 class DeepWounds:
-    def __init__(self, duration=6.0, percent=0.48):
+    """
+    Ledger of Deep Wounds applications: [start, tick_damage, ticks_paid] per
+    crit, each ticking `num_ticks` times every `tick_interval`. Damage is
+    settled lazily.
+    """
+    def __init__(self, duration=6.0, percent=0.48, tick_interval=1.0):
         self.duration = duration      # DW lasts 6s
         self.percent = percent        # 48% of MH damage
-        self.active_ticks = []        # list of (tick_time, damage_per_tick)
-        self.total_damage = 0.0
+        self.tick_interval = tick_interval
+        self.num_ticks = int(duration / tick_interval)
+        self.ledger = deque()         # [start_time, tick_damage, ticks_paid], oldest first
+        self.total_damage = 0.0       # settled damage
 
     def trigger(self, current_time, weapon_dmg):
         """
         Trigger DW based on MH total damage including AP.
-        48% of MH damage over duration, split into 3 ticks.
+        48% of MH damage over duration, split into one tick per second.
         """
-        tick_damage = (self.percent * weapon_dmg) / 6   
-        for i in range(1, 7):
-            self.active_ticks.append((current_time + i * 1, tick_damage))  # ticks every 1
-
-    def update(self, current_time):
-        remaining_ticks = []
-        for tick_time, dmg in self.active_ticks:
-            if current_time >= tick_time:
-                self.total_damage += dmg
-            else:
-                remaining_ticks.append((tick_time, dmg))
-        self.active_ticks = remaining_ticks
+        tick_damage = (self.percent * weapon_dmg) / self.num_ticks
+        self.ledger.append([current_time, tick_damage, 0])
+
+    def settle(self, current_time):
+        """Book all ticks up to current_time and drop finished applications."""
+        ledger = self.ledger
+        num_ticks = self.num_ticks
+        interval = self.tick_interval
+        while ledger:
+            entry = ledger[0]
+            due = _ticks_due(entry[0], interval, num_ticks, current_time)
+            if due < num_ticks:
+                break
+            self.total_damage += (num_ticks - entry[2]) * entry[1]
+            ledger.popleft()
+        for entry in ledger:
+            due = _ticks_due(entry[0], interval, num_ticks, current_time)
+            if not due:
+                break  # later applications started later
+            self.total_damage += (due - entry[2]) * entry[1]
+            entry[2] = due
+
+    def damage_until(self, current_time):
+        """Total Deep Wounds damage dealt up to current_time, without settling."""
+        damage = self.total_damage
+        for start, tick_damage, ticks_paid in self.ledger:
+            due = _ticks_due(start, self.tick_interval, self.num_ticks, current_time)
+            if not due:
+                break
+            damage += max(0, due - ticks_paid) * tick_damage
+        return damage
+
+
+def _ticks_due(start, interval, num_ticks, current_time):
+    """Number of ticks i in 1..num_ticks with start + i * interval <= current_time."""
+    if current_time < start + interval:
+        return 0
+    due = min(num_ticks, int((current_time - start) / interval))
+    # Match the float comparison each tick time would make
+    while due < num_ticks and start + (due + 1) * interval <= current_time:
+        due += 1
+    while due > 0 and start + due * interval > current_time:
+        due -= 1
+    return due
 
 
 # -------------------------
@@ -388,7 +487,7 @@ class MightyRagePotion:
 
     def try_use(self, state, time):
         if time >= self.next_available:
-            rage_gain = random.randint(self.min_rage, self.max_rage)
+            rage_gain = randint(state.rolls.talent, self.min_rage, self.max_rage)
             state.rage = min(100, state.rage + rage_gain)
             state.onhit_buffs.add_buff("Mighty Rage", "strength", self.str_bonus, self.duration, time)
             self.next_available = time + self.cooldown
@@ -399,15 +498,82 @@ class MightyRagePotion:
 # Fight State & Event Handlers
 # -------------------------
 
+# Fight configuration FightState takes as kwargs: everything build_fight_kwargs
+# produces, plus the random pool _worker hands in
+FIGHT_CONFIG = (
+    "mh_speed", "oh_speed", "total_ap", "strength", "agility", "crit", "hit",
+    "min_dmg", "max_dmg", "oh_min_dmg", "oh_max_dmg", "armor", "mh_expertise", "oh_expertise",
+    "armor_penetration", "haste", "wf", "dual_wield", "battering_ram", "ambi_ME", "skull_cracker",
+    "fight_length", "tank_dummy", "kings", "str_earth", "shamanistic_rage", "outrage", "bashguuder",
+    "faeri", "sunders", "icon", "trauma", "HoJ", "maelstrom", "eternal_flame", "multi",
+    "BT_COST", "slam_COST", "ww_COST", "HS_COST", "RB_COST", "DW_COST", "MH_procs", "OH_procs",
+    "bloodlust_time", "bloodfury_time", "ability_priority", "Starting_rage", "impwield", "gcd", "gcd_delay",
+    "FLURRY_MULT", "undending_fury", "imp_ww", "PVE_PWR", "SMF", "smf", "tg", "ferocious_inspiration",
+    "dragon_roar", "dragon_warrior", "raging_blow", "heavy_weight", "power_slam", "bloodthirsty",
+    "raging_onslaught", "here_comes_the_big_one", "titans_fury", "mob_level",
+    "mighty_rage_potion_time", "mighty_rage_potion_prepull_time", "num_targets", "use_cleave",
+    "cleaving_slam", "swift_retribution", "battle_squawk", "blood_frenzy",
+    "event_engine", "rage_watch_enabled", "proc_sampling", "engine", "rng_substreams", "rolls",
+)
+
+# Options a kwargs dict may leave out; resolved once in FightState.__init__ so
+# the handlers never need a getattr fallback
+FIGHT_DEFAULTS = {
+    "armor": 4644, "armor_penetration": 0.0, "mob_level": 63, "eternal_flame": False,
+    "MH_procs": None, "OH_procs": None, "tg": False, "ferocious_inspiration": 1.0, "blood_frenzy": 1.0,
+    "heavy_weight": False, "swift_retribution": False, "battle_squawk": False,
+    "dragon_roar": False, "dragon_warrior": False, "raging_blow": False, "power_slam": False,
+    "bloodthirsty": False, "raging_onslaught": False, "here_comes_the_big_one": False, "titans_fury": False,
+    "num_targets": 1, "use_cleave": False, "cleaving_slam": False,
+    "mighty_rage_potion_time": -1.0, "mighty_rage_potion_prepull_time": 0.0,
+    "event_engine": "heap", "rage_watch_enabled": True, "proc_sampling": "bernoulli", "engine": "scalar",
+    "rng_substreams": False, "rolls": None,
+}
+
+# Per-fight state set up in FightState.__init__
+_FIGHT_RUNTIME = (
+    "time", "events", "rage",
+    "total_damage", "proc_damage_count", "white_MH_damage", "white_OH_damage", "hs_damage", "cleave_damage",
+    "WW_damage", "BT_damage", "DR_damage", "RB_damage", "slam_damage_MH", "slam_damage_OH", "total_ambi",
+    "slam_lockout_until", "HS_queue", "cooldowns", "slam_proc", "flurry_hits_remaining",
+    "rotation", "rage_watching", "rotation_waiting", "rage_watch", "rotation_token", "last_event_time",
+    "next_mh_swing", "next_oh_swing", "next_tank_dummy", "next_allowed_gcd",
+    "base_crit", "current_total_ap", "base_multi", "multi_oh", "current_haste", "mh_base_avg", "oh_base_avg",
+    "deep_wounds", "rend_bleed", "enrage", "onhit_buffs", "death_wish", "bloodlust", "bloodfury",
+    "ambidextrous", "rb_buff", "mighty_rage_potion",
+    "titans_fury_dmg_buff_end_time", "titans_fury_free_hs_stacks", "cleaving_slam_stacks",
+    "counts",
+    "MH_PROCS", "OH_PROCS", "MH_EXTRA_PROCS", "sunder_procs", "proc_cooldowns",
+    "mh_proc_table", "oh_proc_table", "mh_sunder_proc_table", "oh_sunder_proc_table",
+    "mh_extra_proc_table", "mh_extra_proc_tables", "roll_procs",
+    "base_armor_penetration", "enrage_multi", "flurry_time",
+    "static_strength", "static_crit", "static_haste", "static_multi", "oh_multi_factor", "base_avg_factor",
+    "stats_key", "haste_key", "multi_key", "attack_tables",
+)
+
+
 class FightState:
+    """
+    Everything one fight reads and mutates, in a fixed __slots__ layout:
+    the FIGHT_CONFIG kwargs (missing optional ones take FIGHT_DEFAULTS) and
+    the runtime state below. An unknown kwarg raises AttributeError.
+    """
+    __slots__ = FIGHT_CONFIG + _FIGHT_RUNTIME
+
     def __init__(self, **kwargs):
+        for key, value in FIGHT_DEFAULTS.items():
+            if key not in kwargs:
+                setattr(self, key, value)
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+        # Pre-drawn random numbers (see simulator.rng); _worker shares one pool across its fights
+        if self.rolls is None:
+            self.rolls = RandomPool(substreams=self.rng_substreams)
+
         # Core simulation state
         self.time = 0.0
-        self.event_id = 0
-        self.queue = PriorityQueue()
+        self.events = TimerCalendar() if self.event_engine == "calendar" else EventScheduler()
         self.rage = self.Starting_rage
 
         # Damage tracking
@@ -428,15 +594,16 @@ class FightState:
         # Cooldowns and state flags
         self.slam_lockout_until = 0.0
         self.HS_queue = 0
-        self.WW_CD_UP = 0.0
-        self.RB_CD_UP = 0.0
-        self.Bloodrage_CD_UP = 0.0
-        self.BerserkerRage_CD_UP = 0.0
-        self.Recklessness_CD_UP = 0.0
-        self.DR_CD_UP = 0.0
-        self.BT_CD_UP = 0.0
+        self.cooldowns = CooldownRegistry(["WW", "BT", "DR", "RB", "DW", "BLOODRAGE", "BERSERKER_RAGE", "RECKLESSNESS"])
         self.slam_proc = 0
         self.flurry_hits_remaining = 0
+
+        # Rotation and its rage/proc watch (see _handle_gcd)
+        self.rotation = [GCD_ACTIONS[name] for name in self.ability_priority if name in GCD_ACTIONS]
+        self.rage_watching = self.rage_watch_enabled
+        self.rotation_waiting = False
+        self.rage_watch = INF
+        self.rotation_token = 0
         self.last_event_time = 0.0
 
         self.next_mh_swing = 0.0
@@ -449,13 +616,16 @@ class FightState:
         self.current_total_ap = self.total_ap
         self.base_multi = self.multi
         self.multi_oh = self.multi
+        self.current_haste = self.haste
+        self.mh_base_avg = 0.0
+        self.oh_base_avg = 0.0
 
         # Trackers and Buffs
         self.deep_wounds = DeepWounds()
         self.rend_bleed = RendBleed()
         self.enrage = EnrageTracker()
         self.onhit_buffs = BuffTracker()
-        self.death_wish = DeathWish()
+        self.death_wish = DeathWish(cooldowns=self.cooldowns)
         self.bloodlust = Bloodlust()
         self.bloodfury = Bloodfury(onhit_buffs=self.onhit_buffs)
         self.ambidextrous = Ambidextrous()
@@ -467,15 +637,11 @@ class FightState:
         self.cleaving_slam_stacks = 0
 
         # Attack counts
-        self.attack_counts = {k: 0 for k in ["MH", "OH", "HS", "CLEAVE", "SLAM_MH", "SLAM_OH", "WW", "BT", "DR", "RB"]}
-        self.crit_counts = {k: 0 for k in ["MH_CRIT", "OH_CRIT", "HS_CRIT", "CLEAVE_CRIT", "SLAM_MH_CRIT", "SLAM_OH_CRIT", "WW_CRIT", "BT_CRIT", "DR_CRIT", "RB_CRIT"]}
-        self.miss_counts = {k: 0 for k in ["MH_MISS", "OH_MISS", "HS_MISS", "CLEAVE_MISS", "SLAM_MH_MISS", "SLAM_OH_MISS", "WW_MISS", "BT_MISS", "DR_MISS", "RB_MISS"]}
-        self.dodge_counts = {k: 0 for k in ["MH_DODGE", "OH_DODGE", "HS_DODGE", "CLEAVE_DODGE", "SLAM_MH_DODGE", "SLAM_OH_DODGE", "WW_DODGE", "BT_DODGE", "DR_DODGE", "RB_DODGE"]}
+        self.counts = [0] * COUNTS_SIZE  # counts[ATK_<attack> + <field>]
 
         # Procs
-        self.proc_cooldowns = {}
-        if not hasattr(self, 'MH_procs') or self.MH_procs is None: self.MH_procs = ["Crusader"]
-        if not hasattr(self, 'OH_procs') or self.OH_procs is None: self.OH_procs = ["Crusader_OH"]
+        if self.MH_procs is None: self.MH_procs = ["Crusader"]
+        if self.OH_procs is None: self.OH_procs = ["Crusader_OH"]
         self.MH_PROCS = set(self.MH_procs)
         self.OH_PROCS = set(self.OH_procs)
         self.MH_EXTRA_PROCS = set(self.MH_procs) # For extra attacks
@@ -492,18 +658,40 @@ class FightState:
             self.MH_PROCS.add("Maelstrom")
             self.OH_PROCS.add("Maelstrom")
             self.MH_EXTRA_PROCS.add("Maelstrom")
-        if getattr(self, "eternal_flame", False):
+        if self.eternal_flame:
             self.MH_PROCS.add("Eternal Flame")
             self.OH_PROCS.add("Eternal Flame")
             self.MH_EXTRA_PROCS.add("Eternal Flame")
 
+        # Compiled per-slot proc tables; cooldowns live in a flat list indexed by slot
+        slots = proc_cooldown_slots(self.MH_PROCS, self.OH_PROCS, self.MH_EXTRA_PROCS, self.sunder_procs)
+        self.proc_cooldowns = [0.0] * len(slots)
+        self.mh_proc_table = compile_proc_table(self.MH_PROCS, self.mh_speed, slots, _bind_proc_effect)
+        self.oh_proc_table = compile_proc_table(self.OH_PROCS, self.oh_speed, slots, _bind_proc_effect)
+        self.mh_sunder_proc_table = compile_proc_table(self.sunder_procs, self.mh_speed, slots, _bind_proc_effect)
+        self.oh_sunder_proc_table = compile_proc_table(self.sunder_procs, self.oh_speed, slots, _bind_proc_effect)
+        self.mh_extra_proc_table = compile_proc_table(self.MH_EXTRA_PROCS.copy(), self.mh_speed, slots, _bind_proc_effect)
+        self.mh_extra_proc_tables = {}
+        for name in sorted(self.MH_EXTRA_PROCS):
+            procs = self.MH_EXTRA_PROCS.copy()
+            procs.discard(name)
+            self.mh_extra_proc_tables[name] = compile_proc_table(procs, self.mh_speed, slots, _bind_proc_effect)
+
+        self.roll_procs = roll_procs
+        if self.proc_sampling == "geometric":
+            # Per-hit chances are fixed for the fight: skip ahead to the next proc
+            self.roll_procs = roll_procs_geometric
+            self.mh_proc_table = GeometricProcTable(self.mh_proc_table, self.rolls.proc)
+            self.oh_proc_table = GeometricProcTable(self.oh_proc_table, self.rolls.proc)
+            self.mh_sunder_proc_table = GeometricProcTable(self.mh_sunder_proc_table, self.rolls.proc)
+            self.oh_sunder_proc_table = GeometricProcTable(self.oh_sunder_proc_table, self.rolls.proc)
+            self.mh_extra_proc_table = GeometricProcTable(self.mh_extra_proc_table, self.rolls.proc)
+            self.mh_extra_proc_tables = {name: GeometricProcTable(table, self.rolls.proc) for name, table in self.mh_extra_proc_tables.items()}
+
         # Armor and enrage setup
-        if not hasattr(self, 'mob_level'): self.mob_level = 63
-        if not hasattr(self, 'armor'): self.armor = 4644
         if self.bashguuder: self.armor -= 668
         if self.sunders: self.armor *= 0.8
         if self.faeri: self.armor *= 0.95
-        if not hasattr(self, 'armor_penetration'): self.armor_penetration = 0.0
         if self.battering_ram: self.armor_penetration += 0.025
         self.base_armor_penetration = self.armor_penetration
         self.enrage_multi = 1.1 * 1.05 if self.outrage else 1.1
@@ -511,27 +699,111 @@ class FightState:
         # Uptime tracking
         self.flurry_time = 0.0
 
+        # Per-fight constants for the derived stats
+        if self.kings and self.str_earth:
+            self.static_strength = (self.strength + 88) * 1.1
+            self.static_crit = self.base_crit + (self.agility + 88) * 1.1 / 20 / 100
+        elif self.kings:
+            self.static_strength = self.strength * 1.1
+            self.static_crit = self.base_crit + self.agility / 20 / 100
+        elif self.str_earth:
+            self.static_strength = self.strength + 88 * 1.2
+            self.static_crit = self.base_crit + (self.agility + 88) / 20 / 100
+        else:
+            self.static_strength = self.strength
+            self.static_crit = self.base_crit + self.agility / 20 / 100
+
+        self.static_haste = self.wf
+        if self.swift_retribution: self.static_haste *= 1.03
+        if self.battle_squawk: self.static_haste *= 1.05
+
+        self.static_multi = self.base_multi * self.PVE_PWR * self.SMF
+        if self.tg: self.static_multi *= 0.954
+        self.static_multi *= self.ferocious_inspiration
+        self.static_multi *= self.blood_frenzy
+        if self.heavy_weight: self.static_multi *= 1.06
+        self.oh_multi_factor = 0.5 * self.impwield
+        self.base_avg_factor = 1.3 / self.PVE_PWR if self.trauma else 1.0 / self.PVE_PWR
+
+        # Inputs the derived stats were last computed from (None = never)
+        self.stats_key = None
+        self.haste_key = None
+        self.multi_key = None
+        self.attack_tables = {}  # _attack_thresholds cache, cleared when crit changes
+
         # Handle Pre-pull Potion
-        prepull = getattr(self, "mighty_rage_potion_prepull_time", 0.0)
+        prepull = self.mighty_rage_potion_prepull_time
         if prepull > 0:
-            rage_gain = random.randint(45, 75)
+            rage_gain = randint(self.rolls.talent, 45, 75)
             self.rage = min(100, self.rage + rage_gain)
             self.onhit_buffs.add_buff("Mighty Rage", "strength", 60, 20.0, -prepull)
             self.mighty_rage_potion.next_available = 60.0 - prepull
 
-    def next_id(self):
-        self.event_id += 1
-        return self.event_id
+# Attack table outcomes, in table order
+ATTACK_OUTCOMES = ("MISS", "DODGE", "GLANCE", "CRIT", "HIT")
+MISS, DODGE, GLANCE, CRIT, HIT = range(len(ATTACK_OUTCOMES))
+AVOIDED = frozenset((MISS, DODGE))  # outcomes that don't connect
 
-def _roll_attack_outcome(state, attack_type, is_offhand, bonus_crit=0.0, bonus_hit=0.0, ignore_dw_penalty=False):
+# Attack counters: one flat int list per fight, a row of COUNT_FIELDS per
+# counted attack. counts[ATK_SLAM_MH + CRITS] is the Slam crit count.
+COUNTED_ATTACKS = ("MH", "OH", "HS", "CLEAVE", "SLAM_MH", "SLAM_OH", "WW", "BT", "DR", "RB")
+COUNT_FIELDS = ("hits", "crits", "misses", "dodges")
+HITS, CRITS, MISSES, DODGES = range(len(COUNT_FIELDS))
+(ATK_MH, ATK_OH, ATK_HS, ATK_CLEAVE, ATK_SLAM_MH, ATK_SLAM_OH,
+ ATK_WW, ATK_BT, ATK_DR, ATK_RB) = range(0, len(COUNTED_ATTACKS) * len(COUNT_FIELDS), len(COUNT_FIELDS))
+COUNTS_SIZE = len(COUNTED_ATTACKS) * len(COUNT_FIELDS)
+
+
+def attack_count_dict(counts):
+    """{attack: {"hits": .., "crits": .., "misses": .., "dodges": ..}} view of one counter list."""
+    width = len(COUNT_FIELDS)
+    return {atk: dict(zip(COUNT_FIELDS, counts[row:row + width]))
+            for atk, row in zip(COUNTED_ATTACKS, range(0, COUNTS_SIZE, width))}
+
+
+def fight_attack_counts(all_counts, fight):
+    """attack_count_dict of one fight (0-based) of a flattened all_attack_counts."""
+    start = fight * COUNTS_SIZE
+    return attack_count_dict(all_counts[start:start + COUNTS_SIZE])
+
+
+def attack_count_summary(totals, count_stats):
     """
-    Determines the outcome of an attack based on the attack table.
-    attack_type: "WHITE" or "YELLOW"
+    Per-attack table from summed counters and their per-fight RunningStats:
+    {attack: {field: {"total", "per_fight", "std", "min", "max"}, "crit_rate", "miss_rate", "dodge_rate"}}.
+    "hits" counts every swing or cast, landed or not, so the rates are
+    crits, misses and dodges over hits.
+    """
+    width = len(COUNT_FIELDS)
+    summary = {}
+    for atk, row in zip(COUNTED_ATTACKS, range(0, COUNTS_SIZE, width)):
+        entry = {}
+        for field, i in zip(COUNT_FIELDS, range(row, row + width)):
+            stats = count_stats[i]
+            entry[field] = {"total": totals[i], "per_fight": stats.mean, "std": stats.std,
+                            "min": stats.min if stats.count else 0, "max": stats.max if stats.count else 0}
+        hits = totals[row + HITS]
+        entry["crit_rate"] = totals[row + CRITS] / hits if hits else 0.0
+        entry["miss_rate"] = totals[row + MISSES] / hits if hits else 0.0
+        entry["dodge_rate"] = totals[row + DODGES] / hits if hits else 0.0
+        summary[atk] = entry
+    return summary
+
+def _attack_thresholds(state, attack_type, is_offhand, bonus_crit=0.0, bonus_hit=0.0, ignore_dw_penalty=False):
     """
+    Cumulative upper bounds of MISS, DODGE, GLANCE and CRIT on the [0, 1)
+    roll; anything above the last one is a HIT. Cached on the state until
+    crit changes (_refresh_derived_stats clears state.attack_tables).
+    """
+    key = (attack_type, is_offhand, ignore_dw_penalty, bonus_crit, bonus_hit)
+    thresholds = state.attack_tables.get(key)
+    if thresholds is not None:
+        return thresholds
+
     hit = state.hit + bonus_hit
     crit = state.crit + bonus_crit
     expertise = state.oh_expertise if is_offhand else state.mh_expertise
-    
+
     # 1. Miss
     if attack_type == "YELLOW" or ignore_dw_penalty:
         miss_chance = max(0.0, 0.08 - hit)
@@ -539,68 +811,173 @@ def _roll_attack_outcome(state, attack_type, is_offhand, bonus_crit=0.0, bonus_h
         miss_chance = max(0.0, 0.27 - hit) # 0.08 base + 0.19 DW penalty
     else:
         miss_chance = max(0.0, 0.08 - hit)
-        
+
     # 2. Dodge (Expertise reduces dodge chance, cap is 26 expertise for 6.5%)
     dodge_chance = max(0.0, 0.065 - (expertise * 0.0025))
-    
+
     # 3. Glance (White attacks only)
     glance_chance = 0.25 if attack_type == "WHITE" else 0.0
-    
-    roll = random.random()
-    
-    if roll < miss_chance:
-        return "MISS"
-    roll -= miss_chance
-    
-    if roll < dodge_chance:
-        return "DODGE"
-    roll -= dodge_chance
-    
-    if roll < glance_chance:
-        return "GLANCE"
-    roll -= glance_chance
-    
-    if roll < crit:
-        return "CRIT"
-        
-    return "HIT"
 
-def _handle_procs(triggered, state):
-    dmg = 0.0
-    for proc in triggered:
-        if proc.get("Ironfoe"):
-            state.queue.put((state.time, state.next_id(), "Extra_Attack", {"source_proc": proc.get("name")}))
-            state.queue.put((state.time, state.next_id(), "Extra_Attack", {"source_proc": proc.get("name")}))
+    dodge_end = miss_chance + dodge_chance
+    glance_end = dodge_end + glance_chance
+    thresholds = (miss_chance, dodge_end, glance_end, glance_end + crit)
+    state.attack_tables[key] = thresholds
+    return thresholds
+
+def _roll_attack_outcome(state, attack_type, is_offhand, bonus_crit=0.0, bonus_hit=0.0, ignore_dw_penalty=False):
+    """
+    Determines the outcome of an attack based on the attack table.
+    attack_type: "WHITE" or "YELLOW"
+    Returns an outcome code (MISS ... HIT, indices into ATTACK_OUTCOMES).
+    """
+    thresholds = state.attack_tables.get((attack_type, is_offhand, ignore_dw_penalty, bonus_crit, bonus_hit))
+    if thresholds is None:
+        thresholds = _attack_thresholds(state, attack_type, is_offhand, bonus_crit, bonus_hit, ignore_dw_penalty)
+    return bisect_right(thresholds, state.rolls.attack())
 
-        if proc.get("mh_extra_hit"):
-            state.queue.put((state.time, state.next_id(), "Extra_Attack", {"source_proc": proc.get("name")}))
+def classify_attack_rolls(thresholds, rolls):
+    """
+    Vectorized _roll_attack_outcome for batch engines: maps an array of
+    [0, 1) rolls to indices into ATTACK_OUTCOMES. Needs numpy.
+    """
+    if np is None:
+        raise ImportError("classify_attack_rolls needs numpy")
+    return np.searchsorted(np.asarray(thresholds), rolls, side="right")
 
-        if proc.get("name") == "Rend Garg":
-            state.rend_bleed.trigger(state.time, state.current_total_ap, state.multi, state.trauma)
+def _refresh_derived_stats(state, active_mods):
+    """
+    Recompute crit/AP, haste and damage multipliers, each only when one of
+    its inputs changed since the previous event.
+    """
+    buffs_version = state.onhit_buffs.version
+    ap_changed = False
+
+    stats_key = (buffs_version, state.bloodfury.active)
+    if stats_key != state.stats_key:
+        state.stats_key = stats_key
+        crit = state.static_crit + active_mods.get("crit", 0.0)
+        if crit != state.crit:
+            state.crit = crit
+            state.attack_tables.clear()
+        state.armor_penetration = state.base_armor_penetration + active_mods.get("arpen", 0.0)
 
-        if proc.get("ap_based"):
-            proc_dmg = proc.get("base_damage", 0) + state.current_total_ap * proc["ap_multiplier"] * proc.get("weapon_multiplier", 1.0)
+        current_strength = state.static_strength + active_mods.get("strength", 0)
+        ap = state.total_ap + current_strength * 2 + active_mods.get("ap", 0)
+        if state.bloodfury.active:
+            ap += state.bloodfury.get_bonus_ap()
+        if state.shamanistic_rage: ap *= 1.1
+        state.current_total_ap = ap
+        ap_changed = True
+
+    flurry_active = state.flurry_hits_remaining > 0
+    haste_key = (buffs_version, flurry_active, state.bloodlust.active)
+    if haste_key != state.haste_key:
+        state.haste_key = haste_key
+        proced_haste = state.haste + active_mods.get("haste", 0)
+        state.current_haste = ((state.FLURRY_MULT if flurry_active else 1.0) * proced_haste * state.static_haste
+                               * (1 + state.bloodlust.get_bonus_haste()))
+
+    titans_fury_active = state.titans_fury and state.time < state.titans_fury_dmg_buff_end_time
+    multi_key = (state.enrage.active, state.death_wish.active, titans_fury_active, state.ambidextrous.stacks)
+    if multi_key != state.multi_key:
+        state.multi_key = multi_key
+        multi = state.static_multi
+        if state.enrage.active:
+            multi *= state.enrage_multi
+        if state.death_wish.active:
+            multi *= 1.20
+        if titans_fury_active:
+            multi *= 1.05
+        state.multi = multi
+        state.multi_oh = multi * state.oh_multi_factor * state.ambidextrous.get_multiplier()
+        ap_changed = True
+
+    # Mh/Oh base dmg for wounds calc
+    if ap_changed:
+        ap_per_speed = state.current_total_ap / 14
+        state.mh_base_avg = ((state.min_dmg + state.max_dmg)/2 + ap_per_speed * state.mh_speed) * state.multi * state.base_avg_factor
+        state.oh_base_avg = ((state.oh_min_dmg + state.oh_max_dmg)/2 + ap_per_speed * state.oh_speed) * state.multi_oh * state.base_avg_factor
+
+def _bind_proc_effect(name, proc):
+    """Pre-bind the combat side of a proc (extra attacks, bleeds, damage) for compile_proc_table."""
+    effects = []
+    payload = {"source_proc": name}
+
+    if proc.get("Ironfoe"):
+        def ironfoe(state):
+            state.events.schedule(state.time, EXTRA_ATTACK, payload)
+            state.events.schedule(state.time, EXTRA_ATTACK, payload)
+            return 0.0
+        effects.append(ironfoe)
+
+    if proc.get("mh_extra_hit"):
+        def extra_hit(state):
+            state.events.schedule(state.time, EXTRA_ATTACK, payload)
+            return 0.0
+        effects.append(extra_hit)
+
+    if name == "Rend Garg":
+        def rend(state):
+            state.rend_bleed.trigger(state.time, state.current_total_ap, state.multi, state.trauma)
+            return 0.0
+        effects.append(rend)
+
+    if proc.get("ap_based"):
+        base_damage = proc.get("base_damage", 0)
+        ap_multiplier = proc["ap_multiplier"]
+        weapon_multiplier = proc.get("weapon_multiplier", 1.0)
+        def physical(state):
+            proc_dmg = base_damage + state.current_total_ap * ap_multiplier * weapon_multiplier
             DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
             proc_dmg *= (1 - DR)
-            if random.random() < state.crit:
+            if state.rolls.damage() < state.crit:
                 state.deep_wounds.trigger(state.time, state.mh_base_avg)
                 proc_dmg *= 2
-            dmg += proc_dmg
-
-        if proc.get("magic_based"):
-            proc_dmg = proc.get("base_damage", 0) + state.current_total_ap * proc["ap_multiplier"] * proc.get("weapon_multiplier", 1.0)
+            return proc_dmg
+        effects.append(physical)
+
+    if proc.get("magic_based"):
+        base_damage = proc.get("base_damage", 0)
+        ap_multiplier = proc["ap_multiplier"]
+        weapon_multiplier = proc.get("weapon_multiplier", 1.0)
+        def magic(state):
+            proc_dmg = base_damage + state.current_total_ap * ap_multiplier * weapon_multiplier
             proc_dmg /= state.multi
             proc_dmg *= 1.2475
-            if random.random() < state.crit:
+            if state.rolls.damage() < state.crit:
                 proc_dmg *= 1.5
-            dmg += proc_dmg
-
-    return dmg * state.multi
+            return proc_dmg
+        effects.append(magic)
+
+    if not effects:
+        return None
+    if len(effects) == 1:
+        return effects[0]
+    def combined(state):
+        dmg = 0.0
+        for effect in effects:
+            dmg += effect(state)
+        return dmg
+    return combined
+
+def _trigger_procs(state, table):
+    """Roll a compiled proc table for one landed hit and apply whatever fires."""
+    triggered = state.roll_procs(table, state.time, state.proc_cooldowns, state.rolls.proc)
+    if not triggered:
+        return
+    apply_compiled_procs(triggered, state.time, state.onhit_buffs)
+    dmg = 0.0
+    for proc in triggered:
+        if proc.effect is not None:
+            dmg += proc.effect(state)
+    dmg *= state.multi
+    state.proc_damage_count += dmg
+    state.total_damage += dmg
 
 def _get_next_swing_cost(state):
-    if getattr(state, "use_cleave", False) and state.num_targets > 1:
-        return 15.0 if getattr(state, "cleaving_slam", False) else 20.0
-    if getattr(state, "titans_fury", False) and state.titans_fury_free_hs_stacks > 0:
+    if state.use_cleave and state.num_targets > 1:
+        return 15.0 if state.cleaving_slam else 20.0
+    if state.titans_fury and state.titans_fury_free_hs_stacks > 0:
         return 0.0
     return state.HS_COST
 
@@ -619,7 +996,7 @@ def _cast_instant_slam(state):
         
         # Determine targets
         targets_to_hit = 1
-        if getattr(state, "cleaving_slam", False) and state.cleaving_slam_stacks > 0 and state.num_targets > 1:
+        if state.cleaving_slam and state.cleaving_slam_stacks > 0 and state.num_targets > 1:
             state.cleaving_slam_stacks -= 1
             targets_to_hit = 2
         
@@ -628,41 +1005,33 @@ def _cast_instant_slam(state):
 
         for i in range(hits_processed):
             outcome = _roll_attack_outcome(state, "YELLOW", False)
-            if outcome in ["MISS", "DODGE"]:
+            if outcome in AVOIDED:
                 if i == 0: # Primary target miss
                     state.rage -= state.slam_COST * 0.2 # Refund 80%
-                    if outcome == "MISS": state.miss_counts["SLAM_MH_MISS"] += 1
-                    if outcome == "DODGE": state.dodge_counts["SLAM_MH_DODGE"] += 1
-                    state.attack_counts["SLAM_MH"] += 1
+                    if outcome == MISS: state.counts[ATK_SLAM_MH + MISSES] += 1
+                    if outcome == DODGE: state.counts[ATK_SLAM_MH + DODGES] += 1
+                    state.counts[ATK_SLAM_MH + HITS] += 1
                     return True # Stop if primary misses
                 continue # Secondary miss, continue
 
             mh_hit_success = True
-            dmg, crit_flag, proc_flag = _resolve_slam_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, False, state.mob_level, multi=state.multi, power_slam=getattr(state, "power_slam", False), outcome=outcome)
+            dmg, crit_flag, proc_flag = _resolve_slam_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, False, state.mob_level, multi=state.multi, power_slam=state.power_slam, outcome=outcome, roll=state.rolls.damage, talent_roll=state.rolls.talent)
             dmg *= state.undending_fury
             state.total_damage += dmg
             state.slam_damage_MH += dmg
-            state.attack_counts["SLAM_MH"] += 1
+            state.counts[ATK_SLAM_MH + HITS] += 1
             if crit_flag:
-                state.crit_counts["SLAM_MH_CRIT"] += 1
+                state.counts[ATK_SLAM_MH + CRITS] += 1
                 state.deep_wounds.trigger(state.time, state.mh_base_avg)
                 state.flurry_hits_remaining = 3
             
-            triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-            apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-            proc_dmg = _handle_procs(triggered, state)
-            state.proc_damage_count += proc_dmg
-            state.total_damage += proc_dmg
+            _trigger_procs(state, state.mh_proc_table)
 
             if state.battering_ram:
-                triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.sunder_procs, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.mh_sunder_proc_table)
 
             if i == 0 and dmg > 0 and state.skull_cracker:
-                state.death_wish.next_available = max(state.time, state.death_wish.next_available - 4.0)
+                state.death_wish.reduce_cooldown(state.time, 4.0)
 
             if proc_flag:
                 state.enrage.trigger(state.time)
@@ -672,32 +1041,24 @@ def _cast_instant_slam(state):
         if state.smf and mh_hit_success:
             for i in range(hits_processed):
                 outcome_oh = _roll_attack_outcome(state, "YELLOW", True)
-                if outcome_oh in ["MISS", "DODGE"]:
-                    if outcome_oh == "MISS": state.miss_counts["SLAM_OH_MISS"] += 1
-                    if outcome_oh == "DODGE": state.dodge_counts["SLAM_OH_DODGE"] += 1
-                    state.attack_counts["SLAM_OH"] += 1
+                if outcome_oh in AVOIDED:
+                    if outcome_oh == MISS: state.counts[ATK_SLAM_OH + MISSES] += 1
+                    if outcome_oh == DODGE: state.counts[ATK_SLAM_OH + DODGES] += 1
+                    state.counts[ATK_SLAM_OH + HITS] += 1
                     continue
 
-                dmg, crit_flag, proc_flag = _resolve_slam_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, True, state.mob_level, multi=state.multi_oh, power_slam=getattr(state, "power_slam", False), outcome=outcome_oh)
+                dmg, crit_flag, proc_flag = _resolve_slam_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, True, state.mob_level, multi=state.multi_oh, power_slam=state.power_slam, outcome=outcome_oh, roll=state.rolls.damage, talent_roll=state.rolls.talent)
                 dmg *= state.undending_fury
                 state.total_damage += dmg
                 state.slam_damage_OH += dmg
-                state.attack_counts["SLAM_OH"] += 1
+                state.counts[ATK_SLAM_OH + HITS] += 1
                 if crit_flag:
-                    state.crit_counts["SLAM_OH_CRIT"] += 1
+                    state.counts[ATK_SLAM_OH + CRITS] += 1
                     state.deep_wounds.trigger(state.time, state.oh_base_avg)
                     state.flurry_hits_remaining = 3
-                triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.oh_proc_table)
                 if state.battering_ram:
-                    triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.sunder_procs, cooldowns=state.proc_cooldowns)
-                    apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                    proc_dmg = _handle_procs(triggered, state)
-                    state.proc_damage_count += proc_dmg
-                    state.total_damage += proc_dmg
+                    _trigger_procs(state, state.oh_sunder_proc_table)
     
                 if proc_flag:
                     state.enrage.trigger(state.time)
@@ -711,9 +1072,9 @@ def _cast_instant_slam(state):
 
 def _cast_bt(state):
     # Check if Bloodthirsty proc is available (allows bypass of CD)
-    has_bloodthirsty_proc = getattr(state, "bloodthirsty", False) and state.slam_proc >= 1
+    has_bloodthirsty_proc = state.bloodthirsty and state.slam_proc >= 1
     
-    if state.rage >= state.BT_COST and (state.time >= state.BT_CD_UP or has_bloodthirsty_proc):
+    if state.rage >= state.BT_COST and (state.time >= state.cooldowns.ready["BT"] or has_bloodthirsty_proc):
         # Consume proc if used
         forced_crit = False
         if has_bloodthirsty_proc:
@@ -721,132 +1082,120 @@ def _cast_bt(state):
             forced_crit = True
         
         outcome = _roll_attack_outcome(state, "YELLOW", False)
-        if outcome in ["MISS", "DODGE"]:
+        if outcome in AVOIDED:
             state.rage -= state.BT_COST * 0.2 # Refund 80%
-            if outcome == "MISS": state.miss_counts["BT_MISS"] += 1
-            if outcome == "DODGE": state.dodge_counts["BT_DODGE"] += 1
-            state.attack_counts["BT"] += 1
-            state.BT_CD_UP = state.time + 6.0
+            if outcome == MISS: state.counts[ATK_BT + MISSES] += 1
+            if outcome == DODGE: state.counts[ATK_BT + DODGES] += 1
+            state.counts[ATK_BT + HITS] += 1
+            state.cooldowns.start("BT", state.time + 6.0)
             return True
 
         bt_base = state.current_total_ap * 0.5
         DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
         dmg = bt_base * (1 - DR) * state.multi * state.undending_fury
         
-        if getattr(state, "here_comes_the_big_one", False) and (state.attack_counts["BT"] + 1) % 4 == 0:
+        if state.here_comes_the_big_one and (state.counts[ATK_BT + HITS] + 1) % 4 == 0:
             dmg *= 1.75
 
-        if forced_crit or outcome == "CRIT":
+        if forced_crit or outcome == CRIT:
             dmg *= 2.2
-            state.crit_counts["BT_CRIT"] += 1
+            state.counts[ATK_BT + CRITS] += 1
             state.deep_wounds.trigger(state.time, state.mh_base_avg)
             state.flurry_hits_remaining = 3
         state.total_damage += dmg
         state.BT_damage += dmg
-        state.attack_counts["BT"] += 1
+        state.counts[ATK_BT + HITS] += 1
         
-        if getattr(state, "raging_onslaught", False):
-            if random.random() < 0.5:
+        if state.raging_onslaught:
+            if state.rolls.talent() < 0.5:
                 state.rb_buff.add_stack()
 
-        triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-        apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-        proc_dmg = _handle_procs(triggered, state)
-        state.proc_damage_count += proc_dmg
-        state.total_damage += proc_dmg
+        _trigger_procs(state, state.mh_proc_table)
 
         # Bloodsurge generation: 40% if Bloodthirsty, else 20%
-        proc_chance = 0.4 if getattr(state, "bloodthirsty", False) else 0.2
-        if random.random() < proc_chance: state.slam_proc = 1
+        proc_chance = 0.4 if state.bloodthirsty else 0.2
+        if state.rolls.talent() < proc_chance: state.slam_proc = 1
 
         state.rage -= state.BT_COST
         if state.rage < _get_next_swing_cost(state):
             state.HS_queue = 0
-        state.BT_CD_UP = state.time + 6.0
+        state.cooldowns.start("BT", state.time + 6.0)
         return True
     return False
 
 def _cast_ww(state):
-    if state.rage >= state.ww_COST and state.time >= state.WW_CD_UP:
-        targets = min(getattr(state, "num_targets", 1), 4)
+    if state.rage >= state.ww_COST and state.time >= state.cooldowns.ready["WW"]:
+        targets = min(state.num_targets, 4)
         targets = max(1, targets)
         
         DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
-        norm_speed = 3.3 if getattr(state, "tg", False) else 2.4
+        norm_speed = 3.3 if state.tg else 2.4
         
         any_hit = False
         total_ww_dmg = 0.0
         
-        proc_chance = 0.4 if getattr(state, "bloodthirsty", False) else 0.2
+        proc_chance = 0.4 if state.bloodthirsty else 0.2
 
         for i in range(targets):
             # MH
             outcome_mh = _roll_attack_outcome(state, "YELLOW", False)
-            mh_missed = outcome_mh in ["MISS", "DODGE"]
+            mh_missed = outcome_mh in AVOIDED
             
             if not mh_missed:
                 any_hit = True
-                ww_base_mh = random.randint(int(state.min_dmg), int(state.max_dmg)) + state.current_total_ap / 14 * norm_speed
+                ww_base_mh = randint(state.rolls.damage, int(state.min_dmg), int(state.max_dmg)) + state.current_total_ap / 14 * norm_speed
                 ww_base_mh *= state.undending_fury * state.imp_ww
                 dmg_mh = ww_base_mh * (1 - DR) * state.multi
-                if outcome_mh == "CRIT":
+                if outcome_mh == CRIT:
                     dmg_mh *= 2.2
                     state.deep_wounds.trigger(state.time, state.mh_base_avg)
                     state.flurry_hits_remaining = 3
-                    state.crit_counts["WW_CRIT"] += 1
+                    state.counts[ATK_WW + CRITS] += 1
                 
                 total_ww_dmg += dmg_mh
                 
                 # Procs & Bloodsurge
-                triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.mh_proc_table)
                 
-                if random.random() < proc_chance: state.slam_proc = 1
+                if state.rolls.talent() < proc_chance: state.slam_proc = 1
             else:
-                if outcome_mh == "MISS": state.miss_counts["WW_MISS"] += 1
-                if outcome_mh == "DODGE": state.dodge_counts["WW_DODGE"] += 1
+                if outcome_mh == MISS: state.counts[ATK_WW + MISSES] += 1
+                if outcome_mh == DODGE: state.counts[ATK_WW + DODGES] += 1
 
             # OH
             if state.dual_wield:
                 outcome_oh = _roll_attack_outcome(state, "YELLOW", True)
-                oh_missed = outcome_oh in ["MISS", "DODGE"]
+                oh_missed = outcome_oh in AVOIDED
                 
                 if not oh_missed:
                     any_hit = True
-                    ww_base_oh = random.randint(int(state.oh_min_dmg), int(state.oh_max_dmg)) + state.current_total_ap / 14 * norm_speed
+                    ww_base_oh = randint(state.rolls.damage, int(state.oh_min_dmg), int(state.oh_max_dmg)) + state.current_total_ap / 14 * norm_speed
                     ww_base_oh *= state.undending_fury * state.imp_ww
                     dmg_oh = ww_base_oh * (1 - DR) * state.multi_oh
-                    if outcome_oh == "CRIT":
+                    if outcome_oh == CRIT:
                         dmg_oh *= 2
                         state.deep_wounds.trigger(state.time, state.oh_base_avg)
                         state.flurry_hits_remaining = 3
-                        state.crit_counts["WW_CRIT"] += 1
+                        state.counts[ATK_WW + CRITS] += 1
                     
                     total_ww_dmg += dmg_oh
                     
-                    triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-                    apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                    proc_dmg = _handle_procs(triggered, state)
-                    state.proc_damage_count += proc_dmg
-                    state.total_damage += proc_dmg
+                    _trigger_procs(state, state.oh_proc_table)
                     
-                    if random.random() < proc_chance: state.slam_proc = 1
+                    if state.rolls.talent() < proc_chance: state.slam_proc = 1
 
         if not any_hit:
             state.rage -= state.ww_COST * 0.2
-            state.attack_counts["WW"] += 1
-            ww_cd = 6.0 if getattr(state, "dragon_roar", False) else 8.0
-            state.WW_CD_UP = state.time + ww_cd
+            state.counts[ATK_WW + HITS] += 1
+            ww_cd = 6.0 if state.dragon_roar else 8.0
+            state.cooldowns.start("WW", state.time + ww_cd)
             return True
 
         state.total_damage += total_ww_dmg
         state.WW_damage += total_ww_dmg
-        state.attack_counts["WW"] += 1
+        state.counts[ATK_WW + HITS] += 1
 
-        if getattr(state, "titans_fury", False):
+        if state.titans_fury:
             if state.rage > 50:
                 state.titans_fury_dmg_buff_end_time = state.time + 10.0
             elif state.rage < 50:
@@ -857,18 +1206,18 @@ def _cast_ww(state):
         if state.rage < _get_next_swing_cost(state):
             state.HS_queue = 0
         
-        ww_cd = 6.0 if getattr(state, "dragon_roar", False) else 8.0
-        state.WW_CD_UP = state.time + ww_cd
+        ww_cd = 6.0 if state.dragon_roar else 8.0
+        state.cooldowns.start("WW", state.time + ww_cd)
 
-        if getattr(state, "dragon_warrior", False):
-            state.DR_CD_UP = max(state.time, state.DR_CD_UP - 5.0)
+        if state.dragon_warrior:
+            state.cooldowns.start("DR", max(state.time, state.cooldowns.ready["DR"] - 5.0))
         return True
     return False
 
 def _cast_dragon_roar(state):
-    if not getattr(state, "dragon_roar", False): return False
-    if state.time >= state.DR_CD_UP:
-        targets = min(getattr(state, "num_targets", 1), 3)
+    if not state.dragon_roar: return False
+    if state.time >= state.cooldowns.ready["DR"]:
+        targets = min(state.num_targets, 3)
         targets = max(1, targets)
         
         any_hit = False
@@ -876,9 +1225,9 @@ def _cast_dragon_roar(state):
         
         for i in range(targets):
             outcome = _roll_attack_outcome(state, "YELLOW", False)
-            if outcome in ["MISS", "DODGE"]:
-                 if outcome == "MISS": state.miss_counts["DR_MISS"] += 1
-                 if outcome == "DODGE": state.dodge_counts["DR_DODGE"] += 1
+            if outcome in AVOIDED:
+                 if outcome == MISS: state.counts[ATK_DR + MISSES] += 1
+                 if outcome == DODGE: state.counts[ATK_DR + DODGES] += 1
                  continue
 
             any_hit = True
@@ -887,30 +1236,30 @@ def _cast_dragon_roar(state):
             DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
             dmg = base_dmg * (1 - DR) * state.multi
             
-            if outcome == "CRIT":
+            if outcome == CRIT:
                 dmg *= 2.2
-                state.crit_counts["DR_CRIT"] += 1
+                state.counts[ATK_DR + CRITS] += 1
                 state.deep_wounds.trigger(state.time, state.mh_base_avg)
                 state.flurry_hits_remaining = 3
             
             total_dr_dmg += dmg
             
         if not any_hit:
-             state.attack_counts["DR"] += 1
-             state.DR_CD_UP = state.time + 30.0
+             state.counts[ATK_DR + HITS] += 1
+             state.cooldowns.start("DR", state.time + 30.0)
              return True
 
         state.total_damage += total_dr_dmg
         state.DR_damage += total_dr_dmg
-        state.attack_counts["DR"] += 1
+        state.counts[ATK_DR + HITS] += 1
         
         # Resets the cooldown for WW
-        state.WW_CD_UP = 0.0
+        state.cooldowns.start("WW", 0.0)
         
         # 30s Cooldown
-        state.DR_CD_UP = state.time + 30.0
+        state.cooldowns.start("DR", state.time + 30.0)
 
-        if getattr(state, "dragon_warrior", False) and not state.death_wish.active:
+        if state.dragon_warrior and not state.death_wish.active:
             state.death_wish.active = True
             state.death_wish.end_time = state.time + 5.0
             state.death_wish.last_update_time = state.time
@@ -924,74 +1273,58 @@ def _cast_hard_slam(state):
         state.slam_lockout_until = state.time + slam_cast_time
         
         outcome = _roll_attack_outcome(state, "YELLOW", False)
-        if outcome in ["MISS", "DODGE"]:
+        if outcome in AVOIDED:
             state.rage -= state.slam_COST * 0.2
-            if outcome == "MISS": state.miss_counts["SLAM_MH_MISS"] += 1
-            if outcome == "DODGE": state.dodge_counts["SLAM_MH_DODGE"] += 1
-            state.attack_counts["SLAM_MH"] += 1
+            if outcome == MISS: state.counts[ATK_SLAM_MH + MISSES] += 1
+            if outcome == DODGE: state.counts[ATK_SLAM_MH + DODGES] += 1
+            state.counts[ATK_SLAM_MH + HITS] += 1
             return True
 
-        dmg, crit_flag, proc_flag = _resolve_slam_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, False, state.mob_level, multi=state.multi, power_slam=getattr(state, "power_slam", False), outcome=outcome)
+        dmg, crit_flag, proc_flag = _resolve_slam_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, False, state.mob_level, multi=state.multi, power_slam=state.power_slam, outcome=outcome, roll=state.rolls.damage, talent_roll=state.rolls.talent)
         dmg *= state.undending_fury
         state.total_damage += dmg
         state.slam_damage_MH += dmg
-        state.attack_counts["SLAM_MH"] += 1
+        state.counts[ATK_SLAM_MH + HITS] += 1
         
         if dmg > 0:
             if crit_flag:
-                state.crit_counts["SLAM_MH_CRIT"] += 1
+                state.counts[ATK_SLAM_MH + CRITS] += 1
                 state.deep_wounds.trigger(state.time, state.mh_base_avg)
                 state.flurry_hits_remaining = 3
-            triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-            apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-            proc_dmg = _handle_procs(triggered, state)
-            state.proc_damage_count += proc_dmg
-            state.total_damage += proc_dmg
+            _trigger_procs(state, state.mh_proc_table)
 
             if state.battering_ram:
-                triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.sunder_procs, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.mh_sunder_proc_table)
 
             if state.skull_cracker:
-                state.death_wish.next_available = max(state.time, state.death_wish.next_available - 4.0)
+                state.death_wish.reduce_cooldown(state.time, 4.0)
         
         if proc_flag:
             state.enrage.trigger(state.time)
             state.slam_proc = 1
         if state.smf:
             outcome_oh = _roll_attack_outcome(state, "YELLOW", True)
-            if outcome_oh in ["MISS", "DODGE"]:
-                if outcome_oh == "MISS": state.miss_counts["SLAM_OH_MISS"] += 1
-                if outcome_oh == "DODGE": state.dodge_counts["SLAM_OH_DODGE"] += 1
-                state.attack_counts["SLAM_OH"] += 1
+            if outcome_oh in AVOIDED:
+                if outcome_oh == MISS: state.counts[ATK_SLAM_OH + MISSES] += 1
+                if outcome_oh == DODGE: state.counts[ATK_SLAM_OH + DODGES] += 1
+                state.counts[ATK_SLAM_OH + HITS] += 1
                 return True
 
-            dmg, crit_flag, proc_flag = _resolve_slam_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, True, state.mob_level, multi=state.multi_oh, power_slam=getattr(state, "power_slam", False), outcome=outcome_oh)
+            dmg, crit_flag, proc_flag = _resolve_slam_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, True, state.mob_level, multi=state.multi_oh, power_slam=state.power_slam, outcome=outcome_oh, roll=state.rolls.damage, talent_roll=state.rolls.talent)
             dmg *= state.undending_fury
             state.total_damage += dmg
             state.slam_damage_OH += dmg
-            state.attack_counts["SLAM_OH"] += 1
+            state.counts[ATK_SLAM_OH + HITS] += 1
 
             if dmg > 0:
                 if crit_flag:
-                    state.crit_counts["SLAM_OH_CRIT"] += 1
+                    state.counts[ATK_SLAM_OH + CRITS] += 1
                     state.deep_wounds.trigger(state.time, state.oh_base_avg)
                     state.flurry_hits_remaining = 3
-            triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-            apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-            proc_dmg = _handle_procs(triggered, state)
-            state.proc_damage_count += proc_dmg
-            state.total_damage += proc_dmg
+            _trigger_procs(state, state.oh_proc_table)
 
             if state.battering_ram:
-                triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.sunder_procs, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.oh_sunder_proc_table)
 
         state.rage -= state.slam_COST
         if state.rage < _get_next_swing_cost(state):
@@ -1000,35 +1333,34 @@ def _cast_hard_slam(state):
     return False
 
 def _cast_bloodrage(state):
-    if state.time >= state.Bloodrage_CD_UP:
-        state.rage += 20 
-        if state.rage > 100: state.rage = 100
+    if state.time >= state.cooldowns.ready["BLOODRAGE"]:
+        _gain_rage(state, 20)
         state.rb_buff.add_stack()
-        state.Bloodrage_CD_UP = state.time + 40.0
+        state.cooldowns.start("BLOODRAGE", state.time + 40.0)
         # Returns False because it is off-GCD
         return False
     return False
 
 def _cast_berserker_rage(state):
-    if state.time >= state.BerserkerRage_CD_UP:
+    if state.time >= state.cooldowns.ready["BERSERKER_RAGE"]:
         state.rb_buff.add_stack()
-        state.BerserkerRage_CD_UP = state.time + 20.0
+        state.cooldowns.start("BERSERKER_RAGE", state.time + 20.0)
         return True
     return False
 
 def _cast_recklessness(state):
-    if state.time >= state.Recklessness_CD_UP:
+    if state.time >= state.cooldowns.ready["RECKLESSNESS"]:
         state.rb_buff.add_stack()
-        state.Recklessness_CD_UP = state.time + 201.0
+        state.cooldowns.start("RECKLESSNESS", state.time + 201.0)
         return True
     return False
 
 def _cast_raging_blow(state):
-    if not getattr(state, "raging_blow", False): return False
+    if not state.raging_blow: return False
     has_stacks = state.rb_buff.has_stacks()
     
     if not has_stacks:
-        if state.time < state.RB_CD_UP:
+        if state.time < state.cooldowns.ready["RB"]:
             return False
         if state.rage < state.RB_COST:
             return False
@@ -1037,71 +1369,63 @@ def _cast_raging_blow(state):
         state.rb_buff.consume_stack()
     else:
         state.rage -= state.RB_COST
-        state.RB_CD_UP = state.time + 10.0
+        state.cooldowns.start("RB", state.time + 10.0)
 
-    norm_speed = 3.3 if getattr(state, "tg", False) else 2.4
+    norm_speed = 3.3 if state.tg else 2.4
 
     # Raging Onslaught adds 30% crit to Raging Blow
-    rb_crit = state.crit + 0.30 if getattr(state, "raging_onslaught", False) else state.crit
+    rb_crit = state.crit + 0.30 if state.raging_onslaught else state.crit
 
-    outcome_mh = _roll_attack_outcome(state, "YELLOW", False, bonus_crit=(0.30 if getattr(state, "raging_onslaught", False) else 0.0))
-    outcome_oh = "MISS"
+    outcome_mh = _roll_attack_outcome(state, "YELLOW", False, bonus_crit=(0.30 if state.raging_onslaught else 0.0))
+    outcome_oh = MISS
     if state.dual_wield:
-        outcome_oh = _roll_attack_outcome(state, "YELLOW", True, bonus_crit=(0.30 if getattr(state, "raging_onslaught", False) else 0.0))
+        outcome_oh = _roll_attack_outcome(state, "YELLOW", True, bonus_crit=(0.30 if state.raging_onslaught else 0.0))
 
-    mh_missed = outcome_mh in ["MISS", "DODGE"]
-    oh_missed = outcome_oh in ["MISS", "DODGE"] if state.dual_wield else True
+    mh_missed = outcome_mh in AVOIDED
+    oh_missed = outcome_oh in AVOIDED if state.dual_wield else True
 
     if mh_missed and oh_missed:
         state.rage += state.RB_COST * 0.8 # Refund 80% (since we deducted full cost above)
-        if outcome_mh == "MISS": state.miss_counts["RB_MISS"] += 1
-        if outcome_mh == "DODGE": state.dodge_counts["RB_DODGE"] += 1
-        state.attack_counts["RB"] += 1
+        if outcome_mh == MISS: state.counts[ATK_RB + MISSES] += 1
+        if outcome_mh == DODGE: state.counts[ATK_RB + DODGES] += 1
+        state.counts[ATK_RB + HITS] += 1
         return True
 
     # MH Strike (180% damage)
     dmg_mh = 0.0
     if not mh_missed:
-        dmg_mh, _, _ = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, norm_speed, state.mob_level, multi=state.multi * 1.8, outcome=outcome_mh)
-        if outcome_mh == "CRIT":
+        dmg_mh, _, _ = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, norm_speed, state.mob_level, multi=state.multi * 1.8, outcome=outcome_mh, roll=state.rolls.damage)
+        if outcome_mh == CRIT:
             state.deep_wounds.trigger(state.time, state.mh_base_avg)
             state.flurry_hits_remaining = 3
 
     # OH Strike (180% damage)
     dmg_oh = 0.0
     if state.dual_wield and not oh_missed:
-        dmg_oh, _, _ = _resolve_swing_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, norm_speed, state.mob_level, multi=state.multi_oh * 1.8, outcome=outcome_oh)
-        if outcome_oh == "CRIT":
+        dmg_oh, _, _ = _resolve_swing_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, norm_speed, state.mob_level, multi=state.multi_oh * 1.8, outcome=outcome_oh, roll=state.rolls.damage)
+        if outcome_oh == CRIT:
             state.deep_wounds.trigger(state.time, state.oh_base_avg)
             state.flurry_hits_remaining = 3
 
     total_rb_dmg = dmg_mh + dmg_oh
     state.total_damage += total_rb_dmg
     state.RB_damage += total_rb_dmg
-    state.attack_counts["RB"] += 1
+    state.counts[ATK_RB + HITS] += 1
     
-    if outcome_mh == "CRIT":
-        state.crit_counts["RB_CRIT"] += 1
-    if outcome_oh == "CRIT":
-        state.crit_counts["RB_CRIT"] += 1
-    if outcome_mh == "MISS":
-        state.miss_counts["RB_MISS"] += 1
-    if outcome_mh == "DODGE":
-        state.dodge_counts["RB_DODGE"] += 1
+    if outcome_mh == CRIT:
+        state.counts[ATK_RB + CRITS] += 1
+    if outcome_oh == CRIT:
+        state.counts[ATK_RB + CRITS] += 1
+    if outcome_mh == MISS:
+        state.counts[ATK_RB + MISSES] += 1
+    if outcome_mh == DODGE:
+        state.counts[ATK_RB + DODGES] += 1
 
     # Procs
     if not mh_missed:
-        triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-        apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-        proc_dmg = _handle_procs(triggered, state)
-        state.proc_damage_count += proc_dmg
-        state.total_damage += proc_dmg
+        _trigger_procs(state, state.mh_proc_table)
     if state.dual_wield and not oh_missed:
-        triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-        apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-        proc_dmg = _handle_procs(triggered, state)
-        state.proc_damage_count += proc_dmg
-        state.total_damage += proc_dmg
+        _trigger_procs(state, state.oh_proc_table)
     
     return True
 
@@ -1110,29 +1434,124 @@ def _cast_raging_blow_buff(state):
         return _cast_raging_blow(state)
     return False
 
+# -------------------------
+# Rotation table
+# -------------------------
+# Non-rage requirements of abilities whose gate is more than a cooldown
+def _ready_slam_proc(state):
+    return state.slam_proc >= 1
+
+def _ready_bt(state):
+    return (state.time >= state.cooldowns.ready["BT"]
+            or (state.bloodthirsty and state.slam_proc >= 1))
+
+def _ready_dragon_roar(state):
+    return state.dragon_roar and state.time >= state.cooldowns.ready["DR"]
+
+def _ready_raging_blow(state):
+    return state.raging_blow and (state.rb_buff.has_stacks() or state.time >= state.cooldowns.ready["RB"])
+
+def _free_raging_blow(state):
+    return state.rb_buff.has_stacks()
+
+def _ready_raging_blow_buff(state):
+    return state.raging_blow and state.rb_buff.stacks == 3
+
+# cast:     the _cast_* function, returns True if it used the GCD
+# cost:     FightState attribute holding the rage cost (None = free)
+# cooldown: CooldownRegistry name (None = no cooldown)
+# ready:    non-rage requirements, defaults to the cooldown being up
+# free:     optional, True when the cast currently costs no rage
 GCD_ACTIONS = {
-    "DW": _cast_death_wish,
-    "SLAM_PROC": _cast_instant_slam,
-    "BT": _cast_bt,
-    "WW": _cast_ww,
-    "SLAM_HARD": _cast_hard_slam,
-    "DR": _cast_dragon_roar,
-    "RB": _cast_raging_blow,
-    "RB_BUFF": _cast_raging_blow_buff,
-    "BLOODRAGE": _cast_bloodrage,
-    "BERSERKER_RAGE": _cast_berserker_rage,
-    "RECKLESSNESS": _cast_recklessness,
+    "DW":             {"cast": _cast_death_wish,        "cost": "DW_COST",   "cooldown": "DW",             "ready": None,                     "free": None},
+    "SLAM_PROC":      {"cast": _cast_instant_slam,      "cost": "slam_COST", "cooldown": None,             "ready": _ready_slam_proc,         "free": None},
+    "BT":             {"cast": _cast_bt,                "cost": "BT_COST",   "cooldown": "BT",             "ready": _ready_bt,                "free": None},
+    "WW":             {"cast": _cast_ww,                "cost": "ww_COST",   "cooldown": "WW",             "ready": None,                     "free": None},
+    "SLAM_HARD":      {"cast": _cast_hard_slam,         "cost": "slam_COST", "cooldown": None,             "ready": None,                     "free": None},
+    "DR":             {"cast": _cast_dragon_roar,       "cost": None,        "cooldown": "DR",             "ready": _ready_dragon_roar,       "free": None},
+    "RB":             {"cast": _cast_raging_blow,       "cost": "RB_COST",   "cooldown": "RB",             "ready": _ready_raging_blow,       "free": _free_raging_blow},
+    "RB_BUFF":        {"cast": _cast_raging_blow_buff,  "cost": None,        "cooldown": None,             "ready": _ready_raging_blow_buff,  "free": None},
+    "BLOODRAGE":      {"cast": _cast_bloodrage,         "cost": None,        "cooldown": "BLOODRAGE",      "ready": None,                     "free": None},
+    "BERSERKER_RAGE": {"cast": _cast_berserker_rage,    "cost": None,        "cooldown": "BERSERKER_RAGE", "ready": None,                     "free": None},
+    "RECKLESSNESS":   {"cast": _cast_recklessness,      "cost": None,        "cooldown": "RECKLESSNESS",   "ready": None,                     "free": None},
 }
 
+def _rage_threshold(state):
+    """
+    Lowest rage cost among the priority abilities that are blocked by rage
+    alone. Returns None if some ability is castable right now, INF if none
+    is waiting on rage.
+    """
+    threshold = INF
+    for action in state.rotation:
+        ready = action["ready"]
+        if ready is not None:
+            if not ready(state):
+                continue
+        elif action["cooldown"] is not None and state.time < state.cooldowns.ready[action["cooldown"]]:
+            continue
+        cost = action["cost"]
+        if cost is None or (action["free"] is not None and action["free"](state)):
+            return None
+        cost = getattr(state, cost)
+        if state.rage >= cost:
+            return None
+        if cost < threshold:
+            threshold = cost
+    return threshold
+
+def _gain_rage(state, amount):
+    state.rage += amount
+    if state.rage > 100.0: state.rage = 100.0
+    if state.rage >= state.rage_watch:
+        _wake_rotation(state)
+
+def _gain_slam_proc(state):
+    state.slam_proc = 1
+    if state.rotation_waiting:
+        _wake_rotation(state)
+
+def _wake_rotation(state):
+    """Something the idle rotation was waiting on changed: re-evaluate now."""
+    state.rotation_waiting = False
+    state.rage_watch = INF
+    state.rotation_token += 1
+    state.events.schedule(state.time, GCD, state.rotation_token)
+
+def _watch_rage(state, threshold):
+    """Park the rotation until rage reaches `threshold`, a proc or the next cooldown."""
+    state.rotation_waiting = True
+    state.rage_watch = threshold
+    state.rotation_token += 1
+    next_time = state.cooldowns.next_ready_after(state.time)
+    if next_time <= state.fight_length:
+        state.events.schedule(next_time, GCD, state.rotation_token)
+
 def _handle_gcd(state, payload):
+    if payload is not False and payload != state.rotation_token:
+        return  # superseded watch wakeup
+
     if state.time < state.next_allowed_gcd:
-        state.queue.put((state.next_allowed_gcd, state.next_id(), "GCD", False))
+        state.events.schedule(state.next_allowed_gcd, GCD, False)
         return
 
+    if state.rotation_waiting:
+        # Woken by something else (extra attack, potion): drop the old watch
+        state.rotation_waiting = False
+        state.rage_watch = INF
+        state.rotation_token += 1
+
+    if state.rage_watching:
+        threshold = _rage_threshold(state)
+        if threshold is not None:
+            # Nothing castable: only rage, a proc or a cooldown can change that
+            _watch_rage(state, threshold)
+            return
+
+    state.cooldowns.gcd_evaluations += 1
     used_gcd = False
-    for ability_name in state.ability_priority:
-        action = GCD_ACTIONS.get(ability_name)
-        if action and action(state):
+    for action in state.rotation:
+        if action["cast"](state):
             used_gcd = True
             break
 
@@ -1140,38 +1559,36 @@ def _handle_gcd(state, payload):
         state.next_allowed_gcd = state.time + state.gcd + state.gcd_delay
         next_time = state.next_allowed_gcd
     else:
-        events = [
-            state.WW_CD_UP,
-            state.BT_CD_UP,
-            state.DR_CD_UP,
-            state.RB_CD_UP,
-            state.Bloodrage_CD_UP,
-            state.BerserkerRage_CD_UP,
-            state.Recklessness_CD_UP,
-            state.death_wish.next_available,
-            state.next_mh_swing,
-        ]
-        if state.dual_wield:
-            events.append(state.next_oh_swing)
-        if state.tank_dummy:
-            events.append(state.next_tank_dummy)
-        
-        pot_time = getattr(state, "mighty_rage_potion_time", -1)
-        if pot_time > state.time:
-            events.append(pot_time)
+        state.cooldowns.idle_gcd_evaluations += 1
+        if state.rage_watching:
+            # Only off-GCD casts went off (Bloodrage): go again or park
+            threshold = _rage_threshold(state)
+            if threshold is None:
+                state.events.schedule(state.time, GCD, False)
+            else:
+                _watch_rage(state, threshold)
+            return
 
-        future_events = [t for t in events if t > state.time]
-        
-        if future_events:
-            next_time = min(future_events)
-        else:
-            next_time = state.time + 0.1
-            
-        if next_time <= state.time:
-            next_time = state.time + 0.01
+        # Next decision point: earliest cooldown or timer that is still ahead of us.
+        # A swing due right now hasn't fired yet (Slam defers swings to the end
+        # of its cast, when this GCD comes up), so go again right after it.
+        now = state.time
+        next_time = state.cooldowns.next_ready_after(now)
+        if now <= state.next_mh_swing < next_time:
+            next_time = state.next_mh_swing
+        if state.dual_wield and now <= state.next_oh_swing < next_time:
+            next_time = state.next_oh_swing
+        if state.tank_dummy and now < state.next_tank_dummy < next_time:
+            next_time = state.next_tank_dummy
+        pot_time = state.mighty_rage_potion_time
+        if now < pot_time < next_time:
+            next_time = pot_time
+
+        if next_time == INF:
+            next_time = now + 0.1
 
     if next_time <= state.fight_length:
-        state.queue.put((next_time, state.next_id(), "GCD", False))
+        state.events.schedule(next_time, GCD, False)
 
 def _handle_mh_swing(state, payload):
     swing_speed = state.mh_speed / state.current_haste
@@ -1180,12 +1597,14 @@ def _handle_mh_swing(state, payload):
         state.flurry_hits_remaining -= 1
     
     if state.time < state.slam_lockout_until:
-        state.queue.put((state.slam_lockout_until, state.next_id(), "MH_SWING", False))
+        # Slam pushes the swing to the end of its cast; keep next_mh_swing in step so idle GCDs wake for it
+        state.next_mh_swing = state.slam_lockout_until
+        state.events.schedule(state.slam_lockout_until, MH_SWING, False)
         return
 
     cost = _get_next_swing_cost(state)
     if state.HS_queue == 1 and state.rage >= cost:
-        is_cleave = getattr(state, "use_cleave", False)
+        is_cleave = state.use_cleave
         
         if is_cleave:
             # --- CLEAVE LOGIC ---
@@ -1201,21 +1620,21 @@ def _handle_mh_swing(state, payload):
             for i in range(targets):
                 outcome = _roll_attack_outcome(state, "YELLOW", False)
                 
-                if outcome in ["MISS", "DODGE"]:
+                if outcome in AVOIDED:
                     if i == 0:
-                        if outcome == "MISS": state.miss_counts["CLEAVE_MISS"] += 1
-                        if outcome == "DODGE": state.dodge_counts["CLEAVE_DODGE"] += 1
+                        if outcome == MISS: state.counts[ATK_CLEAVE + MISSES] += 1
+                        if outcome == DODGE: state.counts[ATK_CLEAVE + DODGES] += 1
                     continue
                 
                 any_hit = True
                 # Cleave Bonus: 110
-                base_dmg = random.randint(int(state.min_dmg), int(state.max_dmg)) + 110 + state.current_total_ap / 14 * state.mh_speed
+                base_dmg = randint(state.rolls.damage, int(state.min_dmg), int(state.max_dmg)) + 110 + state.current_total_ap / 14 * state.mh_speed
                 DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
                 dmg = base_dmg * (1 - DR) * state.multi
                 
-                if outcome == "CRIT":
+                if outcome == CRIT:
                     dmg *= 2.2
-                    if i == 0: state.crit_counts["CLEAVE_CRIT"] += 1
+                    if i == 0: state.counts[ATK_CLEAVE + CRITS] += 1
                     state.deep_wounds.trigger(state.time, state.mh_base_avg)
                     state.flurry_hits_remaining = 3
                 
@@ -1223,49 +1642,40 @@ def _handle_mh_swing(state, payload):
                 
                 # Procs on primary target only
                 if i == 0:
-                    triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-                    apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                    proc_dmg = _handle_procs(triggered, state)
-                    state.proc_damage_count += proc_dmg
-                    state.total_damage += proc_dmg
+                    _trigger_procs(state, state.mh_proc_table)
             
             if any_hit:
                 state.rage -= cost
                 state.total_damage += total_cleave_dmg
                 state.cleave_damage += total_cleave_dmg
             
-            if any_hit and getattr(state, "cleaving_slam", False):
+            if any_hit and state.cleaving_slam:
                 state.cleaving_slam_stacks = min(state.cleaving_slam_stacks + 1, 3)
 
-            state.attack_counts["CLEAVE"] += 1
+            state.counts[ATK_CLEAVE + HITS] += 1
             
         else:
             # --- HEROIC STRIKE LOGIC ---
             state.HS_queue = 0 # Consume the queue
-            hs_base = random.randint(int(state.min_dmg), int(state.max_dmg)) + 201 + state.current_total_ap / 14 * state.mh_speed
+            hs_base = randint(state.rolls.damage, int(state.min_dmg), int(state.max_dmg)) + 201 + state.current_total_ap / 14 * state.mh_speed
 
             outcome = _roll_attack_outcome(state, "YELLOW", False, bonus_crit=0.15)
-            if outcome in ["MISS", "DODGE"]:
-                if outcome == "MISS": state.miss_counts["HS_MISS"] += 1
-                if outcome == "DODGE": state.dodge_counts["HS_DODGE"] += 1
-                state.attack_counts["HS"] += 1
+            if outcome in AVOIDED:
+                if outcome == MISS: state.counts[ATK_HS + MISSES] += 1
+                if outcome == DODGE: state.counts[ATK_HS + DODGES] += 1
+                state.counts[ATK_HS + HITS] += 1
                 # Rage not consumed on miss/dodge for HS (On Next Swing)
                 return
 
-            triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-            apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-            proc_dmg = _handle_procs(triggered, state)
-            state.proc_damage_count += proc_dmg
-            state.total_damage += proc_dmg
+            _trigger_procs(state, state.mh_proc_table)
 
             DR = _calc_dr(state.armor, state.armor_penetration, state.mob_level)
             hs_dmg_val = hs_base * (1 - DR)
             
-            if outcome == "CRIT":
+            if outcome == CRIT:
                 hs_dmg_val *= 2.2
                 state.deep_wounds.trigger(state.time, state.mh_base_avg)
-                state.rage += 10
-                if state.rage > 100: state.rage = 100
+                _gain_rage(state, 10)
                 state.flurry_hits_remaining = 3
             
             hs_dmg_val *= state.multi
@@ -1277,27 +1687,23 @@ def _handle_mh_swing(state, payload):
                 state.titans_fury_free_hs_stacks -= 1
             
             # HS only triggers Bloodsurge if Bloodthirsty is NOT active
-            if not getattr(state, "bloodthirsty", False):
-                if random.random() < 0.2: state.slam_proc = 1
+            if not state.bloodthirsty:
+                if state.rolls.talent() < 0.2: _gain_slam_proc(state)
             
-            state.attack_counts["HS"] += 1
-            if outcome == "CRIT": state.crit_counts["HS_CRIT"] += 1
+            state.counts[ATK_HS + HITS] += 1
+            if outcome == CRIT: state.counts[ATK_HS + CRITS] += 1
             
             if state.ambi_ME:
-                ambi_dmg = random.randint(int(state.oh_min_dmg), int(state.oh_max_dmg)) + (state.current_total_ap / 14 * state.oh_speed)
+                ambi_dmg = randint(state.rolls.damage, int(state.oh_min_dmg), int(state.oh_max_dmg)) + (state.current_total_ap / 14 * state.oh_speed)
                 ambi_dmg *= state.multi_oh * 0.6
                 ambi_dmg *= (1 - DR)
-                ambi_crit = random.random() < state.crit
+                ambi_crit = state.rolls.damage() < state.crit
                 if ambi_crit:
                     ambi_dmg *= 2
                     state.deep_wounds.trigger(state.time, state.oh_base_avg)
                     state.flurry_hits_remaining = 3
                 
-                triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-                apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-                proc_dmg = _handle_procs(triggered, state)
-                state.proc_damage_count += proc_dmg
-                state.total_damage += proc_dmg
+                _trigger_procs(state, state.oh_proc_table)
                 
                 state.total_damage += ambi_dmg
                 state.total_ambi += ambi_dmg
@@ -1309,38 +1715,33 @@ def _handle_mh_swing(state, payload):
         next_time = state.time + swing_speed
         state.next_mh_swing = next_time
         if next_time <= state.fight_length:
-            state.queue.put((next_time, state.next_id(), "MH_SWING", False))
+            state.events.schedule(next_time, MH_SWING, False)
     else:
         # If we intended to HS but couldn't, unqueue
         if state.HS_queue == 1:
             state.HS_queue = 0
         
         outcome = _roll_attack_outcome(state, "WHITE", False)
-        dmg, was_crit, was_miss = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, state.mob_level, multi=state.multi, outcome=outcome)
+        dmg, was_crit, was_miss = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, state.mob_level, multi=state.multi, outcome=outcome, roll=state.rolls.damage)
         
         state.total_damage += dmg
         state.white_MH_damage += dmg
-        state.attack_counts["MH"] += 1
+        state.counts[ATK_MH + HITS] += 1
         
         if was_crit:
-            state.crit_counts["MH_CRIT"] += 1
+            state.counts[ATK_MH + CRITS] += 1
             state.flurry_hits_remaining = 3
             state.deep_wounds.trigger(state.time, state.mh_base_avg)
         
-        if outcome == "MISS": state.miss_counts["MH_MISS"] += 1
-        if outcome == "DODGE": state.dodge_counts["MH_DODGE"] += 1
+        if outcome == MISS: state.counts[ATK_MH + MISSES] += 1
+        if outcome == DODGE: state.counts[ATK_MH + DODGES] += 1
         
-        if outcome in ["MISS", "DODGE"]:
+        if outcome in AVOIDED:
             pass
         else:
-            triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=state.MH_PROCS, cooldowns=state.proc_cooldowns)
-            apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-            proc_dmg = _handle_procs(triggered, state)
-            state.proc_damage_count += proc_dmg
-            state.total_damage += proc_dmg
+            _trigger_procs(state, state.mh_proc_table)
 
-        state.rage += _generate_rage_classic(dmg, state.mh_speed, offhand=False, is_crit=was_crit)
-        if state.rage > 100.0: state.rage = 100.0
+        _gain_rage(state, _generate_rage_classic(dmg, state.mh_speed, offhand=False, is_crit=was_crit))
 
         # After generating rage, check if we can queue HS
         if state.rage >= _get_next_swing_cost(state):
@@ -1349,7 +1750,7 @@ def _handle_mh_swing(state, payload):
         next_time = state.time + swing_speed
         state.next_mh_swing = next_time
         if next_time <= state.fight_length:
-            state.queue.put((next_time, state.next_id(), "MH_SWING", False))
+            state.events.schedule(next_time, MH_SWING, False)
 
 def _handle_oh_swing(state, payload):
     if not state.dual_wield:
@@ -1361,36 +1762,33 @@ def _handle_oh_swing(state, payload):
         state.flurry_hits_remaining -= 1
     
     if state.time < state.slam_lockout_until:
-        state.queue.put((state.slam_lockout_until, state.next_id(), "OH_SWING", False))
+        # Slam pushes the swing to the end of its cast; keep next_oh_swing in step so idle GCDs wake for it
+        state.next_oh_swing = state.slam_lockout_until
+        state.events.schedule(state.slam_lockout_until, OH_SWING, False)
         return
 
     ignore_dw_penalty = (state.HS_queue == 1)
     outcome = _roll_attack_outcome(state, "WHITE", True, ignore_dw_penalty=ignore_dw_penalty)
-    dmg, was_crit, was_miss = _resolve_swing_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, state.mob_level, multi=state.multi_oh, outcome=outcome)
+    dmg, was_crit, was_miss = _resolve_swing_damage(state.oh_min_dmg, state.oh_max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.oh_speed, state.mob_level, multi=state.multi_oh, outcome=outcome, roll=state.rolls.damage)
 
     state.total_damage += dmg
     state.white_OH_damage += dmg
-    state.attack_counts["OH"] += 1
+    state.counts[ATK_OH + HITS] += 1
 
     if was_crit:
-        state.crit_counts["OH_CRIT"] += 1
+        state.counts[ATK_OH + CRITS] += 1
         state.deep_wounds.trigger(state.time, state.oh_base_avg)
         state.flurry_hits_remaining = 3
     
-    if outcome == "MISS": state.miss_counts["OH_MISS"] += 1
-    if outcome == "DODGE": state.dodge_counts["OH_DODGE"] += 1
+    if outcome == MISS: state.counts[ATK_OH + MISSES] += 1
+    if outcome == DODGE: state.counts[ATK_OH + DODGES] += 1
 
-    if outcome in ["MISS", "DODGE"]:
+    if outcome in AVOIDED:
         pass
     else:
-        triggered = resolve_on_hit_procs(state.time, state.oh_speed, procs_to_check=state.OH_PROCS, cooldowns=state.proc_cooldowns)
-        apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-        proc_dmg = _handle_procs(triggered, state)
-        state.proc_damage_count += proc_dmg
-        state.total_damage += proc_dmg
+        _trigger_procs(state, state.oh_proc_table)
 
-    state.rage += _generate_rage_classic(dmg, state.oh_speed, offhand=True, is_crit=was_crit)
-    if state.rage > 100.0: state.rage = 100.0
+    _gain_rage(state, _generate_rage_classic(dmg, state.oh_speed, offhand=True, is_crit=was_crit))
 
     # After generating rage, check if we can queue HS
     if state.rage >= _get_next_swing_cost(state):
@@ -1398,67 +1796,58 @@ def _handle_oh_swing(state, payload):
     next_time = state.time + swing_speed
     state.next_oh_swing = next_time
     if next_time <= state.fight_length:
-        state.queue.put((next_time, state.next_id(), "OH_SWING", False))
+        state.events.schedule(next_time, OH_SWING, False)
 
 def _handle_extra_attack(state, payload):
     if state.flurry_hits_remaining > 0:
         state.flurry_hits_remaining -= 1
     
     outcome = _roll_attack_outcome(state, "WHITE", False)
-    dmg, was_crit, was_miss = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, state.mob_level, multi=state.multi, outcome=outcome)
+    dmg, was_crit, was_miss = _resolve_swing_damage(state.min_dmg, state.max_dmg, state.current_total_ap, state.armor, state.armor_penetration, state.mh_speed, state.mob_level, multi=state.multi, outcome=outcome, roll=state.rolls.damage)
     
     state.total_damage += dmg
     state.white_MH_damage += dmg
-    state.attack_counts["MH"] += 1
+    state.counts[ATK_MH + HITS] += 1
 
     if was_crit:
-        state.crit_counts["MH_CRIT"] += 1
+        state.counts[ATK_MH + CRITS] += 1
         state.flurry_hits_remaining = 3
         state.deep_wounds.trigger(state.time, state.mh_base_avg)
 
-    if outcome == "MISS": state.miss_counts["MH_MISS"] += 1
-    if outcome == "DODGE": state.dodge_counts["MH_DODGE"] += 1
+    if outcome == MISS: state.counts[ATK_MH + MISSES] += 1
+    if outcome == DODGE: state.counts[ATK_MH + DODGES] += 1
 
-    if outcome in ["MISS", "DODGE"]:
+    if outcome in AVOIDED:
         pass
     else:
-        procs = state.MH_EXTRA_PROCS.copy()
-        source_proc = payload.get("source_proc")
-        if source_proc:
-            procs.discard(source_proc)
-        
-        triggered = resolve_on_hit_procs(state.time, state.mh_speed, procs_to_check=procs, cooldowns=state.proc_cooldowns)
-        apply_on_hit_procs(triggered, state.time, state.onhit_buffs)
-        proc_dmg = _handle_procs(triggered, state)
-        state.total_damage += proc_dmg
-        state.proc_damage_count += proc_dmg
+        # An extra attack can't re-trigger the proc that granted it
+        table = state.mh_extra_proc_tables.get(payload.get("source_proc"), state.mh_extra_proc_table)
+        _trigger_procs(state, table)
 
-    state.rage += _generate_rage_classic(dmg, state.mh_speed, offhand=False, is_crit=was_crit)
-    if state.rage > 100.0: state.rage = 100.0
+    _gain_rage(state, _generate_rage_classic(dmg, state.mh_speed, offhand=False, is_crit=was_crit))
 
     # After generating rage, check if we can queue HS
     if state.rage >= _get_next_swing_cost(state):
         state.HS_queue = 1
-    state.queue.put((state.time, state.next_id(), "GCD", False))
+    state.events.schedule(state.time, GCD, False)
 
 def _handle_tank_dummy(state, payload):
-    state.rage += 60
-    if state.rage > 100: state.rage = 100
+    _gain_rage(state, 60)
     next_time = state.time + 1.5
     state.next_tank_dummy = next_time
     if state.rage >= _get_next_swing_cost(state):
         state.HS_queue = 1
     if next_time <= state.fight_length:
-        state.queue.put((next_time, state.next_id(), "Tank_dummy", False))
+        state.events.schedule(next_time, TANK_DUMMY, False)
 
 def _handle_potion(state, payload):
     if not state.mighty_rage_potion.try_use(state, state.time):
         # Failed (likely on CD), reschedule for when available
         next_time = state.mighty_rage_potion.next_available
         if next_time <= state.fight_length:
-            state.queue.put((next_time, state.next_id(), "POTION", None))
+            state.events.schedule(next_time, POTION, None)
     else:
-        state.queue.put((state.time, state.next_id(), "GCD", False))
+        state.events.schedule(state.time, GCD, False)
 
 
 # -------------------------
@@ -1466,40 +1855,47 @@ def _handle_potion(state, payload):
 # -------------------------
 def _run_single_fight(**kwargs):
     state = FightState(**kwargs)
-
+    _simulate_fight(state)
+    return _fight_results(state)
+
+# Event handlers indexed by event code (simulator.events.EVENT_KINDS)
+EVENT_HANDLERS = [None] * len(EVENT_KINDS)
+EVENT_HANDLERS[MH_SWING] = _handle_mh_swing
+EVENT_HANDLERS[OH_SWING] = _handle_oh_swing
+EVENT_HANDLERS[GCD] = _handle_gcd
+EVENT_HANDLERS[TANK_DUMMY] = _handle_tank_dummy
+EVENT_HANDLERS[POTION] = _handle_potion
+EVENT_HANDLERS[EXTRA_ATTACK] = _handle_extra_attack
+
+def _simulate_fight(state):
     # Schedule first events
-    state.queue.put((0, state.next_id(), "MH_SWING", False))
+    state.events.schedule(0, MH_SWING, False)
     state.next_mh_swing = 0.0
-    state.queue.put((0.1, state.next_id(), "GCD", False))
+    state.events.schedule(0.1, GCD, False)
     if state.tank_dummy:
-        state.queue.put((0.05, state.next_id(), "Tank_dummy", False))
+        state.events.schedule(0.05, TANK_DUMMY, False)
         state.next_tank_dummy = 0.05
 
     # Schedule Potion
-    pot_time = getattr(state, "mighty_rage_potion_time", -1.0)
+    pot_time = state.mighty_rage_potion_time
     if pot_time >= 0:
-        state.queue.put((pot_time, state.next_id(), "POTION", None))
+        state.events.schedule(pot_time, POTION, None)
 
     if state.dual_wield:
-        state.queue.put((0.18, state.next_id(), "OH_SWING", False))
+        state.events.schedule(0.18, OH_SWING, False)
         state.next_oh_swing = 0.18
     
-    event_handlers = {
-        "MH_SWING": _handle_mh_swing,
-        "OH_SWING": _handle_oh_swing,
-        "Extra_Attack": _handle_extra_attack,
-        "GCD": _handle_gcd,
-        "Tank_dummy": _handle_tank_dummy,
-        "POTION": _handle_potion,
-    }
-
-    while not state.queue.empty():
-        time, _, event, payload = state.queue.get()
+    handlers = EVENT_HANDLERS
+    events = state.events
+    processed = 0
+    while events:
+        time, _, event, payload = events.pop()
 
         if time > state.fight_length:
             break
 
         state.time = time
+        processed += 1
 
         # --- Universal Updates ---
         active_mods = state.onhit_buffs.update(time)
@@ -1513,10 +1909,6 @@ def _run_single_fight(**kwargs):
         state.death_wish.update(time)
         state.last_event_time = time
 
-        # Apply deep wounds and dots damage
-        state.deep_wounds.update(time)
-        state.rend_bleed.update(time)
-
         #Bloodlust
         if time >= state.bloodlust_time and time >= state.bloodlust.next_available:
             state.bloodlust.trigger(time)
@@ -1529,79 +1921,23 @@ def _run_single_fight(**kwargs):
         state.bloodfury.update(time)
 
 
-       # STR -> AP convertion with buffs before event
-        state.crit = state.base_crit
-        state.crit += active_mods.get("crit", 0.0)
-        state.armor_penetration = state.base_armor_penetration + active_mods.get("arpen", 0.0)
-        
-        current_strength = state.strength
-        if state.kings and state.str_earth:
-            current_strength = (state.strength + 88) * 1.1
-            state.crit += ((state.agility + 88) * 1.1 / 20 / 100)
-        elif state.kings:
-            current_strength = state.strength * 1.1
-            state.crit += (state.agility / 20 / 100)
-        elif state.str_earth:
-            current_strength = state.strength + 88 * 1.2
-            state.crit += ((state.agility + 88) / 20 / 100)
-        else:
-            state.crit += (state.agility / 20 / 100)
-
-        current_strength += active_mods.get("strength", 0)
-        state.current_total_ap = state.total_ap + current_strength * 2 + active_mods.get("ap", 0)
-
-        if state.bloodfury.active:
-             state.current_total_ap += state.bloodfury.get_bonus_ap()
-        if state.shamanistic_rage: state.current_total_ap *= 1.1
-
-        #Calc haste before event
-        proced_haste = state.haste + active_mods.get("haste", 0)
-        state.current_haste = (state.FLURRY_MULT if state.flurry_hits_remaining > 0 else 1.0) * proced_haste * state.wf
-        if getattr(state, "swift_retribution", False):
-            state.current_haste *= 1.03
-        if getattr(state, "battle_squawk", False):
-            state.current_haste *= 1.05
-        state.current_haste *= (1 + state.bloodlust.get_bonus_haste())
-
-        # Mh base dmg each start for wounds calc
-        state.mh_base_avg = ((state.min_dmg + state.max_dmg)/2 + state.current_total_ap / 14 * state.mh_speed) * state.multi / state.PVE_PWR
-        if state.trauma: state.mh_base_avg *= 1.3
-        state.oh_base_avg = ((state.oh_min_dmg + state.oh_max_dmg)/2 + state.current_total_ap / 14 * state.oh_speed) * state.multi_oh / state.PVE_PWR
-        if state.trauma: state.oh_base_avg *= 1.3
-
-        # -------------------------
-        # Set Damage Multi on each event
-        # -------------------------
-        state.multi = state.base_multi
-        if state.enrage.active:
-            state.multi *= state.enrage_multi
-        if state.death_wish.active:
-            state.multi *= 1.20
-        state.multi *= state.PVE_PWR
-        state.multi *= state.SMF
-        if getattr(state, "tg", False):
-            state.multi *= 0.954
-        state.multi *= getattr(state, "ferocious_inspiration", 1.0)
-        state.multi *= getattr(state, "blood_frenzy", 1.0)
-        if getattr(state, "heavy_weight", False):
-            state.multi *= 1.06
-        if getattr(state, "titans_fury", False) and state.time < state.titans_fury_dmg_buff_end_time:
-            state.multi *= 1.05
-        state.multi_oh = state.multi
-        state.multi_oh *= 0.5 * state.impwield * state.ambidextrous.get_multiplier()
-    
+        _refresh_derived_stats(state, active_mods)
 
-        handler = event_handlers.get(event)
-        if handler:
-            handler(state, payload)
+        handlers[event](state, payload)
 
+    return processed
 
+def _fight_results(state):
     # -------------------------
     # Final averages
     # -------------------------
     state.onhit_buffs.update(state.fight_length)
-    avg_MH_dmg = state.white_MH_damage / max(state.attack_counts["MH"], 1)
-    avg_OH_dmg = state.white_OH_damage / max(state.attack_counts["OH"], 1)
+
+    # Settle dots up to the last event
+    state.deep_wounds.settle(state.time)
+    state.rend_bleed.settle(state.time)
+    avg_MH_dmg = state.white_MH_damage / max(state.counts[ATK_MH + HITS], 1)
+    avg_OH_dmg = state.white_OH_damage / max(state.counts[ATK_OH + HITS], 1)
 
     # -------------------------
     # Last update for all buffs 
@@ -1628,17 +1964,7 @@ def _run_single_fight(**kwargs):
         "DR_dps": state.DR_damage / state.fight_length,
         "RB_dps": state.RB_damage / state.fight_length,
         "Ambi_dps": state.total_ambi / state.fight_length,
-        "all_attack_counts": [
-            {
-                atk: {
-                    "hits": state.attack_counts[atk],
-                    "crits": state.crit_counts[f"{atk}_CRIT"],
-                    "misses": state.miss_counts[f"{atk}_MISS"],
-                    "dodges": state.dodge_counts[f"{atk}_DODGE"]
-                }
-                for atk in state.attack_counts
-            }
-        ],
+        "attack_counts": state.counts,
         "flurry_uptime": state.flurry_time / state.fight_length,
         "enrage_uptime": state.enrage.total_uptime / state.fight_length,
         "total_dps": (state.total_damage + state.deep_wounds.total_damage + state.rend_bleed.total_damage) / state.fight_length,
@@ -1658,21 +1984,21 @@ def _run_single_fight(**kwargs):
 # Swing, Slam resolution
 # -------------------------
 def _resolve_swing_damage(min_dmg, max_dmg, current_total_ap, armor, armor_penetration,
-                   base_speed, mob_level, multi=1.0, outcome="HIT"):
+                   base_speed, mob_level, multi=1.0, outcome=HIT, roll=random.random):
     
-    base_damage = random.randint(int(min_dmg), int(max_dmg)) + current_total_ap  / 14 * base_speed
+    base_damage = randint(roll, int(min_dmg), int(max_dmg)) + current_total_ap  / 14 * base_speed
     DR = _calc_dr(armor, armor_penetration, mob_level)
 
     dmg = 0.0
     was_crit = 0
     was_miss = 0
 
-    if outcome == "MISS" or outcome == "DODGE":
+    if outcome in AVOIDED:
         dmg = 0.0
         was_miss = 1
-    elif outcome == "GLANCE":
+    elif outcome == GLANCE:
         dmg = base_damage * 0.75 * (1 - DR)
-    elif outcome == "CRIT":
+    elif outcome == CRIT:
         dmg = base_damage * 2 * (1 - DR)
         was_crit = 1
     else:
@@ -1682,22 +2008,23 @@ def _resolve_swing_damage(min_dmg, max_dmg, current_total_ap, armor, armor_penet
     return dmg, was_crit, was_miss
 
 def _resolve_slam_damage(min_dmg, max_dmg, current_total_ap, armor, armor_penetration, base_speed,oh=False,
-                  mob_level=63, multi=1.0, power_slam=False, outcome="HIT"):
+                  mob_level=63, multi=1.0, power_slam=False, outcome=HIT, roll=random.random, talent_roll=random.random):
     """
     Resolves a slam, returns (damage, crit_flag, proc_flag)
+    roll draws the weapon damage, talent_roll the Power Slam proc.
     """
-    is_crit = (outcome == "CRIT")
+    is_crit = (outcome == CRIT)
     
     if oh:
-        base_damage = random.randint(int(min_dmg), int(max_dmg)) + 78 + current_total_ap / 14 * base_speed
+        base_damage = randint(roll, int(min_dmg), int(max_dmg)) + 78 + current_total_ap / 14 * base_speed
     else:
-        base_damage = random.randint(int(min_dmg), int(max_dmg)) + 87 + current_total_ap / 14 * base_speed
+        base_damage = randint(roll, int(min_dmg), int(max_dmg)) + 87 + current_total_ap / 14 * base_speed
 
     DR = _calc_dr(armor, armor_penetration, mob_level)
     # Slam proc: 50% chance per slam
-    proc_flag = power_slam and (random.random() < 0.5)
+    proc_flag = power_slam and (talent_roll() < 0.5)
 
-    if outcome in ["MISS", "DODGE"]:
+    if outcome in AVOIDED:
         dmg = 0.0
     elif is_crit:
         dmg = base_damage * 2.2 * (1 - DR)
@@ -1720,126 +2047,141 @@ def _generate_rage_classic(damage, weapon_speed, offhand=False, is_crit=False):
     max_rage = (15 * damage) / c
     if damage == 0:
         return 0.0
-    #weapon = "OH" if offhand else "MH"
-    #crit_str = "CRIT" if is_crit else "hit"
-    #(f"print{weapon} {crit_str}: dmg={damage:.1f}, generated_rage={rage:.2f}")
     return min(rage, max_rage)
 
 
 # -------------------------
 # Handle on hit procs
 # ------------------------
-def trigger_extra_mh_swing(queue, time, next_id):
-    queue.put((time, next_id(), "MH_SWING", True))
+def trigger_extra_mh_swing(events, time):
+    events.schedule(time, MH_SWING, True)
 
 
 # -------------------------
 # Worker function
 # ------------------------
-def _worker(args):
-    iterations_chunk, seed, kwargs = args
-    random.seed(seed)
-
-    results_total = []
-    results_white_MH = []
-    results_white_OH = []
-    results_slam_MH = []
-    results_slam_OH = []
-    results_BT = []
-    results_WW = []
-    results_DR = []
-    results_RB = []
-    results_hs = []
-    results_cleave = []
-    results_ambi = []
-    result_proc_dmg = []
-    results_avg_MH_dmg = []
-    results_avg_OH_dmg = []
-    results_deep_wounds_dps = []
-    results_rend = []
-    flurry_uptime_total = 0.0
-    enrage_uptime_total = 0.0
-    crusader_uptime_total = 0.0
-    crusader_oh_uptime_total = 0.0
-    Empyrian_Demolisher_uptime_total = 0.0
-    bonereavers_uptime_total = 0.0
-    eternal_flame_uptime_total = 0.0
-    death_wish_uptime_total = 0.0
-    all_attack_counts = []
-
-    for _ in range(iterations_chunk):
-        fight = _run_single_fight(**kwargs)
-
-        results_total.append(fight["total_dps"])
-        results_white_MH.append(fight["white_MH_dps"])
-        results_white_OH.append(fight["white_OH_dps"])
-        results_slam_MH.append(fight["slam_MH_dps"])
-        results_slam_OH.append(fight["slam_OH_dps"])
-        results_BT.append(fight["BT_dps"])
-        results_WW.append(fight["WW_dps"])
-        results_DR.append(fight["DR_dps"])
-        results_RB.append(fight["RB_dps"])
-        results_hs.append(fight["hs_dps"])
-        results_cleave.append(fight["cleave_dps"])
-        results_ambi.append(fight["Ambi_dps"])
-        result_proc_dmg.append(fight["Proc_dmg_dps"])
-        results_avg_MH_dmg.append(fight["avg_MH_dmg"])
-        results_avg_OH_dmg.append(fight["avg_OH_dmg"])
-        results_deep_wounds_dps.append(fight["deep_wounds_dps"])
-        results_rend.append(fight["Rend_dps"])
-
-        flurry_uptime_total += fight["flurry_uptime"]
-        enrage_uptime_total += fight["enrage_uptime"]
-        crusader_uptime_total += fight["crusader_uptime"]
-        crusader_oh_uptime_total += fight["crusader_oh_uptime"]
-        Empyrian_Demolisher_uptime_total += fight["Empyrian_Demolisher_uptime"]
-        bonereavers_uptime_total += fight["bonereavers_uptime"]
-        eternal_flame_uptime_total += fight["eternal_flame_uptime"]
-        death_wish_uptime_total += fight["death_wish_uptime"]
-        all_attack_counts.append(fight["all_attack_counts"][0])
+# Per-fight metrics the workers summarize:
+# _fight_results field -> (raw vector key, histogram bin width)
+RESULT_METRICS = {
+    "total_dps": ("results_total", 5.0),
+    "white_MH_dps": ("results_white_MH", 5.0),
+    "white_OH_dps": ("results_white_OH", 5.0),
+    "slam_MH_dps": ("results_slam_MH", 5.0),
+    "slam_OH_dps": ("results_slam_OH", 5.0),
+    "BT_dps": ("results_BT", 5.0),
+    "WW_dps": ("results_WW", 5.0),
+    "DR_dps": ("results_DR", 5.0),
+    "RB_dps": ("results_RB", 5.0),
+    "hs_dps": ("results_hs", 5.0),
+    "cleave_dps": ("results_cleave", 5.0),
+    "Ambi_dps": ("results_ambi", 5.0),
+    "Proc_dmg_dps": ("result_proc_dmg", 5.0),
+    "avg_MH_dmg": ("results_avg_MH_dmg", 5.0),
+    "avg_OH_dmg": ("results_avg_OH_dmg", 5.0),
+    "deep_wounds_dps": ("results_deep_wounds_dps", 5.0),
+    "Rend_dps": ("results_rend", 5.0),
+    "flurry_uptime": ("results_flurry_uptime", 0.01),
+    "enrage_uptime": ("results_enrage_uptime", 0.01),
+    "crusader_uptime": ("results_crusader_uptime", 0.01),
+    "crusader_oh_uptime": ("results_crusader_oh_uptime", 0.01),
+    "Empyrian_Demolisher_uptime": ("results_Empyrian_Demolisher_uptime", 0.01),
+    "bonereavers_uptime": ("results_bonereavers_uptime", 0.01),
+    "eternal_flame_uptime": ("results_eternal_flame_uptime", 0.01),
+    "death_wish_uptime": ("results_death_wish_uptime", 0.01),
+}
 
-    return {
-        "results_total": results_total,
-        "results_white_MH": results_white_MH,
-        "results_white_OH": results_white_OH,
-        "results_slam_MH": results_slam_MH,
-        "results_slam_OH": results_slam_OH,
-        "results_BT": results_BT,
-        "results_WW": results_WW,
-        "results_DR": results_DR,
-        "results_RB": results_RB,
-        "results_hs": results_hs,
-        "results_cleave": results_cleave,
-        "results_ambi": results_ambi,
-        "result_proc_dmg": result_proc_dmg,
-        "results_avg_MH_dmg": results_avg_MH_dmg,
-        "results_avg_OH_dmg": results_avg_OH_dmg,
-        "results_deep_wounds_dps": results_deep_wounds_dps,
-        "results_rend": results_rend,
-        "flurry_uptime_total": flurry_uptime_total,
-        "enrage_uptime_total": enrage_uptime_total,
-        "crusader_uptime_total": crusader_uptime_total,
-        "crusader_oh_uptime_total": crusader_oh_uptime_total,
-        "Empyrian_Demolisher_uptime_total": Empyrian_Demolisher_uptime_total,
-        "bonereavers_uptime_total": bonereavers_uptime_total,
-        "eternal_flame_uptime_total": eternal_flame_uptime_total,
-        "death_wish_uptime_total": death_wish_uptime_total,
-        "all_attack_counts": all_attack_counts,
-        "iterations_chunk": iterations_chunk
+
+# Keys of the per-fight vectors in a raw result
+RAW_KEYS = tuple(key for key, _ in RESULT_METRICS.values()) + ("all_attack_counts",)
+
+
+def new_chunk(raw=False):
+    """
+    Empty worker result: a RunningStats per RESULT_METRICS field, summed
+    attack counters with a per-fight RunningStats for each and, with raw,
+    the per-fight vectors as typed arrays (one array('d') per metric,
+    attack counters flattened into one array('q')).
+    """
+    chunk = {
+        "iterations_chunk": 0,
+        "stats": {field: RunningStats(width) for field, (_, width) in RESULT_METRICS.items()},
+        "attack_counts_total": [0] * COUNTS_SIZE,
+        "count_stats": [RunningStats(1.0) for _ in range(COUNTS_SIZE)],
+        "raw": None,
     }
+    if raw:
+        chunk["raw"] = {key: array("d") for key, _ in RESULT_METRICS.values()}
+        chunk["raw"]["all_attack_counts"] = array("q")
+    return chunk
+
+
+def merge_chunks(chunks, raw=False):
+    """Fold worker results into one new_chunk()."""
+    merged = new_chunk(raw)
+    stats = merged["stats"]
+    for chunk in chunks:
+        merged["iterations_chunk"] += chunk["iterations_chunk"]
+        for field, summary in chunk["stats"].items():
+            stats[field].merge(summary)
+        merged["attack_counts_total"] = list(map(add, merged["attack_counts_total"], chunk["attack_counts_total"]))
+        for summary, other in zip(merged["count_stats"], chunk["count_stats"]):
+            summary.merge(other)
+        if raw and chunk["raw"] is not None:
+            for key, values in chunk["raw"].items():
+                merged["raw"][key].extend(values)
+    return merged
+
+
+def _worker(args):
+    """
+    Simulate fights first .. first + iterations_chunk - 1 of the run seeded
+    with `seed`; args are (first, iterations_chunk, seed, fight_kwargs, raw).
+    Fight i draws from its own fight_seed(seed, i) stream, so a fight's
+    result doesn't depend on which chunk it lands in.
+    """
+    first, iterations_chunk, seed, kwargs, raw = args
+    substreams = kwargs.get("rng_substreams", False)
+
+    chunk = new_chunk(raw)
+    stats = chunk["stats"]
+    pushes = [(field, stats[field].add) for field in RESULT_METRICS]
+    raw_values = chunk["raw"]
+    if raw:
+        raw_pushes = [(field, raw_values[key].append) for field, (key, _) in RESULT_METRICS.items()]
+    # Counters are buffered flat and summarized once per chunk
+    all_counts = raw_values["all_attack_counts"] if raw else array("q")
+
+    for index in range(first, first + iterations_chunk):
+        rolls = RandomPool(fight_seed(seed, index), substreams, FIGHT_BLOCK_SIZE)
+        fight = _run_single_fight(rolls=rolls, **kwargs)
+        for field, push in pushes:
+            push(fight[field])
+        all_counts.extend(fight["attack_counts"])
+        if raw:
+            for field, push in raw_pushes:
+                push(fight[field])
+
+    for i in range(COUNTS_SIZE):
+        column = all_counts[i::COUNTS_SIZE]
+        chunk["attack_counts_total"][i] = sum(column)
+        chunk["count_stats"][i] = RunningStats.from_values(column, 1.0)
+    chunk["iterations_chunk"] = iterations_chunk
+    return chunk
 
 # -------------------------
-# Multiprocess-ready run_simulation
+# Fight configuration
 # -------------------------
-def run_simulation(iterations=1000, mh_speed=2.6, oh_speed=2.7,
-                   fight_length=60.0, stats=None, ability_priority=None,
-                   dual_wield=True, battering_ram=True, ambi_ME=True, skull_cracker=True, tank_dummy=False,
-                   kings=False, str_earth=False, shamanistic_rage=False, outrage=False,
-                   bashguuder=False, faeri=False, sunders=False, icon=False, trauma=False, HoJ=False, maelstrom=False, eternal_flame=False,
-                   multi=1.0, BT_COST=30.0, slam_COST=15.0, ww_COST=25.0, HS_COST=15.0, smf=False, tg=False,
-                   ferocious_inspiration=False, retri_crit=False, starting_rage=50.0, dragon_roar=False, RB_COST=20.0, num_targets=1, use_cleave=False,
-                   dragon_warrior=False, raging_blow=False, heavy_weight=False, power_slam=False, bloodthirsty=False, raging_onslaught=False, here_comes_the_big_one=False, titans_fury=False, cleaving_slam=False, gcd_delay=0.0,
-                   swift_retribution=False, battle_squawk=False, mark_of_the_wild=False, blood_frenzy=False):
+def build_fight_kwargs(mh_speed=2.6, oh_speed=2.7,
+                       fight_length=60.0, stats=None, ability_priority=None,
+                       dual_wield=True, battering_ram=True, ambi_ME=True, skull_cracker=True, tank_dummy=False,
+                       kings=False, str_earth=False, shamanistic_rage=False, outrage=False,
+                       bashguuder=False, faeri=False, sunders=False, icon=False, trauma=False, HoJ=False, maelstrom=False, eternal_flame=False,
+                       multi=1.0, BT_COST=30.0, slam_COST=15.0, ww_COST=25.0, HS_COST=15.0, smf=False, tg=False,
+                       ferocious_inspiration=False, retri_crit=False, starting_rage=50.0, dragon_roar=False, RB_COST=20.0, num_targets=1, use_cleave=False,
+                       dragon_warrior=False, raging_blow=False, heavy_weight=False, power_slam=False, bloodthirsty=False, raging_onslaught=False, here_comes_the_big_one=False, titans_fury=False, cleaving_slam=False, gcd_delay=0.0,
+                       swift_retribution=False, battle_squawk=False, mark_of_the_wild=False, blood_frenzy=False,
+                       event_engine="heap", rage_watch=True, proc_sampling="bernoulli", engine="scalar",
+                       rng_substreams=False):
 
     if stats is None:
         stats = {}
@@ -1964,105 +2306,258 @@ def run_simulation(iterations=1000, mh_speed=2.6, oh_speed=2.7,
         "swift_retribution": swift_retribution,
         "battle_squawk": battle_squawk,
         "blood_frenzy": 1.04 if blood_frenzy else 1.0,
+        "event_engine": event_engine,
+        "rage_watch_enabled": rage_watch,
+        "proc_sampling": proc_sampling,
+        "engine": engine,
+        "rng_substreams": rng_substreams,
     }
+    return fight_kwargs
 
-    # Multiprocessing setup
-    num_processes = mp.cpu_count()
-    iterations_per_process = ceil(iterations / num_processes)
-    seeds = [random.randint(0, 1_000_000) for _ in range(num_processes)]
-    args_list = [(iterations_per_process, seeds[i], fight_kwargs) for i in range(num_processes)]
-
-    # Run multiprocessing
-    with mp.Pool(num_processes) as pool:
-        chunk_results = pool.map(_worker, args_list)
-
-    # Combine results
-    final_results = {
-        "results_total": [],
-        "results_white_MH": [],
-        "results_white_OH": [],
-        "results_slam_MH": [],
-        "results_slam_OH": [],
-        "results_BT": [],
-        "results_WW": [],
-        "results_DR": [],
-        "results_RB": [],
-        "results_hs": [],
-        "results_cleave": [],
-        "results_ambi": [],
-        "result_proc_dmg": [],
-        "results_avg_MH_dmg": [],
-        "results_avg_OH_dmg": [],
-        "results_deep_wounds_dps": [],
-        "results_rend": [],
-        "flurry_uptime_total": 0.0,
-        "enrage_uptime_total": 0.0,
-        "crusader_uptime_total": 0.0,
-        "crusader_oh_uptime_total": 0.0,
-        "Empyrian_Demolisher_uptime_total": 0.0,
-        "bonereavers_uptime_total": 0.0,
-        "eternal_flame_uptime_total": 0.0,
-        "death_wish_uptime_total": 0.0,
-        "all_attack_counts": [],
-        "iterations_total": 0
+# -------------------------
+# Multiprocess-ready run_simulation
+# -------------------------
+def run_simulation(iterations=1000, raw=False, pool=None, processes=None, chunk_size=None, seed=None,
+                   target_ci=None, confidence=0.95, max_iterations=1_000_000, progress=None, cancel=None,
+                   cache=None, resume=None, **config):
+    """
+    Simulate `iterations` fights across all cores.
+    `config` takes the same keyword options as build_fight_kwargs.
+
+    Workers send back summaries, not per-fight values: "stats" maps every
+    RESULT_METRICS field to a RunningStats (mean, variance, min/max,
+    histogram) and the mean_* / avg_* keys are read off those.
+    "attack_counts" is the attack_count_summary table. With raw=True the
+    per-fight vectors come back too, as typed arrays under their results_*
+    keys, with all_attack_counts flattened (COUNTS_SIZE entries per fight,
+    see fight_attack_counts).
+
+    Exactly `iterations` fights are run, handed out to the workers in
+    chunks of chunk_size fights (tuned from the measured fights/s when
+    None; see SimulationPool.run). Pass a SimulationPool to reuse its
+    workers across calls; without one the call starts and shuts down its
+    own with `processes` workers (all cores by default).
+
+    `seed` is the master seed (drawn from the global random module when
+    None, and returned under "seed"). Fight i always uses the stream
+    fight_seed(seed, i) and the sums are exact, so the same seed and
+    iterations give bit-identical results on any number of workers and
+    under any chunk_size.
+
+    With target_ci (in DPS) the run goes until the `confidence` interval
+    of mean_total_dps is at most target_ci either side, or max_iterations
+    fights have run. `iterations` is then the first round; later rounds
+    are sized from the variance seen so far. Fights keep their indices
+    across rounds, so the result is the same as a fixed run of the
+    iterations it ended up using. "ci_half_width", "target_met" and
+    "rounds" are added to the result; "stderr" (of mean_total_dps) is
+    always there.
+
+    progress(info) is called as chunks finish, with info = {"done",
+    "total", "fights_per_sec", "mean_total_dps", "ci_half_width"} ("total"
+    being the fights planned so far; the CI is at `confidence`). `cancel`
+    is a threading.Event or anything with is_set(): once it is set, no more
+    chunks start and the fights finished so far are returned. "cancelled"
+    says whether the run fell short because of it (fewer fights than asked
+    for, or a precision run stopped before its target); a cancel that comes
+    after the last chunk leaves a complete result, which is cached as usual.
+
+    With a ResultCache and an explicit seed, a run already in the cache
+    (same fight_kwargs, iterations, seed, precision target and engine; see
+    simulator.cache) is returned from it with "cached" set, and a finished
+    run is stored there. Unseeded runs bypass the cache.
+
+    resume tops up an earlier result of the same config and seed (fixed
+    iteration count, not cancelled; with raw=True it needs its vectors):
+    only fights resume["iterations"] .. iterations - 1 are simulated and
+    merged into its accumulators, which gives exactly the result of a
+    fresh run of `iterations`; "resumed" is the number of fights reused
+    (0 for a run from scratch). With a cache, a miss on a fixed-iteration
+    run tops up the largest smaller run of the same config and seed in
+    the cache, if there is one.
+    """
+    fight_kwargs = build_fight_kwargs(**config)
+
+    key = None
+    if cache is not None and seed is not None:
+        target = (target_ci, confidence, max_iterations) if target_ci is not None else None
+        key = result_key(fight_kwargs, iterations, seed, target)
+        result = cache.get(key, raw)
+        if result is not None:
+            result["cached"] = True
+            return result
+
+    if seed is None:
+        seed = random.getrandbits(64)
+    lineage = result_key(fight_kwargs, None, seed)
+
+    worker = _worker
+    granularity = 1
+    if fight_kwargs["engine"] == "batch":
+        # NumPy lockstep engine; falls back to _worker for what it can't simulate
+        from simulator.batch import batch_worker as worker, batch_granularity
+        granularity = batch_granularity(fight_kwargs)
+
+    if key is not None and resume is None and target_ci is None:
+        resume = cache.latest(lineage, iterations, raw, granularity)
+    base = None
+    if resume is not None:
+        base = _resume_chunk(resume, lineage, iterations, raw, granularity, target_ci)
+    start = base["iterations_chunk"] if base is not None else 0
+
+    on_chunk = _progress_hook(progress, confidence, base) if progress is not None else None
+    own_pool = pool is None
+    if own_pool:
+        pool = SimulationPool(processes)
+    try:
+        if target_ci is None:
+            chunks = pool.run(worker, fight_kwargs, iterations - start, seed, raw, chunk_size, granularity,
+                              first=start, on_chunk=on_chunk, cancel=cancel)
+            merged = merge_chunks(([base] if base is not None else []) + chunks, raw)
+            # A cancel that comes after the last chunk doesn't make the run any shorter
+            cancelled = merged["iterations_chunk"] < iterations
+        else:
+            merged, rounds, half_width, cancelled = _run_to_precision(pool, worker, fight_kwargs, iterations, seed, raw,
+                                                                      chunk_size, granularity, target_ci, confidence,
+                                                                      max_iterations, on_chunk, cancel)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    result = _summarize(merged)
+    result["seed"] = seed
+    result["lineage"] = lineage
+    result["resumed"] = start
+    result["cancelled"] = cancelled
+    result["cached"] = False
+    if target_ci is not None:
+        result["ci_half_width"] = half_width
+        result["target_met"] = half_width <= target_ci
+        result["rounds"] = rounds
+    if key is not None and not result["cancelled"]:
+        cache.put(key, result, RAW_KEYS if raw else (), lineage if target_ci is None else None)
+    return result
+
+
+def _resume_chunk(resume, lineage, iterations, raw, granularity, target_ci):
+    """A merged chunk holding the accumulators of `resume`, checked for topping up to `iterations`."""
+    if target_ci is not None:
+        raise ValueError("resume needs a fixed iteration count, not a target_ci run")
+    if resume.get("lineage") != lineage:
+        raise ValueError("resume is a run of a different configuration, seed or engine")
+    if resume["cancelled"] or "ci_half_width" in resume:
+        raise ValueError("resume must be a complete fixed-iteration run")
+    done = resume["iterations"]
+    if done > iterations:
+        raise ValueError(f"resume already has {done} fights, more than the {iterations} asked for")
+    if done % granularity and done != iterations:
+        raise ValueError(f"the batch engine can only top up runs of a multiple of {granularity} fights")
+    if raw and "all_attack_counts" not in resume:
+        raise ValueError("raw=True needs a resume result with its per-fight vectors")
+    base = {
+        "iterations_chunk": done,
+        "stats": resume["stats"],
+        "attack_counts_total": resume["attack_counts_total"],
+        "count_stats": resume["count_stats"],
+        "raw": {k: resume[k] for k in RAW_KEYS} if raw else None,
     }
-
-    for chunk in chunk_results:
-        for key in ["results_total", "results_white_MH", "results_white_OH", "results_slam_MH",
-                    "results_slam_OH", "results_BT", "results_WW", "results_RB", "results_hs", "results_ambi",
-                    "results_DR", "result_proc_dmg", "results_avg_MH_dmg", "results_avg_OH_dmg", "results_cleave",
-                    "results_deep_wounds_dps", "results_rend"]:
-            final_results[key].extend(chunk[key])
-        final_results["flurry_uptime_total"] += chunk["flurry_uptime_total"]
-        final_results["enrage_uptime_total"] += chunk["enrage_uptime_total"]
-        final_results["crusader_uptime_total"] += chunk["crusader_uptime_total"]
-        final_results["crusader_oh_uptime_total"] += chunk["crusader_oh_uptime_total"]
-        final_results["Empyrian_Demolisher_uptime_total"] += chunk["Empyrian_Demolisher_uptime_total"]
-        final_results["bonereavers_uptime_total"] += chunk["bonereavers_uptime_total"]
-        final_results["eternal_flame_uptime_total"] += chunk["eternal_flame_uptime_total"]
-        final_results["death_wish_uptime_total"] += chunk["death_wish_uptime_total"]
-        final_results["all_attack_counts"].extend(chunk["all_attack_counts"])
-        final_results["iterations_total"] += chunk["iterations_chunk"]
-
-    # Compute averages
-    iters = final_results["iterations_total"]
-    return {
-        "mean_total_dps": sum(final_results["results_total"])/iters,
-        "mean_white_MH_dps": sum(final_results["results_white_MH"])/iters,
-        "mean_white_OH_dps": sum(final_results["results_white_OH"])/iters,
-        "mean_slam_MH_dps": sum(final_results["results_slam_MH"])/iters,
-        "mean_slam_OH_dps": sum(final_results["results_slam_OH"])/iters,
-        "mean_BT_dps": sum(final_results["results_BT"])/iters,
-        "mean_WW_dps": sum(final_results["results_WW"])/iters,
-        "mean_DR_dps": sum(final_results["results_DR"])/iters,
-        "mean_RB_dps": sum(final_results["results_RB"])/iters,
-        "mean_hs_dps": sum(final_results["results_hs"])/iters,
-        "mean_cleave_dps": sum(final_results["results_cleave"])/iters,
-        "mean_ambi_dps": sum(final_results["results_ambi"])/iters,
-        "mean_proc_dmg_dps": sum(final_results["result_proc_dmg"])/iters,
-        "results_total": final_results["results_total"],
-        "results_white_MH": final_results["results_white_MH"],
-        "results_white_OH": final_results["results_white_OH"],
-        "results_slam_MH": final_results["results_slam_MH"],
-        "results_slam_OH": final_results["results_slam_OH"],
-        "results_WW": final_results["results_WW"],
-        "results_DR": final_results["results_DR"],
-        "results_RB": final_results["results_RB"],
-        "results_BT": final_results["results_BT"],
-        "results_hs": final_results["results_hs"],
-        "results_cleave": final_results["results_cleave"],
-        "results_ambi": final_results["results_ambi"],
-        "avg_flurry_uptime": final_results["flurry_uptime_total"]/iters,
-        "avg_enrage_uptime": final_results["enrage_uptime_total"]/iters,
-        "mean_avg_MH_dmg": sum(final_results["results_avg_MH_dmg"])/iters,
-        "mean_avg_OH_dmg": sum(final_results["results_avg_OH_dmg"])/iters,
-        "Deep Wounds DPS": sum(final_results["results_deep_wounds_dps"])/iters,
-        "avg_crusader_uptime": final_results["crusader_uptime_total"]/iters,
-        "avg_crusader_oh_uptime": final_results["crusader_oh_uptime_total"]/iters,
-        "avg_Empyrian_Demolisher_uptime": final_results["Empyrian_Demolisher_uptime_total"]/iters,
-        "avg_bonereavers_uptime": final_results["bonereavers_uptime_total"]/iters,
-        "avg_eternal_flame_uptime": final_results["eternal_flame_uptime_total"]/iters,
-        "all_attack_counts": final_results["all_attack_counts"],
-        "avg_death_wish_uptime": final_results["death_wish_uptime_total"]/iters,
-        "mean_Rend_dps": sum(final_results["results_rend"])/iters
+    # merge_chunks copies into a fresh chunk, so the resumed result itself is left alone
+    return merge_chunks([base], raw)
+
+
+def _progress_hook(progress, confidence, base=None):
+    """SimulationPool.run on_chunk callback feeding progress() a running summary of total DPS."""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    total = RunningStats(RESULT_METRICS["total_dps"][1])
+    if base is not None:
+        total.merge(base["stats"]["total_dps"])
+    resumed = total.count
+    start = time.perf_counter()
+
+    def on_chunk(chunk, end):
+        total.merge(chunk["stats"]["total_dps"])
+        elapsed = time.perf_counter() - start
+        rate = (total.count - resumed) / elapsed if elapsed else 0.0
+        progress({"done": total.count, "total": end, "fights_per_sec": rate,
+                  "mean_total_dps": total.mean, "ci_half_width": z * total.stderr})
+    return on_chunk
+
+
+def _run_to_precision(pool, worker, fight_kwargs, iterations, seed, raw, chunk_size, granularity,
+                      target_ci, confidence, max_iterations, on_chunk=None, cancel=None):
+    """
+    Rounds of fights until the CI of the mean total DPS is narrow enough;
+    returns (merged chunk, rounds, CI half-width, cancelled), cancelled
+    being whether a cancel cut a round short or stopped the run before it
+    reached target_ci or max_iterations.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    merged = new_chunk(raw)
+    done = rounds = 0
+    half_width = INF
+    cancelled = False
+    size = max(iterations, 2)
+    while done < max_iterations:
+        # Rounds start on block boundaries, like chunks (see batch_granularity)
+        size = min(-(-size // granularity) * granularity, max_iterations - done)
+        chunks = pool.run(worker, fight_kwargs, size, seed, raw, chunk_size, granularity, first=done,
+                          on_chunk=on_chunk, cancel=cancel)
+        merged = merge_chunks([merged] + chunks, raw)
+        rounds += 1
+        total = merged["stats"]["total_dps"]
+        half_width = z * total.stderr
+        if merged["iterations_chunk"] < done + size:
+            cancelled = True  # round cut short
+            break
+        done += size
+        if half_width <= target_ci:
+            break
+        if cancel is not None and cancel.is_set() and done < max_iterations:
+            cancelled = True
+            break
+        # Fights the current std says are needed, with a little margin for its noise;
+        # at least a tenth more per round so a bad estimate can't stall the run
+        needed = ceil(1.05 * (z * total.std / target_ci) ** 2)
+        size = max(needed - done, ceil(done / 10))
+    return merged, rounds, half_width, cancelled
+
+
+def _summarize(merged):
+    """run_simulation's result dict from a merged chunk."""
+    stats = merged["stats"]
+    result = {
+        "iterations": merged["iterations_chunk"],
+        "stats": stats,
+        "stderr": stats["total_dps"].stderr,
+        "mean_total_dps": stats["total_dps"].mean,
+        "mean_white_MH_dps": stats["white_MH_dps"].mean,
+        "mean_white_OH_dps": stats["white_OH_dps"].mean,
+        "mean_slam_MH_dps": stats["slam_MH_dps"].mean,
+        "mean_slam_OH_dps": stats["slam_OH_dps"].mean,
+        "mean_BT_dps": stats["BT_dps"].mean,
+        "mean_WW_dps": stats["WW_dps"].mean,
+        "mean_DR_dps": stats["DR_dps"].mean,
+        "mean_RB_dps": stats["RB_dps"].mean,
+        "mean_hs_dps": stats["hs_dps"].mean,
+        "mean_cleave_dps": stats["cleave_dps"].mean,
+        "mean_ambi_dps": stats["Ambi_dps"].mean,
+        "mean_proc_dmg_dps": stats["Proc_dmg_dps"].mean,
+        "avg_flurry_uptime": stats["flurry_uptime"].mean,
+        "avg_enrage_uptime": stats["enrage_uptime"].mean,
+        "mean_avg_MH_dmg": stats["avg_MH_dmg"].mean,
+        "mean_avg_OH_dmg": stats["avg_OH_dmg"].mean,
+        "Deep Wounds DPS": stats["deep_wounds_dps"].mean,
+        "avg_crusader_uptime": stats["crusader_uptime"].mean,
+        "avg_crusader_oh_uptime": stats["crusader_oh_uptime"].mean,
+        "avg_Empyrian_Demolisher_uptime": stats["Empyrian_Demolisher_uptime"].mean,
+        "avg_bonereavers_uptime": stats["bonereavers_uptime"].mean,
+        "avg_eternal_flame_uptime": stats["eternal_flame_uptime"].mean,
+        "avg_death_wish_uptime": stats["death_wish_uptime"].mean,
+        "mean_Rend_dps": stats["Rend_dps"].mean,
+        "attack_counts_total": merged["attack_counts_total"],
+        "count_stats": merged["count_stats"],
+        "attack_counts": attack_count_summary(merged["attack_counts_total"], merged["count_stats"]),
     }
+    if merged["raw"] is not None:
+        result.update(merged["raw"])
+    return result
@@ -0,0 +1,117 @@
+from heapq import heappush, heappop
+
+# -------------------------
+# Event scheduler
+# -------------------------
+class EventScheduler:
+    """
+    Single-threaded event queue for one fight.
+    Events are (time, seq, kind, payload) tuples, kind an event code; seq breaks ties in
+    scheduling order, exactly like the (time, id, ...) tuples we used to
+    put on a queue.PriorityQueue, but without its lock and condition variable.
+    """
+    __slots__ = ("_heap", "_seq")
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def schedule(self, time, kind, payload=False):
+        self._seq += 1
+        heappush(self._heap, (time, self._seq, kind, payload))
+
+    def pop(self):
+        return heappop(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    @property
+    def scheduled(self):
+        """Total number of events scheduled so far."""
+        return self._seq
+
+
+# -------------------------
+# Event codes
+# -------------------------
+# Recurring timers first, so a timer's code is also its TimerCalendar slot
+EVENT_KINDS = ("MH_SWING", "OH_SWING", "GCD", "Tank_dummy", "POTION", "Extra_Attack")
+MH_SWING, OH_SWING, GCD, TANK_DUMMY, POTION, EXTRA_ATTACK = range(len(EVENT_KINDS))
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_KINDS)}
+
+
+# -------------------------
+# Timer calendar
+# -------------------------
+INF = float("inf")
+
+# Recurring timers: never more than one pending instance each.
+TIMER_SLOTS = EVENT_KINDS[:EXTRA_ATTACK]
+_TIMER_COUNT = len(TIMER_SLOTS)
+
+
+class TimerCalendar:
+    """
+    Event queue with one fixed slot per recurring timer and a heap only for
+    dynamic events (Extra_Attack). Picking the next event is a min over a
+    handful of entries instead of heap churn.
+
+    A timer slot holds a single pending fire time: scheduling a timer that is
+    already pending with the same payload keeps the earlier of the two, so
+    duplicate GCD wakeups collapse into one rotation evaluation instead of
+    piling up. A payload that differs from the pending one means something
+    to the handler (a rotation token, say), so that event is never merged
+    away: it goes on the heap beside the slot and fires in its own turn.
+
+    Dropping a later duplicate can still shift a rotation evaluation (the
+    extra attacks of HoJ schedule such duplicates), so fights match the heap
+    engine exactly on the default config but not with every option.
+    """
+    __slots__ = ("_entries", "_pending", "_heap", "_seq")
+
+    def __init__(self):
+        # Empty slots sort last; seq 0 is never handed out
+        self._entries = [(INF, 0, kind, None) for kind in range(_TIMER_COUNT)]
+        self._pending = 0
+        self._heap = []
+        self._seq = 0
+
+    def schedule(self, time, kind, payload=False):
+        self._seq += 1
+        if kind >= _TIMER_COUNT:
+            heappush(self._heap, (time, self._seq, kind, payload))
+            return
+        current, _, _, current_payload = self._entries[kind]
+        if current == INF:
+            self._pending += 1
+        elif payload != current_payload:
+            heappush(self._heap, (time, self._seq, kind, payload))
+            return
+        elif time >= current:
+            return
+        self._entries[kind] = (time, self._seq, kind, payload)
+
+    def pop(self):
+        entry = min(self._entries)
+        heap = self._heap
+        if heap and (not self._pending or heap[0] < entry):
+            return heappop(heap)
+        kind = entry[2]
+        self._entries[kind] = (INF, 0, kind, None)
+        self._pending -= 1
+        return entry
+
+    def __len__(self):
+        return len(self._heap) + self._pending
+
+    def __bool__(self):
+        return self._pending > 0 or bool(self._heap)
+
+    @property
+    def scheduled(self):
+        """Total number of schedule() calls so far, merged timers included."""
+        return self._seq
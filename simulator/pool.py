@@ -0,0 +1,240 @@
+"""
+Worker pool kept alive across run_simulation calls.
+
+    with SimulationPool() as pool:
+        for config in sweep:
+            result = run_simulation(1000, pool=pool, **config)
+
+A fresh multiprocessing.Pool per call costs more than a short run: the
+processes start (and under spawn re-import the simulator) every time, and
+fight_kwargs is pickled into every task. A SimulationPool starts its
+processes once. Each distinct fight_kwargs is pickled once into a shared
+memory block; tasks carry only the block's name, and a worker unpickles a
+config the first time it sees the name and keeps it.
+
+Work goes out in chunks as workers free up, so a slow worker doesn't hold
+up the others, and exactly the requested number of fights is run. Chunk
+sizes are tuned from the fights/s measured on earlier chunks of the same
+config: about CHUNK_SECONDS of work each, shrinking towards the end of a
+run so the workers finish together. A run that fits in one chunk is
+simulated in the calling process without touching the workers.
+
+Each finished chunk can be reported to an on_chunk callback as it comes
+in, and a run can be cancelled through any object with is_set() (a
+threading.Event): no more chunks go out, and a flag the workers share
+makes the ones already queued return without simulating, so the run
+stops within the chunks in progress and returns what finished.
+
+run_simulation without a pool still starts and shuts down one of its own.
+"""
+import multiprocessing as mp
+import os
+import pickle
+import time
+from collections import OrderedDict
+from math import ceil
+from multiprocessing import shared_memory
+from queue import Queue, Empty
+
+if os.name == "posix":
+    from multiprocessing import resource_tracker
+else:  # no tracker for shared memory on Windows
+    resource_tracker = None
+
+# Configs kept in shared memory by a pool, and unpickled configs kept by each worker
+CONFIG_CACHE_SIZE = 8
+
+# Wall time one chunk should take once the rate is known
+CHUNK_SECONDS = 0.25
+# Chunk size before any rate has been measured, and the smallest chunk handed out
+PROBE_CHUNK = 32
+MIN_CHUNK = 8
+# Seconds between checks of the cancel token while waiting for chunks
+CANCEL_POLL = 0.05
+
+# In worker processes: shared memory name -> fight_kwargs, and the pool's cancel flag
+_worker_configs = {}
+_cancel_flag = None
+
+
+def _init_worker(cancel_flag):
+    global _cancel_flag
+    _cancel_flag = cancel_flag
+
+
+def _load_config(name):
+    config = _worker_configs.get(name)
+    if config is None:
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            config = pickle.loads(block.buf)
+        finally:
+            block.close()
+        if len(_worker_configs) >= CONFIG_CACHE_SIZE:
+            _worker_configs.clear()
+        _worker_configs[name] = config
+    return config
+
+
+def _run_task(task):
+    worker, name, (first, iterations, seed, raw) = task
+    if _cancel_flag is not None and _cancel_flag.value:
+        return first, None, 0.0
+    start = time.perf_counter()
+    chunk = worker((first, iterations, seed, _load_config(name), raw))
+    return first, chunk, time.perf_counter() - start
+
+
+class SimulationPool:
+    """
+    Long-lived worker processes for run_simulation. start() is implicit on
+    first use; shutdown() stops the workers and frees the shared configs.
+    Also a context manager.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or mp.cpu_count()
+        self._pool = None
+        self._cancel_flag = None
+        self._configs = OrderedDict()  # pickled fight_kwargs -> SharedMemory
+        self._rates = {}  # (worker, pickled fight_kwargs) -> fights/s of one worker
+
+    @property
+    def running(self):
+        return self._pool is not None
+
+    def start(self):
+        if self._pool is None:
+            if resource_tracker is not None:
+                # Workers must share the parent's tracker, or each one's own
+                # tracker would unlink the config blocks when it exits
+                resource_tracker.ensure_running()
+            self._cancel_flag = mp.Value("b", 0, lock=False)
+            self._pool = mp.Pool(self.processes, initializer=_init_worker, initargs=(self._cancel_flag,))
+        return self
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._cancel_flag = None
+        while self._configs:
+            self._release(self._configs.popitem()[1])
+        self._rates.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    @staticmethod
+    def _release(block):
+        block.close()
+        block.unlink()
+
+    def _share(self, data):
+        """Name of the shared memory block holding the pickled config `data`."""
+        block = self._configs.get(data)
+        if block is not None:
+            self._configs.move_to_end(data)
+            return block.name
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        block.buf[:len(data)] = data
+        self._configs[data] = block
+        while len(self._configs) > CONFIG_CACHE_SIZE:
+            self._release(self._configs.popitem(last=False)[1])
+        return block.name
+
+    def rate(self, worker, fight_kwargs):
+        """Measured fights/s of one worker process on this config, or None."""
+        return self._rates.get((worker, pickle.dumps(fight_kwargs, pickle.HIGHEST_PROTOCOL)))
+
+    def run(self, worker, fight_kwargs, iterations, seed, raw=False, chunk_size=None, granularity=1, first=0,
+            on_chunk=None, cancel=None):
+        """
+        Fights first .. first + iterations - 1 of worker((first, iterations, seed, fight_kwargs, raw)),
+        split into chunks of chunk_size (tuned when None) that start on
+        multiples of `granularity`. Returns the chunk results in fight order;
+        after a cancel, only the chunks that finished.
+
+        on_chunk(chunk, end) is called in this process as each chunk comes
+        in, `end` being first + iterations.
+        """
+        end = first + iterations
+        if cancel is not None and cancel.is_set():
+            return []
+        data = pickle.dumps(fight_kwargs, pickle.HIGHEST_PROTOCOL)
+        key = (worker, data)
+        rate = self._rates.get(key)
+        tuned = chunk_size is None
+        if tuned:
+            chunk_size = max(MIN_CHUNK, int(rate * CHUNK_SECONDS)) if rate else PROBE_CHUNK
+
+        def aligned(size):
+            return max(granularity, -(-size // granularity) * granularity)
+
+        fights = seconds = 0.0
+        if iterations <= aligned(chunk_size):
+            start = time.perf_counter()
+            chunks = [worker((first, iterations, seed, fight_kwargs, raw))]
+            fights, seconds = iterations, time.perf_counter() - start
+            if on_chunk is not None:
+                on_chunk(chunks[0], end)
+        else:
+            name = self._share(data)
+            self.start()
+            done = Queue()
+            in_flight = 0
+            cancelled = False
+            self._cancel_flag.value = 0
+            results = []
+
+            def submit():
+                nonlocal first, in_flight
+                size = chunk_size
+                remaining = end - first
+                if tuned:
+                    if seconds:
+                        size = max(MIN_CHUNK, int(fights / seconds * CHUNK_SECONDS))
+                    size = min(size, max(MIN_CHUNK, ceil(remaining / self.processes)))
+                size = min(aligned(size), remaining)
+                task = (worker, name, (first, size, seed, raw))
+                self._pool.apply_async(_run_task, (task,), callback=done.put, error_callback=done.put)
+                first += size
+                in_flight += 1
+
+            # Two chunks queued per worker, so none idles while its next one is sent
+            while first < end and in_flight < 2 * self.processes:
+                submit()
+            while in_flight:
+                try:
+                    item = done.get(timeout=CANCEL_POLL if cancel is not None else None)
+                except Empty:
+                    item = None
+                if not cancelled and cancel is not None and cancel.is_set():
+                    cancelled = True
+                    self._cancel_flag.value = 1
+                if item is None:
+                    continue
+                in_flight -= 1
+                if isinstance(item, BaseException):
+                    raise item
+                chunk_first, chunk, elapsed = item
+                if chunk is None:  # skipped after a cancel
+                    continue
+                results.append((chunk_first, chunk))
+                fights += chunk["iterations_chunk"]
+                seconds += elapsed
+                if on_chunk is not None:
+                    on_chunk(chunk, end)
+                if first < end and not cancelled:
+                    submit()
+            chunks = [chunk for _, chunk in sorted(results, key=lambda item: item[0])]
+
+        if seconds:
+            if len(self._rates) >= 4 * CONFIG_CACHE_SIZE:
+                self._rates.clear()
+            self._rates[key] = fights / seconds
+        return chunks
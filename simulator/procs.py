@@ -1,4 +1,5 @@
 import random
+from math import log, log1p
 
 # -------------------------
 # Define all available on-hit procs
@@ -134,13 +135,13 @@ ALL_PROCS = {
 # -------------------------
 # On-hit proc resolver
 # -------------------------
-def resolve_on_hit_procs(time, weapon_speed, procs_to_check=None, cooldowns=None):
+def resolve_on_hit_procs(time, weapon_speed, procs_to_check=None, cooldowns=None, roll=random.random):
     if cooldowns is None:
         cooldowns = {}
     triggered = []
 
     procs = ALL_PROCS if procs_to_check is None else {
-        k: ALL_PROCS[k] for k in procs_to_check if k in ALL_PROCS
+        k: ALL_PROCS[k] for k in sorted(procs_to_check) if k in ALL_PROCS
     }
 
     for name, proc in procs.items():
@@ -152,10 +153,10 @@ def resolve_on_hit_procs(time, weapon_speed, procs_to_check=None, cooldowns=None
 
         triggered_now = False
         if proc.get("flat_chance"):
-            if random.random() < proc["chance"]:
+            if roll() < proc["chance"]:
                 triggered_now = True
         else:
-            if random.random() < (proc["chance"] * weapon_speed / 60):
+            if roll() < (proc["chance"] * weapon_speed / 60):
                 triggered_now = True
 
         if triggered_now:
@@ -196,3 +197,184 @@ def apply_on_hit_procs(triggered_procs, time, onhit_buffs):
                 proc["name"], "arpen", arpen_percent, proc["duration"], time,
                 ignore_if_active=proc.get("ignore_if_active", False), max_stacks=max_stacks
             )
+
+
+# -------------------------
+# Compiled proc tables
+# -------------------------
+# (ALL_PROCS key, buff stat) in the order apply_on_hit_procs applies them
+_BUFF_FIELDS = (("str_buff", "strength"), ("ap_buff", "ap"), ("haste_buff", "haste"),
+                ("crit_buff", "crit"), ("arpen_rating_buff", "arpen"))
+
+
+class CompiledProc:
+    """
+    One proc of one weapon slot, resolved against ALL_PROCS at fight setup.
+    chance is the per-swing probability, slot the proc's index in the fight's
+    cooldown list (-1 = no cooldown), buffs the add_buff arguments and effect
+    the pre-bound combat effect (effect(state) -> damage, or None).
+    """
+    __slots__ = ("name", "chance", "cooldown", "slot", "buffs", "effect")
+
+    def __init__(self, name, chance, cooldown, slot, buffs, effect):
+        self.name = name
+        self.chance = chance
+        self.cooldown = cooldown
+        self.slot = slot
+        self.buffs = buffs
+        self.effect = effect
+
+
+def proc_cooldown_slots(*proc_sets):
+    """Give every proc with a cooldown an index into a flat cooldown list."""
+    slots = {}
+    for procs in proc_sets:
+        for name in procs:
+            if name not in slots and ALL_PROCS.get(name, {}).get("cooldown") is not None:
+                slots[name] = len(slots)
+    return slots
+
+
+def compile_proc_table(procs_to_check, weapon_speed, cooldown_slots, bind_effect=None):
+    """
+    Turn a set of proc names into a tuple of CompiledProc records, in the
+    order resolve_on_hit_procs would roll them (by name, so the order of
+    the rolls doesn't change with string hashing from one process to the
+    next). bind_effect(name, proc) returns the proc's combat effect
+    handler, or None.
+    """
+    table = []
+    for name in sorted(procs_to_check):
+        proc = ALL_PROCS.get(name)
+        if proc is None:
+            continue
+        if proc.get("flat_chance"):
+            chance = proc["chance"]
+        else:
+            chance = proc["chance"] * weapon_speed / 60
+        cooldown = proc.get("cooldown")
+        slot = cooldown_slots[name] if cooldown is not None else -1
+
+        ignore_if_active = proc.get("ignore_if_active", False)
+        max_stacks = proc.get("max_stacks", 1)
+        buffs = []
+        for field, stat in _BUFF_FIELDS:
+            if field not in proc:
+                continue
+            value = proc[field]
+            buff_name = name
+            if stat == "crit" and name == "icon":
+                buff_name = "icon crit"
+            elif stat == "arpen":
+                value = value / 500.0
+            buffs.append((buff_name, stat, value, proc["duration"], ignore_if_active, max_stacks))
+
+        effect = bind_effect(name, proc) if bind_effect is not None else None
+        table.append(CompiledProc(name, chance, cooldown, slot, tuple(buffs), effect))
+    return tuple(table)
+
+
+def roll_procs(table, time, cooldowns, roll=random.random):
+    """Roll a compiled table for one hit; returns the procs that fired."""
+    triggered = []
+    for proc in table:
+        slot = proc.slot
+        if slot < 0:
+            if roll() < proc.chance:
+                triggered.append(proc)
+        elif cooldowns[slot] <= time:
+            if roll() < proc.chance:
+                triggered.append(proc)
+                cooldowns[slot] = time + proc.cooldown
+    return triggered
+
+
+def apply_compiled_procs(triggered, time, onhit_buffs):
+    add_buff = onhit_buffs.add_buff
+    for proc in triggered:
+        for name, stat, value, duration, ignore_if_active, max_stacks in proc.buffs:
+            add_buff(name, stat, value, duration, time, ignore_if_active=ignore_if_active, max_stacks=max_stacks)
+
+
+# -------------------------
+# Geometric skip-ahead sampling
+# -------------------------
+_NEVER = float("inf")
+
+
+def _geometric(log_q, roll):
+    """Number of Bernoulli trials up to and including the first success, log_q = log(1 - p)."""
+    if log_q == 0.0:
+        return _NEVER
+    return int(log(1.0 - roll()) / log_q) + 1
+
+
+class GeometricProcTable:
+    """
+    Skip-ahead sampler over a compiled proc table. The per-hit chance of
+    every proc is fixed for the fight, so instead of one random() per proc
+    per hit we draw how many qualifying hits remain until the next proc and
+    count down: same distribution, one draw per proc that fires.
+
+    Procs without a cooldown qualify on every hit and are tracked as the
+    absolute hit number they fire on. Procs with a cooldown only qualify while
+    it is up (the slot is shared with the fight's other tables), so they keep
+    their own countdown that doesn't move during the cooldown.
+
+    With only a few procs per table the saved draws barely show: on the
+    default config proc_sampling="geometric" runs no measurably faster than
+    the Bernoulli rolls (see simulator.bench).
+    """
+    __slots__ = ("procs", "log_q", "hits", "fire_at", "next_fire", "gated", "countdowns")
+
+    def __init__(self, table, roll=random.random):
+        self.procs = table
+        self.log_q = [log1p(-proc.chance) if proc.chance < 1 else -_NEVER for proc in table]
+        self.hits = 0
+        self.fire_at = {}     # table index -> hit number, procs without a cooldown
+        self.gated = []       # table indices of procs with a cooldown
+        self.countdowns = {}  # table index -> qualifying hits left
+        for i, proc in enumerate(table):
+            if proc.slot < 0:
+                self.fire_at[i] = _geometric(self.log_q[i], roll)
+            else:
+                self.gated.append(i)
+                self.countdowns[i] = _geometric(self.log_q[i], roll)
+        self.next_fire = min(self.fire_at.values(), default=_NEVER)
+
+
+def roll_procs_geometric(sampler, time, cooldowns, roll=random.random):
+    """roll_procs for a GeometricProcTable."""
+    hits = sampler.hits + 1
+    sampler.hits = hits
+    fired = None
+
+    if hits >= sampler.next_fire:
+        fire_at = sampler.fire_at
+        fired = []
+        for i, at in fire_at.items():
+            if at == hits:
+                fired.append(i)
+                fire_at[i] = hits + _geometric(sampler.log_q[i], roll)
+        sampler.next_fire = min(fire_at.values())
+
+    for i in sampler.gated:
+        proc = sampler.procs[i]
+        if cooldowns[proc.slot] > time:
+            continue
+        left = sampler.countdowns[i] - 1
+        if left:
+            sampler.countdowns[i] = left
+            continue
+        sampler.countdowns[i] = _geometric(sampler.log_q[i], roll)
+        cooldowns[proc.slot] = time + proc.cooldown
+        if fired is None:
+            fired = []
+        fired.append(i)
+
+    if fired is None:
+        return ()
+    if len(fired) > 1:
+        fired.sort()
+    procs = sampler.procs
+    return [procs[i] for i in fired]
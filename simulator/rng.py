@@ -0,0 +1,92 @@
+"""
+Pre-drawn random numbers for the scalar engine.
+
+Every roll site reads its uniforms from a RandomPool instead of calling
+random.random() itself: the pool refills in blocks from a vectorized
+generator and hands them out through a bound chain iterator, so a draw is
+one C-level __next__ call.
+
+Draws are grouped by purpose:
+
+    attack  - attack table rolls
+    damage  - weapon damage rolls and the crit rolls of procs and Ambidextrous
+    proc    - on-hit proc chances (Bernoulli and geometric sampling)
+    talent  - talent and rotation procs (Bloodsurge, Raging Onslaught,
+              Power Slam) and Mighty Rage Potion rage
+
+By default all four read one stream. With substreams=True each gets its own
+generator, so changing how often one kind of roll is drawn (a different
+talent, another proc) doesn't shift the numbers the others see; that keeps
+paired runs on common random numbers.
+"""
+import random
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:  # falls back to random.Random blocks
+    np = None
+
+STREAMS = ("attack", "damage", "proc", "talent")
+
+# Uniforms drawn per refill
+BLOCK_SIZE = 4096
+# ... for a one-fight pool (a default fight draws a few hundred)
+FIGHT_BLOCK_SIZE = 512
+
+
+def _blocks(draw, size):
+    while True:
+        yield draw(size)
+
+
+def _block_draws(seed, count):
+    """`count` independent block generators for one seed."""
+    if np is not None:
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        seeds = seed.spawn(count) if count > 1 else [seed]
+        return [lambda size, gen=np.random.default_rng(s): gen.random(size).tolist() for s in seeds]
+    draws = []
+    for i in range(count):
+        rand = random.Random(seed if count == 1 else f"{seed}/{i}").random
+        draws.append(lambda size, rand=rand: [rand() for _ in range(size)])
+    return draws
+
+
+def fight_seed(seed, index):
+    """
+    Seed of fight `index` in a run seeded with `seed`: child `index` of
+    SeedSequence(seed), the one SeedSequence(seed).spawn() would hand out
+    in that position. Every fight gets its own stream, whichever worker
+    simulates it and however the run is chunked.
+    """
+    if np is not None:
+        return np.random.SeedSequence(seed, spawn_key=(index,))
+    return f"{seed}/{index}"
+
+
+class RandomPool:
+    """
+    Block-buffered uniforms in [0, 1) for one worker. pool.attack(),
+    pool.damage(), pool.proc() and pool.talent() each return the next
+    uniform of their stream. `seed` is an int or a SeedSequence (see
+    fight_seed). Without a seed the pool seeds itself from the global random
+    module, so random.seed() still makes a run reproducible.
+    """
+    __slots__ = STREAMS + ("seed", "substreams")
+
+    def __init__(self, seed=None, substreams=False, block_size=BLOCK_SIZE):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.substreams = substreams
+        draws = _block_draws(seed, len(STREAMS) if substreams else 1)
+        streams = [chain.from_iterable(_blocks(draw, block_size)).__next__ for draw in draws]
+        for i, name in enumerate(STREAMS):
+            setattr(self, name, streams[i if substreams else 0])
+
+
+def randint(roll, low, high):
+    """random.randint(low, high) from one uniform of `roll`."""
+    return low + int(roll() * (high - low + 1))
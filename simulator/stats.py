@@ -0,0 +1,161 @@
+"""
+Streaming per-metric summaries for the workers.
+
+A RunningStats keeps what the results need from one per-fight metric
+without the per-fight values: count, sum and sum of squares, min, max and
+a fixed-width histogram. Summaries from different workers merge by adding
+them up, so the parent never has to see the raw vectors.
+
+The sums are exact. Every finite float is a whole multiple of 2**-1074,
+so a value is added as a Python int counting those units (its square in
+units of 2**-2148). Integer sums don't depend on the order they're taken
+in, which makes the merged mean and variance bit-identical however the
+fights were split across chunks and workers; they're rounded to float
+once, when read.
+"""
+from math import sqrt
+
+try:
+    import numpy as np
+except ImportError:  # from_values falls back to add()
+    np = None
+
+INF = float("inf")
+
+# Sums count units of 2**-EXACT_SHIFT (squares: 2**-(2 * EXACT_SHIFT))
+EXACT_SHIFT = 1074
+
+# Limbs of the 53-bit mantissas for from_values' int64 sums
+_LIMB = 18
+_LIMB_MASK = (1 << _LIMB) - 1
+
+
+def _exact_sums(values):
+    """(sum, sum of squares) of a float64 array in exact units, vectorized."""
+    mantissa, exponent = np.frexp(values)
+    mantissa = (mantissa * 2.0 ** 53).astype(np.int64)
+    # value = mantissa * 2**(exponent - 53) = mantissa << shift units
+    shifts = exponent.astype(np.int64) + (EXACT_SHIFT - 53)
+    total = total_sq = 0
+    for shift in np.unique(shifts).tolist():
+        m = mantissa[shifts == shift]
+        a, b, c = m >> (2 * _LIMB), (m >> _LIMB) & _LIMB_MASK, m & _LIMB_MASK
+        part = (int(a.sum()) << (2 * _LIMB)) + (int(b.sum()) << _LIMB) + int(c.sum())
+        part_sq = ((int((a * a).sum()) << (4 * _LIMB)) + (int((2 * a * b).sum()) << (3 * _LIMB))
+                   + (int((b * b + 2 * a * c).sum()) << (2 * _LIMB)) + (int((2 * b * c).sum()) << _LIMB)
+                   + int((c * c).sum()))
+        if shift >= 0:
+            total += part << shift
+            total_sq += part_sq << (2 * shift)
+        else:  # subnormals: the mantissas carry enough trailing zeros
+            total += part >> -shift
+            total_sq += part_sq >> (-2 * shift)
+    return total, total_sq
+
+
+class RunningStats:
+    """
+    Summary of one metric. Histogram bins are [k * width, (k + 1) * width),
+    stored sparsely as {k: count}, so no value range has to be known up front
+    and merging two histograms is exact.
+    """
+    __slots__ = ("width", "count", "total", "total_sq", "min", "max", "bins")
+
+    def __init__(self, width=1.0):
+        self.width = width
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.min = INF
+        self.max = -INF
+        self.bins = {}
+
+    def add(self, x):
+        self.count += 1
+        n, d = x.as_integer_ratio()
+        shift = EXACT_SHIFT + 1 - d.bit_length()
+        self.total += n << shift
+        self.total_sq += (n * n) << (2 * shift)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        k = int(x // self.width)
+        bins = self.bins
+        bins[k] = bins.get(k, 0) + 1
+
+    @classmethod
+    def from_values(cls, values, width=1.0):
+        """Summary of a whole vector at once (vectorized when numpy is available)."""
+        stats = cls(width)
+        if np is None:
+            for x in values:
+                stats.add(x)
+            return stats
+        values = np.asarray(values, dtype=float)
+        if not values.size:
+            return stats
+        stats.count = int(values.size)
+        stats.total, stats.total_sq = _exact_sums(values)
+        stats.min = float(values.min())
+        stats.max = float(values.max())
+        keys, counts = np.unique(np.floor_divide(values, width).astype(np.int64), return_counts=True)
+        stats.bins = dict(zip(keys.tolist(), counts.tolist()))
+        return stats
+
+    def merge(self, other):
+        """Fold another summary of the same metric into this one."""
+        if other.width != self.width:
+            raise ValueError(f"can't merge histograms with bin widths {self.width} and {other.width}")
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        bins = self.bins
+        for k, n in other.bins.items():
+            bins[k] = bins.get(k, 0) + n
+        return self
+
+    @property
+    def mean(self):
+        return self.total / (self.count << EXACT_SHIFT) if self.count else 0.0
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1)."""
+        count = self.count
+        if count < 2:
+            return 0.0
+        return (count * self.total_sq - self.total * self.total) / ((count * (count - 1)) << (2 * EXACT_SHIFT))
+
+    @property
+    def std(self):
+        return sqrt(self.variance)
+
+    @property
+    def stderr(self):
+        """Standard error of the mean."""
+        return sqrt(self.variance / self.count) if self.count else 0.0
+
+    def histogram(self, max_bins=None):
+        """
+        [(left edge, width, count)] in value order. With max_bins, adjacent
+        bins are merged by a whole factor until at most max_bins remain.
+        """
+        if not self.bins:
+            return []
+        first, last = min(self.bins), max(self.bins)
+        factor = 1
+        if max_bins:
+            factor = max(1, -(-(last - first + 1) // max_bins))
+        merged = {}
+        for k, n in self.bins.items():
+            j = (k - first) // factor
+            merged[j] = merged.get(j, 0) + n
+        width = self.width * factor
+        return [((first + j * factor) * self.width, width, merged[j]) for j in sorted(merged)]
+
+    def summary(self):
+        return {"count": self.count, "mean": self.mean, "std": self.std, "stderr": self.stderr,
+                "min": self.min, "max": self.max}